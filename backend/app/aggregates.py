@@ -0,0 +1,105 @@
+"""Additive per-user spending aggregates behind the analysis endpoint.
+
+Every view in the spending analysis is a sum over transactions grouped by
+one key: category, calendar month, week, or weekday x hour. Each
+transaction therefore maps to one bucket per dimension, and inserting or
+deleting it adds or subtracts (amount, 1) on those few rows. The analysis
+then reads a handful of rows per user however long the history is.
+
+This module only computes buckets and deltas; crud applies them.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = "category"
+MONTH = "month"
+WEEK = "week"
+WEEKDAY_HOUR = "weekday_hour"
+DIMENSIONS = (CATEGORY, MONTH, WEEK, WEEKDAY_HOUR)
+
+# Analysis period -> dimension holding its totals
+PERIOD_DIMENSIONS = {"monthly": MONTH, "weekly": WEEK}
+
+AggregateKey = Tuple[int, str, str]
+
+
+def week_bucket(monday) -> str:
+    # Same label as str(pd.Period(day, 'W')): Monday/Sunday of the week
+    return f"{monday:%Y-%m-%d}/{monday + timedelta(days=6):%Y-%m-%d}"
+
+
+def buckets(date: datetime, category: str) -> List[Tuple[str, str]]:
+    """The (dimension, bucket) pairs one transaction contributes to"""
+    monday = date.date() - timedelta(days=date.weekday())
+    return [
+        (CATEGORY, category),
+        (MONTH, f"{date:%Y-%m}"),
+        (WEEK, week_bucket(monday)),
+        (WEEKDAY_HOUR, f"{date.weekday()}:{date.hour:02d}"),
+    ]
+
+
+def deltas(transactions: Iterable, sign: int = 1) -> Dict[AggregateKey, list]:
+    """Sum transactions into (user_id, dimension, bucket) -> [total, count] deltas.
+
+    ``sign=-1`` produces the deltas that remove the transactions again.
+    """
+    result = defaultdict(lambda: [0.0, 0])
+    for t in transactions:
+        for dimension, bucket in buckets(t.date, t.category):
+            entry = result[(t.user_id, dimension, bucket)]
+            entry[0] += sign * t.amount
+            entry[1] += sign
+    return result
+
+
+def deltas_from_frame(df: pd.DataFrame) -> Dict[AggregateKey, list]:
+    """Vectorized ``deltas`` for a user_id/date/amount/category frame.
+
+    Rows are grouped on numeric keys first and only the distinct groups are
+    formatted into bucket labels.
+    """
+    if df.empty:
+        return {}
+    dates = df["date"]
+    monday = dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit="D")
+    keys = {
+        CATEGORY: (df["category"], lambda value: value),
+        MONTH: (dates.dt.year * 100 + dates.dt.month, lambda value: f"{value // 100:04d}-{value % 100:02d}"),
+        WEEK: (monday, lambda value: week_bucket(value)),
+        WEEKDAY_HOUR: (dates.dt.weekday * 100 + dates.dt.hour, lambda value: f"{value // 100}:{value % 100:02d}"),
+    }
+    result = {}
+    for dimension, (key, label) in keys.items():
+        grouped = (
+            df["amount"].groupby([df["user_id"], key.rename("key")], sort=False, observed=True)
+            .agg(["sum", "count"])
+        )
+        for (user_id, value), total, count in zip(grouped.index, grouped["sum"], grouped["count"]):
+            if isinstance(value, (np.integer, int)):
+                value = int(value)
+            result[(int(user_id), dimension, label(value))] = [float(total), int(count)]
+    return result
+
+
+def weekday_hour_frame(rows: pd.DataFrame) -> pd.DataFrame:
+    """Turn weekday_hour buckets back into weekday-name/hour/amount columns"""
+    if rows.empty:
+        return pd.DataFrame({
+            "weekday": pd.Series([], dtype=object),
+            "hour": pd.Series([], dtype=np.int64),
+            "amount": pd.Series([], dtype=np.float64),
+        })
+    parts = rows["bucket"].str.split(":", expand=True).astype(int)
+    weekdays = pd.Series(
+        ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    )
+    return pd.DataFrame({
+        "weekday": weekdays.iloc[parts[0]].to_numpy(),
+        "hour": parts[1].to_numpy(),
+        "amount": rows["total"].to_numpy(),
+    })
@@ -1 +1,332 @@
+"""Spending alert rules over forecast and actual daily series.
 
+Thresholds (all optional):
+    daily_spending: a forecast day's spending exceeds this amount
+    weekly_spending: spending over any 7 days ending on a forecast day
+        exceeds this amount; the first windows include recent actual days
+    negative_balance: the running balance over the forecast drops below
+        zero (``True``) or below the given amount, starting from
+        ``starting_balance`` (default 0)
+    category_budgets: monthly budgets as ``{category: budget}`` or as
+        budget-table rows ``{"category", "budget", "threshold"}``, where
+        threshold is the share of the budget that triggers a warning (0.8
+        or 80; default 1). Checked against month-to-date actuals and their
+        run rate to the end of the month.
+
+Amounts follow the transaction sign convention, so a day's spending is the
+negative part of its net amount.
+
+Every rule is a grouped or rolling operation over long frames keyed by
+user_id: check_alerts_batch evaluates any number of users in one pass and
+check_for_alerts is the single-user case.
+"""
+from datetime import date, datetime
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ALERT_COLUMNS = ['user_id', 'rule', 'category', 'date', 'value', 'threshold', 'days', 'message']
+
+
+def _number(value) -> Optional[float]:
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def budget_frame(budgets) -> pd.DataFrame:
+    """Normalize category budgets into category/budget/threshold rows"""
+    if not budgets:
+        return pd.DataFrame({'category': [], 'budget': [], 'threshold': []})
+    if isinstance(budgets, dict):
+        rows = [{'category': category, 'budget': budget} for category, budget in budgets.items()]
+    else:
+        rows = list(budgets)
+    df = pd.DataFrame(rows, columns=['category', 'budget', 'threshold'])
+    df['budget'] = pd.to_numeric(df['budget'], errors='coerce')
+    df['threshold'] = pd.to_numeric(df['threshold'], errors='coerce').fillna(1.0)
+    # Percentages from the budget table: 80 means 80%
+    df['threshold'] = df['threshold'].where(df['threshold'] <= 1, df['threshold'] / 100)
+    df = df.dropna(subset=['category', 'budget'])
+    return df[df['budget'] > 0].reset_index(drop=True)
+
+
+def _scalar_thresholds(thresholds: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    negative_balance = thresholds.get('negative_balance')
+    if isinstance(negative_balance, bool) or negative_balance is None:
+        floor = 0.0 if negative_balance else None
+    else:
+        floor = _number(negative_balance)
+    return {
+        'daily_spending': _number(thresholds.get('daily_spending')),
+        'weekly_spending': _number(thresholds.get('weekly_spending')),
+        'balance_floor': floor,
+        'starting_balance': _number(thresholds.get('starting_balance')) or 0.0,
+    }
+
+
+def _user_thresholds(user_ids: List[int], thresholds: Dict[str, Any],
+                     user_thresholds: Optional[Dict[int, Dict[str, Any]]]) -> pd.DataFrame:
+    """Scalar thresholds indexed by user; user_thresholds override the shared ones"""
+    shared = _scalar_thresholds(thresholds or {})
+    limits = pd.DataFrame(
+        {name: np.full(len(user_ids), np.nan if value is None else value) for name, value in shared.items()},
+        index=pd.Index(user_ids, name='user_id'),
+    )
+    for user_id, own in (user_thresholds or {}).items():
+        if user_id in limits.index and own:
+            row = _scalar_thresholds({**(thresholds or {}), **own})
+            limits.loc[user_id] = [np.nan if value is None else value for value in row.values()]
+    return limits
+
+
+def _user_budgets(user_ids: List[int], thresholds: Dict[str, Any],
+                  user_thresholds: Optional[Dict[int, Dict[str, Any]]]) -> pd.DataFrame:
+    """Budget rows per user: the shared budgets, replaced where a user has their own"""
+    overrides = {
+        user_id: own['category_budgets'] for user_id, own in (user_thresholds or {}).items()
+        if own and 'category_budgets' in own and user_id in set(user_ids)
+    }
+    frames = []
+    shared = budget_frame((thresholds or {}).get('category_budgets'))
+    if len(shared):
+        users = pd.DataFrame({'user_id': [u for u in user_ids if u not in overrides]})
+        frames.append(users.merge(shared, how='cross'))
+    for user_id, budgets in overrides.items():
+        frames.append(budget_frame(budgets).assign(user_id=user_id))
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=['user_id', 'category', 'budget', 'threshold'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _daily_series(forecast_df: pd.DataFrame, actuals: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Long user_id/ds/net/forecast frame: actual days followed by forecast days"""
+    forecast = pd.DataFrame({
+        'user_id': forecast_df['user_id'].to_numpy(),
+        'ds': pd.to_datetime(forecast_df['ds']).dt.normalize().to_numpy(),
+        'net': forecast_df['yhat'].to_numpy(dtype=np.float64),
+        'forecast': True,
+    })
+    if actuals is None or actuals.empty:
+        return forecast.sort_values(['user_id', 'ds'], kind='stable').reset_index(drop=True)
+
+    actual = (
+        actuals.assign(ds=pd.to_datetime(actuals['day']).dt.normalize())
+        .groupby(['user_id', 'ds'], as_index=False)['total'].sum()
+        .rename(columns={'total': 'net'})
+        .assign(forecast=False)
+    )
+    # Only actual days before each user's first forecast day
+    first_day = forecast.groupby('user_id')['ds'].min()
+    actual = actual[actual['ds'] < actual['user_id'].map(first_day).fillna(pd.Timestamp.max)]
+    return (
+        pd.concat([actual, forecast], ignore_index=True)
+        .sort_values(['user_id', 'ds'], kind='stable')
+        .reset_index(drop=True)
+    )
+
+
+def _first_and_peak(hits: pd.DataFrame, value: str, peak: str = 'max') -> pd.DataFrame:
+    """Per user: first triggering day, triggering day count and the peak value"""
+    grouped = hits.groupby('user_id')
+    idx = grouped[value].idxmax() if peak == 'max' else grouped[value].idxmin()
+    result = hits.loc[idx, ['user_id', 'ds', value]].rename(columns={value: 'value'})
+    result['first'] = grouped['ds'].min().reindex(result['user_id']).to_numpy()
+    result['days'] = grouped.size().reindex(result['user_id']).to_numpy()
+    return result.reset_index(drop=True)
+
+
+def evaluate_rules(
+    forecast_df: pd.DataFrame,
+    thresholds: Optional[Dict[str, Any]] = None,
+    actuals: Optional[pd.DataFrame] = None,
+    user_thresholds: Optional[Dict[int, Dict[str, Any]]] = None,
+    today: Optional[Union[date, datetime]] = None,
+) -> pd.DataFrame:
+    """Evaluate every rule for every user and return the triggered alerts.
+
+    ``forecast_df`` has user_id/ds/yhat rows; ``actuals`` optional
+    user_id/day/category/total rows from the daily rollup.
+    """
+    user_ids = sorted(set(forecast_df['user_id'].astype(int)) | set(
+        actuals['user_id'].astype(int) if actuals is not None and not actuals.empty else ()
+    ))
+    if not user_ids:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+
+    limits = _user_thresholds(user_ids, thresholds, user_thresholds)
+    series = _daily_series(forecast_df, actuals)
+    series['spending'] = (-series['net']).clip(lower=0)
+    on_forecast = series[series['forecast']]
+    alerts = []
+
+    # Daily spending
+    daily_limit = on_forecast['user_id'].map(limits['daily_spending'])
+    hits = on_forecast[on_forecast['spending'] > daily_limit]
+    if len(hits):
+        found = _first_and_peak(hits, 'spending')
+        found['threshold'] = found['user_id'].map(limits['daily_spending'])
+        found['message'] = [
+            f"Forecast daily spending exceeds ${limit:,.2f} on {days} day(s), "
+            f"peaking at ${value:,.2f} on {ds:%Y-%m-%d}"
+            for limit, days, value, ds in zip(found['threshold'], found['days'], found['value'], found['ds'])
+        ]
+        alerts.append(found.assign(rule='daily_spending'))
+
+    # Weekly spending: 7-day windows ending on forecast days
+    weekly_limit = series['user_id'].map(limits['weekly_spending'])
+    if weekly_limit.notna().any():
+        series['weekly'] = (
+            series.set_index('ds').groupby('user_id', sort=False)['spending']
+            .rolling('7D').sum().to_numpy()
+        )
+        hits = series[series['forecast'] & (series['weekly'] > weekly_limit)]
+        if len(hits):
+            found = _first_and_peak(hits, 'weekly')
+            found['threshold'] = found['user_id'].map(limits['weekly_spending'])
+            found['message'] = [
+                f"Spending over the 7 days to {ds:%Y-%m-%d} is forecast at ${value:,.2f}, "
+                f"above the weekly limit of ${limit:,.2f}"
+                for limit, value, ds in zip(found['threshold'], found['value'], found['ds'])
+            ]
+            alerts.append(found.assign(rule='weekly_spending'))
+
+    # Running balance over the forecast
+    floor = on_forecast['user_id'].map(limits['balance_floor'])
+    if floor.notna().any():
+        balance = (
+            on_forecast.groupby('user_id')['net'].cumsum()
+            + on_forecast['user_id'].map(limits['starting_balance'])
+        )
+        hits = on_forecast.assign(balance=balance)[balance < floor]
+        if len(hits):
+            found = _first_and_peak(hits, 'balance', peak='min')
+            found['threshold'] = found['user_id'].map(limits['balance_floor'])
+            found['message'] = [
+                f"Balance is forecast to fall below ${limit:,.2f} on {first:%Y-%m-%d} "
+                f"(lowest ${value:,.2f} on {ds:%Y-%m-%d})"
+                for limit, first, value, ds in zip(found['threshold'], found['first'], found['value'], found['ds'])
+            ]
+            alerts.append(found.assign(rule='negative_balance'))
+
+    # Category budgets against month-to-date actuals
+    budgets = _user_budgets(user_ids, thresholds, user_thresholds)
+    if len(budgets):
+        alerts.append(_budget_alerts(budgets, actuals, today))
+
+    alerts = [frame for frame in alerts if len(frame)]
+    if not alerts:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    result = pd.concat(alerts, ignore_index=True)
+    result['date'] = result.pop('first') if 'first' in result else result['ds']
+    for column in ALERT_COLUMNS:
+        if column not in result:
+            result[column] = None
+    return result[ALERT_COLUMNS].sort_values(['user_id', 'date'], kind='stable').reset_index(drop=True)
+
+
+def _budget_alerts(budgets: pd.DataFrame, actuals: Optional[pd.DataFrame], today=None) -> pd.DataFrame:
+    today = pd.Timestamp(today or datetime.now().date()).normalize()
+    month_start = today.replace(day=1)
+    if actuals is not None and not actuals.empty:
+        days = pd.to_datetime(actuals['day'])
+        month = actuals[(days >= month_start) & (days <= today)]
+        spent = (
+            month.groupby(['user_id', 'category'])['total'].sum().mul(-1).clip(lower=0)
+            .rename('spent').reset_index()
+        )
+    else:
+        spent = pd.DataFrame(columns=['user_id', 'category', 'spent'])
+    df = budgets.rename(columns={'threshold': 'share'}).merge(spent, on=['user_id', 'category'], how='left')
+    df['spent'] = df['spent'].astype(float).fillna(0.0)
+    # Straight-line run rate to the end of the month
+    df['projected'] = df['spent'] / today.day * today.days_in_month
+    over = df['spent'] >= df['budget'] * df['share']
+    trending = ~over & (df['projected'] > df['budget'])
+    df = df[over | trending].copy()
+    over = over[df.index]
+    df['rule'] = np.where(over, 'category_budget', 'category_budget_projected')
+    df['value'] = np.where(over, df['spent'], df['projected'])
+    df['date'] = today
+    df['days'] = today.day
+    df['message'] = [
+        f"{category}: ${spent:,.2f} spent this month, {spent / budget:.0%} of the ${budget:,.2f} budget"
+        if is_over else
+        f"{category}: on track to spend ${projected:,.2f} this month, over the ${budget:,.2f} budget"
+        for category, spent, projected, budget, is_over in zip(
+            df['category'], df['spent'], df['projected'], df['budget'], over
+        )
+    ]
+    return df.rename(columns={'budget': 'threshold'})[
+        ['user_id', 'rule', 'category', 'date', 'value', 'threshold', 'days', 'message']
+    ].assign(first=today)
+
+
+def _alert_records(alerts: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-ready alert dicts, built column-wise"""
+    categories = alerts['category'].astype(object).where(alerts['category'].notna(), None)
+    return [
+        {
+            'rule': rule, 'category': category, 'date': day, 'value': value,
+            'threshold': threshold, 'days': days, 'message': message,
+        }
+        for rule, category, day, value, threshold, days, message in zip(
+            alerts['rule'].tolist(), categories.tolist(),
+            pd.to_datetime(alerts['date']).dt.strftime('%Y-%m-%d').tolist(),
+            alerts['value'].astype(float).round(2).tolist(),
+            alerts['threshold'].astype(float).round(2).tolist(),
+            alerts['days'].astype(int).tolist(), alerts['message'].tolist(),
+        )
+    ]
+
+
+def check_alerts_batch(
+    forecast_df: pd.DataFrame,
+    thresholds: Optional[Dict[str, Any]] = None,
+    actuals: Optional[pd.DataFrame] = None,
+    user_thresholds: Optional[Dict[int, Dict[str, Any]]] = None,
+    today=None,
+) -> Dict[int, Dict[str, Any]]:
+    """Alert status per user for a long user_id/ds/yhat forecast frame"""
+    alerts = evaluate_rules(forecast_df, thresholds, actuals, user_thresholds, today)
+    user_ids = set(forecast_df['user_id'].astype(int))
+    if actuals is not None and not actuals.empty:
+        user_ids |= set(actuals['user_id'].astype(int))
+    results = {
+        user_id: {'potential_issues': [], 'alerts': [], 'alert_count': 0}
+        for user_id in sorted(user_ids)
+    }
+    for user_id, record in zip(alerts['user_id'].astype(int).tolist(), _alert_records(alerts)):
+        result = results[user_id]
+        result['potential_issues'].append(record['message'])
+        result['alerts'].append(record)
+        result['alert_count'] += 1
+    return results
+
+
+def check_for_alerts(
+    forecast_df: pd.DataFrame,
+    user_id: int,
+    thresholds: Optional[Dict[str, Any]] = None,
+    actuals: Optional[pd.DataFrame] = None,
+    today=None,
+) -> Dict[str, Any]:
+    """Alert status for one user's ds/yhat forecast"""
+    try:
+        forecast = forecast_df.assign(user_id=user_id)
+        if actuals is not None and 'user_id' not in actuals:
+            actuals = actuals.assign(user_id=user_id)
+        return check_alerts_batch(forecast, thresholds, actuals, today=today).get(
+            user_id, {'potential_issues': [], 'alerts': [], 'alert_count': 0}
+        )
+    except Exception as e:
+        logger.error(f"Error checking alerts for user {user_id}: {str(e)}")
+        raise
@@ -0,0 +1,49 @@
+"""Async counterparts of the crud reads behind the read endpoints.
+
+With an AsyncSession the sync crud function runs on the session's
+connection through ``run_sync``, which executes on the event loop. There it
+only fetches rows (see crud.deferring_frames); the DataFrames are built
+afterwards on the threadpool, so the loop waits on I/O but does no pandas
+work. With a plain Session the whole call runs in the threadpool, so the
+endpoints work the same whether or not DB_ASYNC is enabled.
+"""
+from typing import Any, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import crud
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession
+except ImportError:  # greenlet not installed
+    AsyncSession = None
+
+
+async def run(db, fn: Callable[..., Any], *args, **kwargs):
+    """Call ``fn(session, *args, **kwargs)`` without blocking the event loop"""
+    if AsyncSession is not None and isinstance(db, AsyncSession):
+        result = await db.run_sync(crud.deferring_frames(fn), *args, **kwargs)
+        if crud.has_raw_frames(result):
+            result = await run_in_threadpool(crud.build_frames, result)
+        return result
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def get_transactions(db, **kwargs):
+    return await run(db, crud.get_transactions, **kwargs)
+
+
+async def get_user_transaction_frame(db, user_id: int, **kwargs):
+    return await run(db, crud.get_user_transaction_frame, user_id, **kwargs)
+
+
+async def get_user_daily_rollups(db, user_id: int, **kwargs):
+    return await run(db, crud.get_user_daily_rollups, user_id, **kwargs)
+
+
+async def get_user_category_totals(db, user_id: int, **kwargs):
+    return await run(db, crud.get_user_category_totals, user_id, **kwargs)
+
+
+async def get_user_daily_totals(db, user_id: int, **kwargs):
+    return await run(db, crud.get_user_daily_totals, user_id, **kwargs)
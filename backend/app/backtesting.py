@@ -0,0 +1,267 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import forecasting
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    "prophet": forecasting.prophet_forecast,
+    "linear": forecasting.linear_regression_forecast,
+}
+
+
+def rolling_origins(days: pd.Series, initial: int, horizon: int, step: int) -> List[pd.Timestamp]:
+    """Cutoff dates for rolling-origin evaluation.
+
+    The first model trains on ``initial`` days of history, each later fold
+    moves the origin forward by ``step`` days, and every fold must leave
+    ``horizon`` days after the cutoff to score against.
+    """
+    days = pd.to_datetime(pd.Series(days)).sort_values()
+    if days.empty:
+        return []
+    first, last = days.iloc[0], days.iloc[-1]
+    cutoff = first + pd.Timedelta(days=initial)
+    cutoffs = []
+    while cutoff + pd.Timedelta(days=horizon) <= last:
+        cutoffs.append(cutoff)
+        cutoff += pd.Timedelta(days=step)
+    return cutoffs
+
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Model types already fitted once in this process (imports, compiled models)
+_warmed = set()
+
+
+def _rss_bytes(pid="self") -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _child_pids() -> List[str]:
+    pids = []
+    for path in glob.glob("/proc/self/task/*/children"):
+        try:
+            with open(path) as f:
+                pids.extend(f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def _process_tree_rss() -> Optional[int]:
+    """RSS of this process plus its children (cmdstan runs as a child process)"""
+    own = _rss_bytes()
+    if own is None:
+        return None
+    return own + sum(_rss_bytes(pid) or 0 for pid in _child_pids())
+
+
+class RssSampler:
+    """Samples process-tree RSS on a thread to find the peak above a baseline.
+
+    Covers native allocations tracemalloc can't see; None where /proc is
+    unavailable.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            rss = _process_tree_rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self.baseline = _process_tree_rss()
+        if self.baseline is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.baseline is not None:
+            self._stop.set()
+            self._thread.join()
+
+    @property
+    def delta_mb(self) -> Optional[float]:
+        if self.baseline is None or self.peak is None:
+            return None
+        return max(self.peak - self.baseline, 0) / 2 ** 20
+
+
+def measure_fit_memory(model_type: str, train: pd.DataFrame, horizon: int) -> Dict[str, Any]:
+    """Refit under tracemalloc and an RSS sampler; kept out of the timed fit"""
+    with RssSampler() as rss:
+        tracemalloc.start()
+        try:
+            MODELS[model_type](train, horizon)
+            peak_python = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"peak_python_mb": peak_python / 2 ** 20, "peak_rss_delta_mb": rss.delta_mb}
+
+
+def warm_up(model_type: str, df: pd.DataFrame, horizon: int) -> Optional[float]:
+    """Fit once, untimed, so the first fold doesn't pay for lazy imports"""
+    if model_type in _warmed:
+        return None
+    start = time.perf_counter()
+    try:
+        MODELS[model_type](df, horizon)
+    except Exception as e:
+        logger.warning(f"Warm-up fit for {model_type} failed: {str(e)}")
+        return None
+    _warmed.add(model_type)
+    return time.perf_counter() - start
+
+
+def evaluate_fold(df: pd.DataFrame, model_type: str, cutoff, horizon: int,
+                  measure_memory: bool = True) -> Dict[str, Any]:
+    """Fit on data before ``cutoff`` and score the next ``horizon`` days.
+
+    The fit is timed on its own; with ``measure_memory`` the fold is fitted
+    a second time to record its Python heap peak and process RSS growth.
+    """
+    train = df[df['ds'] < cutoff]
+    test = df[(df['ds'] >= cutoff) & (df['ds'] < cutoff + pd.Timedelta(days=horizon))]
+    fold = {"cutoff": cutoff.strftime('%Y-%m-%d'), "train_days": len(train)}
+
+    start = time.perf_counter()
+    try:
+        forecast_df, _ = MODELS[model_type](train, horizon)
+    except Exception as e:
+        fold["error"] = str(e)
+        return fold
+    finally:
+        fold["fit_seconds"] = time.perf_counter() - start
+
+    if measure_memory:
+        fold.update(measure_fit_memory(model_type, train, horizon))
+
+    scored = test.merge(forecast_df[['ds', 'yhat']], on='ds', how='inner')
+    errors = scored['y'].to_numpy() - scored['yhat'].to_numpy()
+    fold["points"] = len(scored)
+    fold["mae"] = float(np.abs(errors).mean()) if len(errors) else None
+    fold["rmse"] = float(np.sqrt((errors ** 2).mean())) if len(errors) else None
+    return fold
+
+
+def backtest_user(user_id: int, df: pd.DataFrame, model_type: str, initial: int,
+                  horizon: int, step: int, measure_memory: bool = True) -> Dict[str, Any]:
+    """Run every rolling-origin fold for one user and model"""
+    df = df.groupby('ds')['y'].sum().reset_index()
+    df['ds'] = pd.to_datetime(df['ds'])
+    cutoffs = rolling_origins(df['ds'], initial, horizon, step)
+    warmup_seconds = warm_up(model_type, df[df['ds'] < cutoffs[0]], horizon) if cutoffs else None
+    folds = [
+        evaluate_fold(df, model_type, cutoff, horizon, measure_memory)
+        for cutoff in cutoffs
+    ]
+    return {
+        "user_id": int(user_id),
+        "model_type": model_type,
+        "folds": folds,
+        "warmup_seconds": warmup_seconds,
+    }
+
+
+def summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate fold accuracy and cost per model type"""
+    summary = {}
+    rows = [
+        {"model_type": r["model_type"], **fold}
+        for r in results for fold in r["folds"]
+    ]
+    if not rows:
+        return summary
+    folds = pd.DataFrame(rows)
+    for model_type, group in folds.groupby("model_type"):
+        scored = group.dropna(subset=["mae"]) if "mae" in group else group.iloc[0:0]
+        fit = group["fit_seconds"]
+        summary[model_type] = {
+            "folds": len(group),
+            "failed_folds": int(group["error"].notna().sum()) if "error" in group else 0,
+            "mae_mean": float(scored["mae"].mean()) if len(scored) else None,
+            "rmse_mean": float(scored["rmse"].mean()) if len(scored) else None,
+            "fit_seconds_mean": float(fit.mean()),
+            "fit_seconds_p95": float(fit.quantile(0.95)),
+            "fit_seconds_total": float(fit.sum()),
+        }
+        for column in ("peak_python_mb", "peak_rss_delta_mb"):
+            values = group[column].dropna() if column in group else group.iloc[0:0]
+            summary[model_type][f"{column}_max"] = float(values.max()) if len(values) else None
+    return summary
+
+
+def run_backtest(frames: Dict[int, pd.DataFrame], model_types: List[str],
+                 initial: int = 180, horizon: int = 30, step: int = 30,
+                 workers: int = 1, measure_memory: bool = True) -> Dict[str, Any]:
+    """Backtest every (user, model) pair, optionally across worker processes.
+
+    ``frames`` maps user_id to a ds/y frame of that user's history. Returns a
+    JSON-serializable report with per-fold results and a per-model summary.
+    Each process fits every model once before timing, and fold timings
+    exclude the memory pass (skipped with ``measure_memory=False``).
+    """
+    unknown = set(model_types) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown model types: {sorted(unknown)}")
+
+    tasks = [
+        (user_id, df, model_type, initial, horizon, step, measure_memory)
+        for user_id, df in frames.items() for model_type in model_types
+    ]
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(backtest_user, *zip(*tasks)))
+    else:
+        results = [backtest_user(*task) for task in tasks]
+    wall_seconds = time.perf_counter() - start
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "config": {
+            "model_types": list(model_types),
+            "users": len(frames),
+            "initial_days": initial,
+            "horizon_days": horizon,
+            "step_days": step,
+            "workers": workers,
+            "measure_memory": measure_memory,
+        },
+        "wall_seconds": wall_seconds,
+        "summary": summarize(results),
+        "results": results,
+    }
+
+
+def write_report(report: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    logger.info(f"Backtest report written to {path}")
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with tag-based invalidation"""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._tags: Dict[Hashable, set] = {}
+        self._key_tags: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._forget(key)
+            self._entries[key] = value
+            self._key_tags[key] = tuple(tags)
+            for tag in self._key_tags[key]:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._forget(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tag: Hashable) -> int:
+        """Drop every entry stored with the given tag"""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._forget(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _forget(self, key: Hashable):
+        self._entries.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """LRUCache-compatible cache in Redis, shared by every worker process.
+
+    Values must be JSON-serializable. Each tag is a Redis set of the keys
+    stored with it, so ``invalidate`` works across processes; entries also
+    expire after ``ttl`` seconds as a backstop. ``client`` is any redis-py
+    compatible client, e.g. ``fakeredis.FakeRedis()`` when no server is
+    running locally.
+    """
+
+    def __init__(self, client, prefix: str = "cache", ttl: Optional[int] = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def _tag_key(self, tag: Hashable) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: Hashable, default=None):
+        raw = self.client.get(self._key(key))
+        self._count(raw is not None)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()):
+        name = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.set(name, json.dumps(value), ex=self.ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), name)
+            if self.ttl:
+                pipe.expire(self._tag_key(tag), self.ttl)
+        pipe.execute()
+
+    def invalidate(self, tag: Hashable) -> int:
+        tag_key = self._tag_key(tag)
+        names = list(self.client.smembers(tag_key))
+        pipe = self.client.pipeline()
+        if names:
+            pipe.delete(*names)
+        pipe.delete(tag_key)
+        pipe.execute()
+        with self._lock:
+            self.invalidations += len(names)
+        return len(names)
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if names:
+            self.client.delete(*names)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def cache_from_env(name: str, default_size: int = 128):
+    """Build a cache from <NAME>_URL and <NAME>_SIZE / <NAME>_TTL.
+
+    ``redis://...`` selects RedisCache; unset or ``memory://`` an in-process
+    LRUCache. ``fakeredis://`` runs RedisCache against an in-memory fake
+    server for local development.
+    """
+    url = os.getenv(f"{name}_URL", "memory://")
+    ttl = int(os.getenv(f"{name}_TTL", "3600"))
+    prefix = name.lower()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info(f"{name}: using Redis at {url.split('@')[-1]}")
+        return RedisCache.from_url(url, prefix=prefix, ttl=ttl)
+    if url.startswith("fakeredis://"):
+        import fakeredis
+        return RedisCache(fakeredis.FakeRedis(), prefix=prefix, ttl=ttl)
+    return LRUCache(max_size=int(os.getenv(f"{name}_SIZE", str(default_size))))
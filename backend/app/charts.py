@@ -0,0 +1,52 @@
+"""Compact, data-only chart payloads.
+
+A chart is a small dict naming the chart type, its titles and its data as
+column arrays; the client owns styling and builds the figure itself. That
+leaves out the layout template and trace defaults Plotly repeats in every
+serialized figure.
+
+Numeric columns are plain JSON lists by default. With ``binary=True`` they
+are float32 packed into base64, as ``{"dtype": "f4", "bdata": ..., "shape":
+[...]}`` (the typed-array form plotly.js also accepts). Dates are always
+ISO strings.
+"""
+import base64
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ("plotly", "compact")
+
+
+def encode_column(values, binary: bool = False):
+    """Encode one column (or 2-D grid) as a JSON list or a base64 typed array"""
+    array = np.asarray(values)
+    if array.dtype.kind == "M" or isinstance(values, pd.DatetimeIndex):
+        stamps = pd.DatetimeIndex(pd.Series(np.ravel(array)))
+        daily = bool((stamps == stamps.normalize()).all())
+        return stamps.strftime("%Y-%m-%d" if daily else "%Y-%m-%dT%H:%M:%S").tolist()
+    if array.dtype.kind in "iub" and not binary:
+        return array.tolist()
+    if array.dtype.kind in "fiub":
+        array = array.astype(np.float64)
+        if binary:
+            packed = np.ascontiguousarray(array, dtype="<f4")
+            encoded = {"dtype": "f4", "bdata": base64.b64encode(packed.tobytes()).decode("ascii")}
+            if array.ndim > 1:
+                encoded["shape"] = list(array.shape)
+            return encoded
+        # NaN is not valid JSON; send null
+        return np.where(np.isnan(array), None, array).tolist()
+    return [None if pd.isna(value) else value for value in np.ravel(array).tolist()]
+
+
+def chart(kind: str, columns: Dict[str, Any], title: Optional[str] = None,
+          binary: bool = False, **labels) -> Dict[str, Any]:
+    """Build a compact chart spec; ``labels`` carries axis titles and similar text"""
+    return {
+        "type": kind,
+        "title": title,
+        **labels,
+        "columns": {name: encode_column(values, binary) for name, values in columns.items()},
+    }
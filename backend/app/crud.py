@@ -1 +1,666 @@
+from sqlalchemy import select, delete, insert, update, func, true, tuple_
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+import functools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import base64
+import logging
+import numpy as np
+import pandas as pd
 
+from . import aggregates, models, preprocessing, schemas
+
+logger = logging.getLogger(__name__)
+
+# Columns the analytics paths are allowed to project
+FRAME_COLUMNS = ("date", "amount", "category", "account", "user_id", "id")
+
+# Callbacks invoked with a user_id after that user's transactions change
+_write_listeners: List[Callable[[int], None]] = []
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _date_filters(column, start_date=None, end_date=None):
+    """Translate inclusive YYYY-MM-DD bounds into range predicates"""
+    filters = []
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+    if start is not None:
+        filters.append(column >= start)
+    if end is not None:
+        # A bare date means "through the end of that day"
+        if end == datetime(end.year, end.month, end.day):
+            filters.append(column < end + timedelta(days=1))
+        else:
+            filters.append(column <= end)
+    return filters
+
+
+def _day_filters(column, start_date=None, end_date=None):
+    """Inclusive bounds for a Date column"""
+    filters = []
+    start = _parse_date(start_date)
+    end = _parse_date(end_date)
+    if start is not None:
+        filters.append(column >= start.date())
+    if end is not None:
+        filters.append(column <= end.date())
+    return filters
+
+
+def _frame_from_rows(rows, columns) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=list(columns))
+    for name in ("date", "day", "ds"):
+        if name in df:
+            df[name] = pd.to_datetime(df[name], format="ISO8601")
+    for name in ("amount", "total", "y"):
+        if name in df:
+            df[name] = df[name].astype(np.float64)
+    for name in ("user_id", "id", "count"):
+        if name in df:
+            df[name] = df[name].astype(np.int64)
+    return df
+
+
+class RawFrame:
+    """DBAPI rows of a frame whose construction was deferred; see deferring_frames"""
+
+    __slots__ = ("rows", "columns")
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    def build(self) -> pd.DataFrame:
+        return _frame_from_rows(self.rows, self.columns)
+
+
+_defer_frames: ContextVar[bool] = ContextVar("defer_frames", default=False)
+
+
+def deferring_frames(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a read so the frames it fetches come back as RawFrame placeholders.
+
+    Used for reads run on the event loop (AsyncSession.run_sync): the loop
+    only fetches rows and build_frames turns them into DataFrames on a
+    worker thread. ``fn`` must return its frames as fetched, alone or in a
+    tuple, list or dict.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _defer_frames.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _defer_frames.reset(token)
+    return wrapper
+
+
+def has_raw_frames(result) -> bool:
+    if isinstance(result, RawFrame):
+        return True
+    if isinstance(result, (tuple, list)):
+        return any(isinstance(item, RawFrame) for item in result)
+    if isinstance(result, dict):
+        return any(isinstance(item, RawFrame) for item in result.values())
+    return False
+
+
+def build_frames(result):
+    """Replace the RawFrame placeholders in a read's result with DataFrames"""
+    if isinstance(result, RawFrame):
+        return result.build()
+    if isinstance(result, (tuple, list)):
+        return type(result)(build_frames(item) for item in result)
+    if isinstance(result, dict):
+        return {key: build_frames(item) for key, item in result.items()}
+    return result
+
+
+def _fetch_frame(db: Session, stmt, columns) -> pd.DataFrame:
+    result = db.execute(stmt)
+    try:
+        # Read plain DBAPI tuples: skips Row construction and the per-row
+        # DateTime result processor, dates are parsed in one pass
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+    if _defer_frames.get():
+        return RawFrame(rows, columns)
+    return _frame_from_rows(rows, columns)
+
+
+def _iter_frames(db: Session, stmt, columns, chunk_size: int) -> Iterator[pd.DataFrame]:
+    # Raw fetchmany, like _fetch_frame; stream_results is not used because
+    # its row buffer prefetches rows the DBAPI cursor would then skip
+    result = db.execute(stmt)
+    try:
+        while True:
+            rows = result.cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield _frame_from_rows(rows, columns)
+    finally:
+        result.close()
+
+
+RollupKey = Tuple[int, date, str]
+
+
+def rollup_deltas(transactions: Iterable, sign: int = 1) -> Dict[RollupKey, list]:
+    """Sum transactions into (user_id, day, category) -> [total, count] deltas"""
+    deltas = defaultdict(lambda: [0.0, 0])
+    for t in transactions:
+        key = (t.user_id, t.date.date(), t.category)
+        deltas[key][0] += sign * t.amount
+        deltas[key][1] += sign
+    return deltas
+
+
+def rollup_deltas_from_frame(df: pd.DataFrame) -> Dict[RollupKey, list]:
+    """Vectorized rollup_deltas for a user_id/date/amount/category frame"""
+    if df.empty:
+        return {}
+    grouped = (
+        df.assign(day=df["date"].dt.normalize())
+        .groupby(["user_id", "day", "category"], sort=False)["amount"]
+        .agg(["sum", "count"])
+    )
+    return {
+        (int(user_id), day.date(), category): [float(total), int(count)]
+        for (user_id, day, category), total, count in zip(
+            grouped.index, grouped["sum"], grouped["count"]
+        )
+    }
+
+
+def _upsert_increment(db: Session, table, rows, keys, increments):
+    """Insert rows, adding the increment columns onto any existing row"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: table.c[name] + stmt.excluded[name] for name in increments},
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Portable fallback: update, then insert the keys that did not exist
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(*[table.c[name] == row[name] for name in keys])
+            .values({name: table.c[name] + row[name] for name in increments})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table), row)
+
+
+def _apply_counted_deltas(db: Session, table, keys, deltas: Dict[tuple, list]):
+    """Upsert [total, count] deltas and drop rows whose count fell to zero"""
+    if not deltas:
+        return
+    rows = [
+        {**dict(zip(keys, key)), "total": total, "count": count}
+        for key, (total, count) in deltas.items()
+    ]
+    _upsert_increment(db, table, rows, keys=keys, increments=("total", "count"))
+    for row in rows:
+        if row["count"] < 0:
+            db.execute(
+                delete(table)
+                .where(*[table.c[name] == row[name] for name in keys])
+                .where(table.c.count <= 0)
+            )
+
+
+def apply_rollup_deltas(db: Session, deltas: Dict[RollupKey, list]):
+    """Add deltas to the daily rollup table without committing"""
+    _apply_counted_deltas(
+        db, models.DailyRollup.__table__, ("user_id", "day", "category"), deltas
+    )
+
+
+def apply_aggregate_deltas(db: Session, deltas: Dict[aggregates.AggregateKey, list]):
+    """Add deltas to the spending aggregates without committing"""
+    _apply_counted_deltas(
+        db, models.SpendingAggregate.__table__, ("user_id", "dimension", "bucket"), deltas
+    )
+
+
+def apply_rollup_from(db: Session, source):
+    """Add the per-(user, day, category) sums of ``source`` to the rollup in one statement.
+
+    ``source`` is any table with user_id/date/amount/category columns, such
+    as a bulk-import staging table. Only SQLite and PostgreSQL are supported.
+    """
+    rollup = models.DailyRollup.__table__
+    day = func.date(source.c.date)
+    aggregated = (
+        select(source.c.user_id, day, source.c.category,
+               func.sum(source.c.amount), func.count())
+        # SQLite needs a WHERE clause to parse INSERT ... SELECT ... ON CONFLICT
+        .where(true())
+        .group_by(source.c.user_id, day, source.c.category)
+    )
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    stmt = dialect_insert(rollup).from_select(
+        ["user_id", "day", "category", "total", "count"], aggregated
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollup.c.user_id, rollup.c.day, rollup.c.category],
+        set_={
+            "total": rollup.c.total + stmt.excluded.total,
+            "count": rollup.c.count + stmt.excluded.count,
+        },
+    )
+    db.execute(stmt)
+
+
+def bump_data_versions(db: Session, user_ids: Iterable[int]):
+    """Advance the data version of each user without committing"""
+    rows = [{"user_id": user_id, "version": 1} for user_id in sorted(set(user_ids))]
+    if rows:
+        _upsert_increment(
+            db, models.UserDataVersion.__table__, rows,
+            keys=("user_id",), increments=("version",),
+        )
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """Version counter that changes whenever the user's transactions do"""
+    table = models.UserDataVersion.__table__
+    version = db.execute(
+        select(table.c.version).where(table.c.user_id == user_id)
+    ).scalar()
+    return version or 0
+
+
+def register_write_listener(callback: Callable[[int], None]):
+    """Call callback(user_id) after a commit that changed a user's transactions"""
+    _write_listeners.append(callback)
+
+
+def notify_write(user_ids: Iterable[int]):
+    for user_id in sorted(set(user_ids)):
+        for callback in _write_listeners:
+            try:
+                callback(user_id)
+            except Exception:
+                logger.exception(f"Write listener failed for user {user_id}")
+
+
+def rebuild_daily_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the daily rollup from raw transactions and commit.
+
+    Returns the number of rollup rows written.
+    """
+    rollup = models.DailyRollup.__table__
+    tx = models.Transaction.__table__
+    day = func.date(tx.c.date)
+
+    clear = delete(rollup)
+    source = (
+        select(tx.c.user_id, day, tx.c.category,
+               func.sum(tx.c.amount), func.count(tx.c.id))
+        .group_by(tx.c.user_id, day, tx.c.category)
+    )
+    if user_id is not None:
+        clear = clear.where(rollup.c.user_id == user_id)
+        source = source.where(tx.c.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(
+        insert(rollup).from_select(
+            ["user_id", "day", "category", "total", "count"], source
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def rebuild_spending_aggregates(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the spending aggregates from raw transactions, one user per commit.
+
+    Returns the number of aggregate rows written.
+    """
+    tx = models.Transaction.__table__
+    table = models.SpendingAggregate.__table__
+    if user_id is None:
+        user_ids = db.execute(select(tx.c.user_id).distinct()).scalars().all()
+        db.execute(delete(table))
+    else:
+        user_ids = [user_id]
+    written = 0
+    for uid in user_ids:
+        deltas = _recompute_aggregates(db, uid)
+        db.execute(delete(table).where(table.c.user_id == uid))
+        apply_aggregate_deltas(db, deltas)
+        db.commit()
+        written += len(deltas)
+    return written
+
+
+def _recompute_aggregates(db: Session, user_id: int) -> Dict[aggregates.AggregateKey, list]:
+    df = get_user_transaction_frame(
+        db, user_id, columns=("user_id", "date", "amount", "category"), compact=True
+    )
+    return aggregates.deltas_from_frame(df)
+
+
+def verify_spending_aggregates(db: Session, user_id: int, tolerance: float = 1e-6) -> List[dict]:
+    """Compare a user's stored aggregates with a fresh recompute; returns the mismatches"""
+    expected = _recompute_aggregates(db, user_id)
+    stored = {
+        (user_id, row.dimension, row.bucket): [row.total, row.count]
+        for row in get_user_aggregates(db, user_id).itertuples()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, [0.0, 0])
+        have = stored.get(key, [0.0, 0])
+        if want[1] != have[1] or abs(want[0] - have[0]) > tolerance * max(1.0, abs(want[0])):
+            mismatches.append({
+                "dimension": key[1], "bucket": key[2],
+                "expected": want, "stored": have,
+            })
+    return mismatches
+
+
+def create_transaction(db: Session, transaction: schemas.TransactionCreate):
+    db_transaction = models.Transaction(**transaction.model_dump())
+    db.add(db_transaction)
+    apply_rollup_deltas(db, rollup_deltas([db_transaction]))
+    apply_aggregate_deltas(db, aggregates.deltas([db_transaction]))
+    bump_data_versions(db, [db_transaction.user_id])
+    db.commit()
+    db.refresh(db_transaction)
+    notify_write([db_transaction.user_id])
+    return db_transaction
+
+
+def create_transactions(db: Session, transactions: Sequence[schemas.TransactionCreate]) -> List[dict]:
+    """Insert many transactions with one multi-row INSERT ... RETURNING and one commit.
+
+    The daily rollup and data versions are updated in the same transaction;
+    returns the created rows as dicts in input order.
+    """
+    if not transactions:
+        return []
+    table = models.Transaction.__table__
+    records = [transaction.model_dump() for transaction in transactions]
+    result = db.execute(
+        insert(table).returning(*table.c, sort_by_parameter_order=True), records
+    )
+    created = [dict(row._mapping) for row in result]
+    apply_rollup_deltas(db, rollup_deltas(transactions))
+    apply_aggregate_deltas(db, aggregates.deltas(transactions))
+    user_ids = [transaction.user_id for transaction in transactions]
+    bump_data_versions(db, user_ids)
+    db.commit()
+    notify_write(user_ids)
+    return created
+
+
+def delete_transaction(db: Session, transaction_id: int) -> Optional[models.Transaction]:
+    """Delete a transaction and subtract it from the rollup and aggregates.
+
+    Returns the deleted row, or None if it did not exist.
+    """
+    db_transaction = db.get(models.Transaction, transaction_id)
+    if db_transaction is None:
+        return None
+    db.delete(db_transaction)
+    apply_rollup_deltas(db, rollup_deltas([db_transaction], sign=-1))
+    apply_aggregate_deltas(db, aggregates.deltas([db_transaction], sign=-1))
+    bump_data_versions(db, [db_transaction.user_id])
+    db.commit()
+    notify_write([db_transaction.user_id])
+    return db_transaction
+
+
+def encode_cursor(transaction) -> str:
+    """Opaque page cursor for the (date, id) position just after ``transaction``"""
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def get_transactions(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[int] = None,
+    start_date=None,
+    end_date=None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[models.Transaction], Optional[str]]:
+    """Fetch one page of transactions ordered by (date, id).
+
+    ``cursor`` is the next-page token returned with the previous page; the
+    page then starts with a range seek on the (user_id, [category,] date, id)
+    indexes instead of an OFFSET scan, so every page costs the same. Returns
+    ``(transactions, next_cursor)`` where next_cursor is None on the last page.
+    With ``columns`` (which must include date and id) the page holds plain
+    row tuples of those columns instead of ORM instances. ``skip`` is only
+    for offset paging and raises ValueError together with a cursor.
+    """
+    if cursor is not None and skip:
+        raise ValueError("skip cannot be combined with cursor; follow X-Next-Cursor instead")
+    Transaction = models.Transaction
+    if columns is None:
+        stmt = select(Transaction)
+    else:
+        stmt = select(*[Transaction.__table__.c[name] for name in columns])
+    stmt = stmt.where(
+        *_date_filters(Transaction.date, start_date, end_date)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Transaction.user_id == user_id)
+    if category is not None:
+        stmt = stmt.where(Transaction.category == category)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Transaction.date, Transaction.id) > tuple_(*decode_cursor(cursor)))
+    stmt = stmt.order_by(Transaction.date, Transaction.id)
+    if skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.limit(limit + 1)
+
+    if columns is None:
+        transactions = db.scalars(stmt).all()
+    else:
+        transactions = db.execute(stmt).all()
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        return transactions, encode_cursor(transactions[-1])
+    return transactions, None
+
+
+def get_user_transactions(db: Session, user_id: int, start_date=None, end_date=None):
+    return (
+        db.query(models.Transaction)
+        .filter(
+            models.Transaction.user_id == user_id,
+            *_date_filters(models.Transaction.date, start_date, end_date)
+        )
+        .order_by(models.Transaction.date, models.Transaction.id)
+        .all()
+    )
+
+
+def _user_transaction_select(user_id: int, start_date, end_date, columns: Sequence[str]):
+    unknown = set(columns) - set(FRAME_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unsupported columns: {sorted(unknown)}")
+
+    table = models.Transaction.__table__
+    return (
+        select(*[table.c[name] for name in columns])
+        .where(
+            table.c.user_id == user_id,
+            *_date_filters(table.c.date, start_date, end_date)
+        )
+        .order_by(table.c.date, table.c.id)
+    )
+
+
+def get_user_transaction_frame(
+    db: Session,
+    user_id: int,
+    start_date=None,
+    end_date=None,
+    columns: Sequence[str] = ("date", "amount", "category"),
+    compact: bool = False,
+    amounts: str = "float64",
+) -> pd.DataFrame:
+    """Fetch a user's transactions as a column-oriented DataFrame.
+
+    Runs a single column-projected query and builds the frame from whole
+    columns, so no ORM instance is created per row. With ``compact=True``
+    rows are read in chunks and each chunk is shrunk by
+    preprocessing.compact_transactions (Categoricals, ``amounts`` dtype)
+    before the next is fetched; use it for long histories.
+    """
+    stmt = _user_transaction_select(user_id, start_date, end_date, columns)
+    if not compact:
+        return _fetch_frame(db, stmt, columns)
+    frames = [
+        preprocessing.compact_transactions(chunk, amounts)
+        for chunk in _iter_frames(db, stmt, columns, preprocessing.DEFAULT_CHUNK_SIZE)
+    ]
+    if not frames:
+        return preprocessing.compact_transactions(_frame_from_rows([], columns), amounts)
+    return preprocessing.concat_compact(frames)
+
+
+def iter_user_transaction_chunks(
+    db: Session,
+    user_id: int,
+    start_date=None,
+    end_date=None,
+    columns: Sequence[str] = ("date", "amount", "category"),
+    chunk_size: int = preprocessing.DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Stream a user's transactions as frames of at most ``chunk_size`` rows"""
+    stmt = _user_transaction_select(user_id, start_date, end_date, columns)
+    return _iter_frames(db, stmt, columns, chunk_size)
+
+
+def get_user_daily_rollups(
+    db: Session, user_id: int, start_date=None, end_date=None,
+    categories: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Fetch a user's (day, category) totals from the daily rollup"""
+    table = models.DailyRollup.__table__
+    stmt = (
+        select(table.c.day, table.c.category, table.c.total, table.c.count)
+        .where(
+            table.c.user_id == user_id,
+            *_day_filters(table.c.day, start_date, end_date)
+        )
+        .order_by(table.c.day, table.c.category)
+    )
+    if categories is not None:
+        stmt = stmt.where(table.c.category.in_(list(categories)))
+    return _fetch_frame(db, stmt, ("day", "category", "total", "count"))
+
+
+def get_daily_rollups_for_users(
+    db: Session, user_ids: Optional[Sequence[int]] = None, start_date=None, end_date=None
+) -> pd.DataFrame:
+    """Fetch (user, day, category) totals for many users as a long frame"""
+    table = models.DailyRollup.__table__
+    stmt = (
+        select(table.c.user_id, table.c.day, table.c.category, table.c.total)
+        .where(*_day_filters(table.c.day, start_date, end_date))
+        .order_by(table.c.user_id, table.c.day, table.c.category)
+    )
+    if user_ids is not None:
+        stmt = stmt.where(table.c.user_id.in_(list(user_ids)))
+    return _fetch_frame(db, stmt, ("user_id", "day", "category", "total"))
+
+
+def get_user_category_totals(db: Session, user_id: int, start_date=None, end_date=None) -> pd.DataFrame:
+    """Fetch a user's net amount per category over a date range from the daily rollup"""
+    table = models.DailyRollup.__table__
+    stmt = (
+        select(table.c.category, func.sum(table.c.total), func.sum(table.c.count))
+        .where(
+            table.c.user_id == user_id,
+            *_day_filters(table.c.day, start_date, end_date)
+        )
+        .group_by(table.c.category)
+        .order_by(table.c.category)
+    )
+    return _fetch_frame(db, stmt, ("category", "total", "count"))
+
+
+def get_user_aggregates(
+    db: Session, user_id: int, dimensions: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Fetch a user's spending aggregates as dimension/bucket/total/count rows"""
+    table = models.SpendingAggregate.__table__
+    stmt = (
+        select(table.c.dimension, table.c.bucket, table.c.total, table.c.count)
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.dimension, table.c.bucket)
+    )
+    if dimensions is not None:
+        stmt = stmt.where(table.c.dimension.in_(list(dimensions)))
+    return _fetch_frame(db, stmt, ("dimension", "bucket", "total", "count"))
+
+
+def get_user_daily_totals(db: Session, user_id: int, start_date=None, end_date=None) -> pd.DataFrame:
+    """Fetch a user's net amount per day as a ds/y frame ready for forecasting"""
+    table = models.DailyRollup.__table__
+    stmt = (
+        select(table.c.day, func.sum(table.c.total))
+        .where(
+            table.c.user_id == user_id,
+            *_day_filters(table.c.day, start_date, end_date)
+        )
+        .group_by(table.c.day)
+        .order_by(table.c.day)
+    )
+    return _fetch_frame(db, stmt, ("ds", "y"))
+
+
+def get_daily_totals_for_users(
+    db: Session, user_ids: Optional[Sequence[int]] = None, start_date=None, end_date=None
+) -> pd.DataFrame:
+    """Fetch net amount per (user, day) for many users as a long user_id/ds/y frame"""
+    table = models.DailyRollup.__table__
+    stmt = (
+        select(table.c.user_id, table.c.day, func.sum(table.c.total))
+        .where(*_day_filters(table.c.day, start_date, end_date))
+        .group_by(table.c.user_id, table.c.day)
+        .order_by(table.c.user_id, table.c.day)
+    )
+    if user_ids is not None:
+        stmt = stmt.where(table.c.user_id.in_(list(user_ids)))
+    return _fetch_frame(db, stmt, ("user_id", "ds", "y"))
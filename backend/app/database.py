@@ -1 +1,190 @@
+import os
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./finance.db")
+# Optional replica (or read-only role) for analytics reads; defaults to the primary
+READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
+
+# Sync endpoints run on a 40-thread pool, so by default size + overflow
+# covers every thread and a request never queues for a connection
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+READ_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_READ_STATEMENT_TIMEOUT_MS", str(STATEMENT_TIMEOUT_MS)))
+
+# Serve the read endpoints from an AsyncSession instead of the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+class PoolMetrics:
+    """Connection checkout counts and wait times for one engine's pool"""
+
+    def __init__(self, name: str, pool_size: int, max_overflow: int):
+        self.name = name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+def _timed_pool_class(metrics: PoolMetrics, base=QueuePool):
+    class TimedQueuePool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                metrics.record(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record(time.perf_counter() - start)
+            return connection
+    return TimedQueuePool
+
+
+def _engine_options(url: str, name: str, read_only: bool, statement_timeout_ms: int,
+                    pool_class=QueuePool):
+    connect_args = {}
+    options = {"pool_pre_ping": POOL_PRE_PING}
+    metrics = None
+    if url.startswith("sqlite"):
+        # SQLite connections are shared across FastAPI's threadpool
+        connect_args["check_same_thread"] = False
+    else:
+        pg_options = []
+        if url.startswith("postgresql") and statement_timeout_ms:
+            pg_options.append(f"-c statement_timeout={statement_timeout_ms}")
+        if url.startswith("postgresql") and read_only:
+            pg_options.append("-c default_transaction_read_only=on")
+        if pg_options:
+            connect_args["options"] = " ".join(pg_options)
+
+    in_memory = url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:")
+    if not in_memory:
+        metrics = PoolMetrics(name, POOL_SIZE, MAX_OVERFLOW)
+        options.update(
+            poolclass=_timed_pool_class(metrics, pool_class),
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+        )
+    return connect_args, options, metrics
+
+
+def make_engine(url: str, name: str, read_only: bool = False,
+                statement_timeout_ms: int = STATEMENT_TIMEOUT_MS):
+    """Create an engine with the pool settings above and attached PoolMetrics"""
+    connect_args, options, metrics = _engine_options(url, name, read_only, statement_timeout_ms)
+    new_engine = create_engine(url, connect_args=connect_args, **options)
+    new_engine.pool_metrics = metrics
+    return new_engine
+
+
+def async_database_url(url: str) -> str:
+    """Swap a sync URL's driver for its asyncio counterpart (aiosqlite, asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def make_async_engine(url: str, name: str, read_only: bool = False,
+                      statement_timeout_ms: int = STATEMENT_TIMEOUT_MS):
+    """Async engine with the same pool settings and metrics as make_engine"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_database_url(url)
+    connect_args, options, metrics = _engine_options(
+        url, name, read_only, 0, pool_class=AsyncAdaptedQueuePool
+    )
+    if url.startswith("postgresql"):
+        # asyncpg takes server settings instead of libpq options
+        settings = {}
+        if statement_timeout_ms:
+            settings["statement_timeout"] = str(statement_timeout_ms)
+        if read_only:
+            settings["default_transaction_read_only"] = "on"
+        connect_args = {"server_settings": settings}
+    new_engine = create_async_engine(url, connect_args=connect_args, **options)
+    new_engine.sync_engine.pool_metrics = metrics
+    return new_engine
+
+
+def pool_stats(target_engine):
+    """Pool occupancy plus checkout wait statistics for an engine"""
+    # AsyncEngine proxies a sync Engine that owns the pool
+    target_engine = getattr(target_engine, "sync_engine", target_engine)
+    pool = target_engine.pool
+    metrics = getattr(target_engine, "pool_metrics", None)
+    if metrics is None or not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = metrics.pool_size + metrics.max_overflow
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": metrics.max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": checked_out / capacity if capacity else None,
+        **metrics.snapshot(),
+    }
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL, "primary")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+if READ_DATABASE_URL:
+    read_engine = make_engine(
+        READ_DATABASE_URL, "read", read_only=True,
+        statement_timeout_ms=READ_STATEMENT_TIMEOUT_MS,
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = make_async_engine(
+        READ_DATABASE_URL or SQLALCHEMY_DATABASE_URL, "async",
+        read_only=bool(READ_DATABASE_URL), statement_timeout_ms=READ_STATEMENT_TIMEOUT_MS,
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
@@ -0,0 +1,160 @@
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily by forecasting and visualization; prewarm() loads them ahead
+FORECAST_MODULES = (
+    "prophet", "prophet.plot", "sklearn.linear_model", "sklearn.metrics", "plotly.graph_objects",
+)
+
+
+class ExecutorBusy(Exception):
+    """Raised when the forecasting queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Forecast queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def run_forecast_job(df, model_type: str, days: int) -> Dict[str, Any]:
+    """Fit a forecast and render its plots; runs inside a pool worker"""
+    from . import forecasting, visualization
+    from .metrics import collect_stages, stage_timer
+
+    # Stage timings travel back with the result, since a worker process's
+    # own metrics are never scraped; the caller records them
+    with collect_stages(flush=False) as stages:
+        start = time.perf_counter()
+        if model_type == "prophet":
+            forecast_df, model = forecasting.prophet_forecast(df, days)
+        else:
+            forecast_df, model = forecasting.linear_regression_forecast(df, days)
+        fit_seconds = time.perf_counter() - start
+
+        with stage_timer("plots"):
+            visualizations = visualization.generate_forecast_plots(forecast_df.copy(), model)
+            components_df = visualization.forecast_components(model)
+
+    # The fitted model stays in the worker; only picklable results go back
+    return {
+        "forecast_df": forecast_df,
+        "model_metrics": model.metrics if hasattr(model, 'metrics') else {},
+        "visualizations": visualizations,
+        "components_df": components_df,
+        "fit_seconds": fit_seconds,
+        "stage_seconds": stages,
+    }
+
+
+def import_modules(names: Sequence[str]) -> float:
+    """Import modules in a pool worker; returns the seconds it took"""
+    start = time.perf_counter()
+    for name in names:
+        importlib.import_module(name)
+    return time.perf_counter() - start
+
+
+class ForecastExecutor:
+    """Bounded process pool for CPU-bound model fits.
+
+    At most ``max_workers`` jobs run at once and ``max_queue`` more may wait;
+    anything beyond that is rejected with ExecutorBusy instead of piling up.
+    With ``max_workers=0`` jobs run on a single background thread, which is
+    handy for tests and local development.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 5,
+                 start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_queue)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                if self.max_workers > 0:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="forecast"
+                    )
+            return self._pool
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise ExecutorBusy(self.retry_after)
+        with self._stats_lock:
+            self.in_flight += 1
+            self.submitted += 1
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn, *args):
+        """Submit a job and await its result without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def prewarm(self, modules: Sequence[str] = FORECAST_MODULES) -> List[Future]:
+        """Start the workers and load the model libraries before the first fit.
+
+        Sends one import job per worker. They bypass the queue limit and
+        stats; a worker that finishes early may take a second job, so this
+        is best effort.
+        """
+        pool = self._get_pool()
+        return [pool.submit(import_modules, tuple(modules)) for _ in range(max(self.max_workers, 1))]
+
+    def _release(self):
+        with self._stats_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+
+def executor_from_env() -> ForecastExecutor:
+    return ForecastExecutor(
+        max_workers=int(os.getenv("FORECAST_WORKERS", str(max((os.cpu_count() or 2) // 2, 1)))),
+        max_queue=int(os.getenv("FORECAST_QUEUE_SIZE", "8")),
+        retry_after=int(os.getenv("FORECAST_RETRY_AFTER", "5")),
+        start_method=os.getenv("FORECAST_START_METHOD", "spawn"),
+    )
@@ -1,19 +1,23 @@
 import pandas as pd
-from prophet import Prophet
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 import numpy as np
 import logging
 from datetime import datetime
 
+from .metrics import stage_timer
+
 logger = logging.getLogger(__name__)
 
 def prophet_forecast(df, days=30):
     """Generate forecast using Facebook's Prophet"""
+    # Imported on first use: prophet and sklearn take seconds to load
+    from prophet import Prophet
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
     try:
         # Prepare data
-        df = df.groupby('ds')['y'].sum().reset_index()
-        df['ds'] = pd.to_datetime(df['ds'])
+        with stage_timer("prepare"):
+            df = df.groupby('ds')['y'].sum().reset_index()
+            df['ds'] = pd.to_datetime(df['ds'])
         
         # Fit model with holidays and seasonality
         model = Prophet(
@@ -27,11 +31,13 @@ def prophet_forecast(df, days=30):
         
         # Add US holidays
         model.add_country_holidays(country_name='US')
-        model.fit(df)
+        with stage_timer("fit"):
+            model.fit(df)
         
         # Make future dataframe
-        future = model.make_future_dataframe(periods=days)
-        forecast = model.predict(future)
+        with stage_timer("predict"):
+            future = model.make_future_dataframe(periods=days)
+            forecast = model.predict(future)
         
         # Calculate metrics
         y_true = df['y'].values[-30:]  # Last 30 days for validation
@@ -39,6 +45,8 @@ def prophet_forecast(df, days=30):
         mae = mean_absolute_error(y_true, y_pred)
         rmse = np.sqrt(mean_squared_error(y_true, y_pred))
         
+        # Kept for the components plot, which needs trend/seasonality columns
+        model.full_forecast = forecast
         model.metrics = {
             'mae': mae,
             'rmse': rmse,
@@ -57,41 +65,48 @@ def prophet_forecast(df, days=30):
 
 def linear_regression_forecast(df, days=30):
     """Generate forecast using linear regression with lag features"""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
     try:
-        df = df.groupby('ds')['y'].sum().reset_index()
-        df['ds'] = pd.to_datetime(df['ds'])
-        df['days_since_start'] = (df['ds'] - df['ds'].min()).dt.days
-        
-        # Create lag features
-        for i in [1, 7, 30]:  # 1-day, 1-week, 1-month lags
-            df[f'lag_{i}'] = df['y'].shift(i)
-        
-        df = df.dropna()
-        
-        # Split data
-        X = df[['days_since_start', 'lag_1', 'lag_7', 'lag_30']]
-        y = df['y']
+        with stage_timer("prepare"):
+            df = df.groupby('ds')['y'].sum().reset_index()
+            df['ds'] = pd.to_datetime(df['ds'])
+            start_date = df['ds'].min()
+            df['days_since_start'] = (df['ds'] - start_date).dt.days
+            
+            # Create lag features
+            for i in [1, 7, 30]:  # 1-day, 1-week, 1-month lags
+                df[f'lag_{i}'] = df['y'].shift(i)
+            
+            df = df.dropna()
+            
+            # Split data
+            X = df[['days_since_start', 'lag_1', 'lag_7', 'lag_30']]
+            y = df['y']
         
         # Train model
         model = LinearRegression()
-        model.fit(X, y)
-        
-        # Generate future dates
-        last_date = df['ds'].max()
-        future_dates = pd.date_range(
-            start=last_date + pd.Timedelta(days=1),
-            periods=days
-        )
-        
-        # Prepare future features
-        future_df = pd.DataFrame({'ds': future_dates})
-        future_df['days_since_start'] = (future_df['ds'] - df['ds'].min()).dt.days
-        
-        for i in [1, 7, 30]:
-            future_df[f'lag_{i}'] = df['y'].shift(i).values[-days:]
-        
-        # Predict
-        future_df['yhat'] = model.predict(future_df[['days_since_start', 'lag_1', 'lag_7', 'lag_30']])
+        with stage_timer("fit"):
+            model.fit(X, y)
+        
+        with stage_timer("predict"):
+            # Generate future dates
+            last_date = df['ds'].max()
+            future_dates = pd.date_range(
+                start=last_date + pd.Timedelta(days=1),
+                periods=days
+            )
+            
+            # Prepare future features
+            future_df = pd.DataFrame({'ds': future_dates})
+            future_df['days_since_start'] = (future_df['ds'] - start_date).dt.days
+            
+            for i in [1, 7, 30]:
+                future_df[f'lag_{i}'] = df['y'].shift(i).values[-days:]
+            
+            # Predict
+            future_df['yhat'] = model.predict(future_df[['days_since_start', 'lag_1', 'lag_7', 'lag_30']])
         
         # Calculate metrics
         y_true = df['y'].values[-30:]
@@ -114,3 +129,120 @@ def linear_regression_forecast(df, days=30):
     except Exception as e:
         logger.error(f"Linear regression forecast error: {str(e)}")
         raise
+
+LAGS = [1, 7, 30]
+LINEAR_FEATURES = ['days_since_start', 'lag_1', 'lag_7', 'lag_30']
+
+def batch_linear_regression_forecast(df, days=30):
+    """Fit the lag-feature linear regression for many users in one vectorized pass.
+
+    ``df`` is long format with ``user_id``, ``ds`` and ``y`` columns. Each
+    user's series is laid out as a row of a padded (users x days) matrix so
+    the lag features and the per-user least-squares fits are computed with
+    array operations rather than one pandas/sklearn model per user. Results
+    match ``linear_regression_forecast`` for every user.
+
+    Returns ``(forecast_df, metrics, skipped)`` where ``forecast_df`` has
+    ``user_id``, ``ds`` and ``yhat`` columns, ``metrics`` maps user_id to its
+    model metrics and ``skipped`` maps user_id to the reason it was skipped.
+    """
+    try:
+        max_lag = max(LAGS)
+        df = df.groupby(['user_id', 'ds'])['y'].sum().reset_index()
+        df['ds'] = pd.to_datetime(df['ds'])
+        df = df.sort_values(['user_id', 'ds'], kind='stable')
+
+        user_ids, starts, counts = np.unique(
+            df['user_id'].to_numpy(), return_index=True, return_counts=True
+        )
+
+        # The last `days` future lag_30 values come from history, so a user
+        # needs days + 2 * max_lag observations (as the single-user model does)
+        enough = counts >= days + 2 * max_lag
+        skipped = {
+            int(u): f"needs at least {days + 2 * max_lag} days of history, has {int(n)}"
+            for u, n in zip(user_ids[~enough], counts[~enough])
+        }
+        keep = np.repeat(enough, counts)
+        user_ids, counts = user_ids[enough], counts[enough]
+        empty = pd.DataFrame({'user_id': [], 'ds': [], 'yhat': []})
+        if len(user_ids) == 0:
+            return empty, {}, skipped
+
+        y_flat = df['y'].to_numpy(dtype=np.float64)[keep]
+        day_flat = df['ds'].to_numpy(dtype='datetime64[D]')[keep]
+        n_users, width = len(user_ids), int(counts.max())
+
+        # Left-aligned padded layout: row u holds user u's series in columns [0, n_u)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rows = np.repeat(np.arange(n_users), counts)
+        cols = np.arange(len(y_flat)) - np.repeat(offsets, counts)
+        Y = np.zeros((n_users, width))
+        Y[rows, cols] = y_flat
+        first_day = day_flat[offsets]
+        last_day = day_flat[offsets + counts - 1]
+        D = np.zeros((n_users, width))
+        D[rows, cols] = (day_flat - np.repeat(first_day, counts)).astype(np.float64)
+
+        # Feature tensor (users, time, features); rows with a missing lag are
+        # masked out exactly like dropna() in the single-user model
+        X = np.zeros((n_users, width, len(LINEAR_FEATURES)))
+        X[:, :, 0] = D
+        for j, lag in enumerate(LAGS, start=1):
+            X[:, lag:, j] = Y[:, :-lag]
+        t = np.arange(width)
+        mask = (t[None, :] >= max_lag) & (t[None, :] < counts[:, None])
+        m = mask.astype(np.float64)
+        n_valid = m.sum(axis=1)
+
+        # Batched least squares on centered data (what sklearn does)
+        x_mean = np.einsum('ut,utf->uf', m, X) / n_valid[:, None]
+        y_mean = (m * Y).sum(axis=1) / n_valid
+        Xc = (X - x_mean[:, None, :]) * m[:, :, None]
+        yc = (Y - y_mean[:, None]) * m
+        xtx = np.einsum('utf,utg->ufg', Xc, Xc)
+        xty = np.einsum('utf,ut->uf', Xc, yc)
+        coef = np.einsum('ufg,ug->uf', np.linalg.pinv(xtx), xty)
+        intercept = y_mean - np.einsum('uf,uf->u', x_mean, coef)
+
+        # In-sample metrics over each user's last 30 valid rows
+        eval_t = counts[:, None] - 30 + np.arange(30)[None, :]
+        eval_rows = np.arange(n_users)[:, None]
+        y_true = Y[eval_rows, eval_t]
+        y_pred = np.einsum('utf,uf->ut', X[eval_rows, eval_t], coef) + intercept[:, None]
+        errors = y_true - y_pred
+        mae = np.abs(errors).mean(axis=1)
+        rmse = np.sqrt((errors ** 2).mean(axis=1))
+
+        # Future features: days since start plus the lagged history values the
+        # single-user model uses (shift(lag) of the post-dropna series)
+        step = np.arange(1, days + 1)
+        future_days = last_day[:, None] + step[None, :].astype('timedelta64[D]')
+        future_X = np.empty((n_users, days, len(LINEAR_FEATURES)))
+        future_X[:, :, 0] = (future_days - first_day[:, None]).astype(np.float64)
+        for j, lag in enumerate(LAGS, start=1):
+            idx = counts[:, None] - days - lag + np.arange(days)[None, :]
+            future_X[:, :, j] = Y[eval_rows, idx]
+        yhat = np.einsum('udf,uf->ud', future_X, coef) + intercept[:, None]
+
+        forecast_df = pd.DataFrame({
+            'user_id': np.repeat(user_ids, days),
+            'ds': pd.to_datetime(future_days.ravel()),
+            'yhat': yhat.ravel(),
+        })
+        metrics = {
+            int(u): {
+                'mae': float(mae[i]),
+                'rmse': float(rmse[i]),
+                'model_params': {
+                    'features': LINEAR_FEATURES,
+                    'coefficients': coef[i].tolist(),
+                    'intercept': float(intercept[i])
+                }
+            }
+            for i, u in enumerate(user_ids)
+        }
+        return forecast_df, metrics, skipped
+    except Exception as e:
+        logger.error(f"Batch linear regression forecast error: {str(e)}")
+        raise
@@ -0,0 +1,231 @@
+from datetime import datetime
+import io
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import (
+    Column, DateTime, Float, Integer, MetaData, String, Table, delete, insert, select,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from . import aggregates, crud, models, preprocessing
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+COLUMNS = preprocessing.TRANSACTION_COLUMNS
+SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Unindexed per-connection table each chunk is loaded into before being
+# moved into transactions and aggregated into the rollup with set-based SQL
+staging = Table(
+    "import_staging", MetaData(),
+    Column("user_id", Integer),
+    Column("date", DateTime),
+    Column("description", String),
+    Column("amount", Float),
+    Column("category", String),
+    Column("account", String),
+    prefixes=["TEMPORARY"],
+)
+
+
+def source_key_for_path(path: str) -> str:
+    """Identify a file for checkpointing by its absolute path and size"""
+    return f"file:{os.path.abspath(path)}:{os.path.getsize(path)}"
+
+
+def detect_format(name: str) -> str:
+    return 'parquet' if name.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def iter_chunks(source, fmt: str = 'csv', chunk_size: int = DEFAULT_CHUNK_SIZE,
+                skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """Read a CSV or Parquet source in chunks, skipping the first ``skip_rows`` data rows"""
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        to_skip = skip_rows
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            if to_skip >= batch.num_rows:
+                to_skip -= batch.num_rows
+                continue
+            df = batch.to_pandas()
+            yield df.iloc[to_skip:]
+            to_skip = 0
+        return
+
+    reader = pd.read_csv(
+        source, chunksize=chunk_size,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        dtype={'description': str, 'category': str, 'account': str},
+    )
+    for df in reader:
+        yield df
+
+
+def _nullable(series: pd.Series) -> list:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _load_sqlite(db: Session, table_name: str, df: pd.DataFrame):
+    # Dates pre-formatted in one vectorized pass to SQLAlchemy's SQLite storage
+    # format, then a plain DBAPI executemany with no per-row processing
+    rows = zip(
+        df['user_id'].tolist(),
+        df['date'].dt.strftime(SQLITE_DATETIME_FORMAT).tolist(),
+        _nullable(df['description']),
+        df['amount'].tolist(),
+        df['category'].tolist(),
+        _nullable(df['account']),
+    )
+    placeholders = ', '.join('?' for _ in COLUMNS)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.executemany(
+            f"INSERT INTO {table_name} ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+            rows,
+        )
+    finally:
+        cursor.close()
+
+
+def _load_postgresql_copy(db: Session, table_name: str, df: pd.DataFrame, driver: str):
+    buffer = io.StringIO()
+    df[COLUMNS].to_csv(buffer, header=False, index=False, date_format=SQLITE_DATETIME_FORMAT)
+    sql = f"COPY {table_name} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = db.connection().connection.cursor()
+    try:
+        if driver == 'psycopg2':
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_transactions(db: Session, df: pd.DataFrame):
+    """Insert a normalized frame and update the daily rollup, without committing.
+
+    On SQLite and PostgreSQL (psycopg/psycopg2) the chunk goes through the
+    staging table: executemany or COPY into it, then INSERT ... SELECT into
+    transactions and a single GROUP BY upsert into the rollup. Other
+    databases fall back to an ORM-free executemany and Python-side rollup.
+    The spending aggregates are grouped from the frame in either case.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name == 'sqlite' or (
+        dialect.name == 'postgresql' and dialect.driver in ('psycopg2', 'psycopg')
+    ):
+        db.execute(CreateTable(staging, if_not_exists=True))
+        db.execute(delete(staging))
+        if dialect.name == 'sqlite':
+            _load_sqlite(db, staging.name, df)
+        else:
+            _load_postgresql_copy(db, staging.name, df, dialect.driver)
+        transactions = models.Transaction.__table__
+        db.execute(
+            insert(transactions).from_select(
+                COLUMNS, select(*[staging.c[name] for name in COLUMNS])
+            )
+        )
+        crud.apply_rollup_from(db, staging)
+        db.execute(delete(staging))
+    else:
+        records = df[COLUMNS].astype(object).where(df[COLUMNS].notna(), None).to_dict(orient='records')
+        for record in records:
+            record['date'] = record['date'].to_pydatetime()
+        db.execute(insert(models.Transaction.__table__), records)
+        crud.apply_rollup_deltas(db, crud.rollup_deltas_from_frame(df))
+    crud.apply_aggregate_deltas(db, aggregates.deltas_from_frame(df))
+
+
+def _save_checkpoint(db: Session, source_key: str, rows_done: int, imported: int,
+                     rejected: int, completed: bool = False):
+    db.merge(models.ImportCheckpoint(
+        source_key=source_key, rows_done=rows_done, rows_imported=imported,
+        rows_rejected=rejected, completed=completed, updated_at=datetime.now(),
+    ))
+
+
+def import_transactions(source, source_key: str, fmt: str = 'csv',
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True,
+                        default_user_id: Optional[int] = None, dedupe: bool = False,
+                        session_factory=SessionLocal) -> Dict[str, Any]:
+    """Stream a CSV/Parquet source into the transactions table.
+
+    Each chunk is validated by preprocessing.normalize_transactions and
+    committed in its own transaction together with the daily rollup, the
+    users' data versions and the import checkpoint. If the import dies, the
+    same ``source_key`` with ``resume=True`` continues after the last
+    committed chunk; a completed import is not repeated. ``dedupe`` rejects
+    rows repeating an earlier row of this run (preprocessing.DuplicateFilter).
+    """
+    with session_factory() as db:
+        checkpoint = db.get(models.ImportCheckpoint, source_key)
+        if checkpoint is not None and not resume:
+            db.delete(checkpoint)
+            db.commit()
+            checkpoint = None
+        start_row = checkpoint.rows_done if checkpoint else 0
+        imported = checkpoint.rows_imported if checkpoint else 0
+        rejected = checkpoint.rows_rejected if checkpoint else 0
+        if checkpoint is not None and checkpoint.completed:
+            logger.info(f"Import {source_key} already completed, skipping")
+            return {
+                "source_key": source_key, "resumed_from": start_row,
+                "rows_read": 0, "rows_imported": imported, "rows_rejected": rejected,
+                "seconds": 0.0, "rows_per_sec": 0.0, "already_completed": True,
+            }
+    if start_row:
+        logger.info(f"Resuming import {source_key} after row {start_row}")
+
+    rows_done = start_row
+    started = time.perf_counter()
+    duplicates = preprocessing.DuplicateFilter() if dedupe else None
+    for chunk in iter_chunks(source, fmt, chunk_size, skip_rows=start_row):
+        valid, bad = preprocessing.normalize_transactions(chunk, default_user_id)
+        if duplicates is not None and len(valid):
+            valid, repeated = duplicates(valid)
+            bad = pd.concat([bad, repeated.assign(reason='duplicate')])
+        with session_factory() as db:
+            if len(valid):
+                write_transactions(db, valid)
+                crud.bump_data_versions(db, valid['user_id'].unique().tolist())
+            rows_done += len(chunk)
+            imported += len(valid)
+            rejected += len(bad)
+            _save_checkpoint(db, source_key, rows_done, imported, rejected)
+            db.commit()
+        if len(valid):
+            crud.notify_write(valid['user_id'].unique().tolist())
+        logger.info(f"Import {source_key}: {rows_done} rows read, {imported} imported")
+
+    with session_factory() as db:
+        _save_checkpoint(db, source_key, rows_done, imported, rejected, completed=True)
+        db.commit()
+
+    seconds = time.perf_counter() - started
+    rows_read = rows_done - start_row
+    return {
+        "source_key": source_key,
+        "resumed_from": start_row,
+        "rows_read": rows_read,
+        "rows_imported": imported,
+        "rows_rejected": rejected,
+        "seconds": seconds,
+        "rows_per_sec": rows_read / seconds if seconds else 0.0,
+        "already_completed": False,
+    }
+
+
+def import_file(path: str, fmt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    return import_transactions(
+        path, source_key_for_path(path), fmt or detect_format(path), **kwargs
+    )
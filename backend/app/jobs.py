@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import queue
+import threading
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, key: Hashable, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class JobQueue:
+    """In-process job queue with result storage and in-flight deduplication.
+
+    Jobs submitted with the same key while an earlier one is still queued or
+    running share that job. ``runner(payload)`` does the actual work; it is
+    called from background threads started with ``start()``, or synchronously
+    through ``run_pending()`` when tests drive the queue by hand.
+    """
+
+    def __init__(self, runner: Callable[[Any], Any], max_jobs: int = 1000):
+        self.runner = runner
+        self.max_jobs = max_jobs
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.deduplicated = 0
+
+    def submit(self, key: Hashable, payload: Any) -> Job:
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+            job = Job(key, payload)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._trim()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def run_pending(self) -> int:
+        """Run queued jobs on the calling thread until the queue is empty"""
+        count = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            if job is not None:
+                self._run(job)
+                count += 1
+
+    def start(self, num_workers: int = 1):
+        for i in range(num_workers):
+            thread = threading.Thread(
+                target=self._work, name=f"forecast-jobs-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": len(self._threads),
+            "stored": len(statuses),
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "deduplicated": self.deduplicated,
+        }
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        try:
+            job.result = self.runner(job.payload)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _trim(self):
+        # Forget the oldest finished jobs once the store is full
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+                excess -= 1
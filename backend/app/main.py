@@ -1,30 +1,114 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
+from contextlib import asynccontextmanager
 import pandas as pd
+from pydantic import ValidationError
 from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
 
-from . import models, schemas, crud, forecasting, alerts, visualization
-from .database import SessionLocal, engine
+from . import models, schemas, crud, alerts, async_crud, charts, forecasting, ingest, visualization
+from .cache import LRUCache, cache_from_env
+from .executor import ExecutorBusy, executor_from_env, run_forecast_job
+from .jobs import JobQueue
+from . import metrics
+from .metrics import MetricsMiddleware, collect_stages, record_stages, stage_timer
+from .profiling import profiler_from_env
+from .responses import CompressionMiddleware, FastJSONResponse, frame_records
+from .database import (
+    AsyncSessionLocal, ReadSessionLocal, SessionLocal, async_engine, engine, pool_stats, read_engine,
+)
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the schema and start the forecast workers; stop them on shutdown.
+
+    The hooks and queues it uses are defined further down this module.
+    """
+    await run_in_threadpool(create_schema)
+    # Off the startup path, so /healthz answers while the libraries load
+    if os.getenv("PREWARM_MODELS", "0") == "1":
+        threading.Thread(target=prewarm_models, name="prewarm", daemon=True).start()
+    forecast_jobs.start(num_workers=int(os.getenv("FORECAST_JOB_THREADS", "2")))
+    try:
+        yield
+    finally:
+        await run_in_threadpool(forecast_jobs.stop, 5)
+        forecast_executor.shutdown(wait=False)
+        if async_engine is not None:
+            await async_engine.dispose()
 
 app = FastAPI(
     title="Personal Finance Dashboard API",
     description="API for expense tracking and predictive analytics",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
+# Compress JSON bodies over COMPRESS_MIN_BYTES with brotli or gzip
+app.add_middleware(
+    CompressionMiddleware, minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+)
+
+# Outermost, so latency includes compression; PROFILING_ENABLED=1 lets a
+# request with an X-Debug-Profile header dump a sampled profile
+app.add_middleware(MetricsMiddleware, profiler=profiler_from_env())
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Fitted forecasts keyed by (user_id, model_type, days, data watermark)
+forecast_cache = LRUCache(max_size=int(os.getenv("FORECAST_CACHE_SIZE", "128")))
+fit_stats = {"fits": 0, "fit_seconds_total": 0.0, "last_fit_seconds": None}
+fit_stats_lock = threading.Lock()
+crud.register_write_listener(forecast_cache.invalidate)
+
+# Spending-analysis payloads keyed by (user_id, period, data version);
+# ANALYSIS_CACHE_URL=redis://... shares them across workers
+analysis_cache = cache_from_env("ANALYSIS_CACHE", default_size=256)
+crud.register_write_listener(analysis_cache.invalidate)
+
+# CPU-bound model fits run here, off the request threadpool
+forecast_executor = executor_from_env()
+
+# Set once prewarm_models has loaded the model and chart libraries
+warm_state = {"warm": False, "seconds": None}
+
+def create_schema():
+    """Create missing tables; with DB_CREATE_SCHEMA=0 run `python -m app.manage create-indexes` instead"""
+    if os.getenv("DB_CREATE_SCHEMA", "1") == "1":
+        models.Base.metadata.create_all(bind=engine)
+
+def prewarm_models():
+    """Load plotly here and the model libraries in the forecast workers"""
+    start = time.perf_counter()
+    try:
+        import plotly.graph_objects  # noqa: F401  (plotly analysis charts)
+        for future in forecast_executor.prewarm():
+            future.result()
+        warm_state.update(warm=True, seconds=round(time.perf_counter() - start, 3))
+        logger.info(f"Prewarmed forecasting dependencies in {warm_state['seconds']}s")
+    except Exception as e:
+        logger.error(f"Error prewarming forecasting dependencies: {str(e)}")
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness check; answers without touching the database or model libraries"""
+    return {"status": "ok", "warm": warm_state["warm"]}
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -33,6 +117,26 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Session on the analytics read engine (the primary unless DATABASE_READ_URL is set)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """AsyncSession for the async read endpoints when DB_ASYNC is on, else a read Session"""
+    if AsyncSessionLocal is None:
+        db = ReadSessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @app.post("/transactions/", response_model=schemas.Transaction)
 def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db)):
     """Create a new transaction record"""
@@ -42,58 +146,474 @@ def create_transaction(transaction: schemas.TransactionCreate, db: Session = Dep
         logger.error(f"Error creating transaction: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+MAX_BATCH_SIZE = int(os.getenv("TRANSACTION_BATCH_MAX", "5000"))
+
+@app.post("/transactions/batch", response_model=schemas.BatchTransactionResult)
+def create_transactions_batch(items: List[Any], db: Session = Depends(get_db)):
+    """Create many transactions in one database transaction, reporting invalid items individually"""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"Batch too large: {len(items)} items, max {MAX_BATCH_SIZE}"
+        )
+
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append(schemas.TransactionCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "error": "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}" for err in e.errors()
+            )})
+
+    try:
+        created = crud.create_transactions(db=db, transactions=valid)
+    except Exception as e:
+        logger.error(f"Error creating transaction batch: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"created": created, "errors": errors}
+
+@app.post("/transactions/import", response_model=schemas.ImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    default_user_id: Optional[int] = None,
+    chunk_size: int = ingest.DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    dedupe: bool = False
+):
+    """Bulk-import a CSV or Parquet export; re-uploading the same file resumes it"""
+    try:
+        digest = hashlib.sha256()
+        for block in iter(lambda: file.file.read(1 << 20), b""):
+            digest.update(block)
+        file.file.seek(0)
+        source_key = f"upload:{digest.hexdigest()}"
+        if default_user_id is not None:
+            source_key += f":user-{default_user_id}"
+        return ingest.import_transactions(
+            file.file, source_key,
+            fmt=ingest.detect_format(file.filename or ""),
+            chunk_size=chunk_size, resume=resume, default_user_id=default_user_id,
+            dedupe=dedupe
+        )
+    except Exception as e:
+        logger.error(f"Error importing transactions: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+MAX_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_MAX", "5000"))
+TRANSACTION_FIELDS = list(schemas.Transaction.model_fields)
+
+def render_transactions_page(rows, headers):
+    return FastJSONResponse([dict(zip(TRANSACTION_FIELDS, row)) for row in rows], headers=headers)
+
+async def list_transactions_page(db, **filters):
+    """One page of transactions, serialized straight from the rows"""
+    try:
+        rows, next_cursor = await async_crud.get_transactions(
+            db, columns=TRANSACTION_FIELDS, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    # Pages run to thousands of rows; encode them off the event loop
+    return await run_in_threadpool(render_transactions_page, rows, headers)
+
+@app.delete("/transactions/{transaction_id}", response_model=schemas.Transaction)
+def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
+    """Delete a transaction and remove it from the user's aggregates"""
+    try:
+        db_transaction = crud.delete_transaction(db, transaction_id)
+    except Exception as e:
+        logger.error(f"Error deleting transaction: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return db_transaction
+
 @app.get("/transactions/", response_model=List[schemas.Transaction])
-def read_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get paginated list of transactions"""
-    return crud.get_transactions(db, skip=skip, limit=limit)
+async def read_transactions(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    db=Depends(get_async_read_db)
+):
+    """Get a page of transactions ordered by date; pass X-Next-Cursor back as ``cursor`` for the next page"""
+    return await list_transactions_page(
+        db, skip=skip, limit=limit, cursor=cursor, user_id=user_id,
+        start_date=start_date, end_date=end_date, category=category
+    )
+
+@app.get("/transactions/{user_id}", response_model=List[schemas.Transaction])
+async def read_user_transactions(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db=Depends(get_async_read_db)
+):
+    """Get a user's transactions in a date range, one cursor page at a time"""
+    return await list_transactions_page(
+        db, limit=limit, cursor=cursor, user_id=user_id,
+        start_date=start_date, end_date=end_date, category=category
+    )
+
+def frame_columns(df: pd.DataFrame, names: Dict[str, str]) -> Dict[str, Any]:
+    """Columnar JSON for an aggregate frame; ``names`` maps output to frame columns"""
+    return {name: charts.encode_column(df[column]) for name, column in names.items()}
+
+@app.get("/transactions/daily/{user_id}")
+async def read_daily_totals(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db=Depends(get_async_read_db)
+):
+    """Net amount per day in a date range, as day/total columns"""
+    try:
+        df = await async_crud.get_user_daily_totals(db, user_id, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return frame_columns(df, {"day": "ds", "total": "y"})
+
+@app.get("/transactions/categories/{user_id}")
+async def read_category_totals(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db=Depends(get_async_read_db)
+):
+    """Net amount and transaction count per category in a date range"""
+    try:
+        df = await async_crud.get_user_category_totals(db, user_id, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return frame_columns(df, {"category": "category", "total": "total", "count": "count"})
+
+@app.get("/transactions/category-daily/{user_id}")
+async def read_category_daily_totals(
+    user_id: int,
+    category: List[str] = Query(...),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db=Depends(get_async_read_db)
+):
+    """Net amount per day for the given categories, as long day/category/total columns"""
+    try:
+        df = await async_crud.get_user_daily_rollups(
+            db, user_id, start_date=start_date, end_date=end_date, categories=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return frame_columns(df, {"day": "day", "category": "category", "total": "total"})
+
+def analysis_etag(user_id: int, period: str, version: int, variant: str = "plotly") -> str:
+    digest = hashlib.sha1(f"{app.version}:{user_id}:{period}:{variant}:{version}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        tag[2:] if tag.startswith("W/") else tag for tag in candidates
+    ]
 
 @app.get("/transactions/analysis/{user_id}", response_model=schemas.SpendingAnalysis)
-def get_spending_analysis(
+async def get_spending_analysis(
     user_id: int,
     period: str = "monthly",
-    db: Session = Depends(get_db)
+    chart_format: Literal["plotly", "compact"] = "plotly",
+    binary: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db=Depends(get_async_read_db)
 ):
-    """Get spending analysis by category and period"""
-    return visualization.get_spending_analysis(db, user_id, period)
+    """Get spending analysis by category and period; honours If-None-Match"""
+    # The payload only changes with the user's data version, so the ETag is
+    # known before anything is computed
+    variant = f"{chart_format}-binary" if chart_format == "compact" and binary else chart_format
+    version = await async_crud.run(db, crud.get_data_version, user_id)
+    etag = analysis_etag(user_id, period, version, variant)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
 
-@app.post("/forecast/", response_model=schemas.ForecastResult)
-def generate_forecast(forecast_request: schemas.ForecastRequest, db: Session = Depends(get_db)):
-    """Generate cash flow forecast with alerts"""
-    try:
-        # Get historical data
-        transactions = crud.get_user_transactions(
+    key = ("analysis", user_id, period, variant, version)
+    payload = await run_in_threadpool(analysis_cache.get, key)
+    headers["X-Analysis-Cache"] = "hit" if payload is not None else "miss"
+    if payload is None:
+        aggregate_df, daily_df = await async_crud.run(
+            db, visualization.load_spending_aggregates, user_id, period
+        )
+        # Figure building is CPU work; keep it off the event loop
+        payload = await run_in_threadpool(
+            visualization.build_spending_analysis, aggregate_df, daily_df, period,
+            chart_format, binary
+        )
+        await run_in_threadpool(analysis_cache.set, key, payload, [user_id])
+    return FastJSONResponse(payload, headers=headers)
+
+def forecast_cache_key(db: Session, forecast_request: schemas.ForecastRequest):
+    """Cache key for a request: (user_id, model_type, days, data watermark)"""
+    version = crud.get_data_version(db, forecast_request.user_id)
+    watermark = (version, datetime.now().date().isoformat())
+    return (
+        forecast_request.user_id, forecast_request.model_type,
+        forecast_request.days, watermark
+    )
+
+def load_forecast_history(db: Session, forecast_request: schemas.ForecastRequest):
+    """Get historical daily totals from the rollup"""
+    today = datetime.now().date()
+    with stage_timer("fetch"):
+        return crud.get_user_daily_totals(
             db, user_id=forecast_request.user_id,
-            start_date=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
-            end_date=datetime.now().strftime('%Y-%m-%d')
+            start_date=(today - timedelta(days=365)).strftime('%Y-%m-%d'),
+            end_date=today.strftime('%Y-%m-%d')
         )
-        
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'ds': t.date,
-            'y': t.amount,
-            'category': t.category
-        } for t in transactions])
-        
-        # Generate forecast
-        if forecast_request.model_type == "prophet":
-            forecast_df, model = forecasting.prophet_forecast(df, forecast_request.days)
-        else:
-            forecast_df, model = forecasting.linear_regression_forecast(df, forecast_request.days)
-        
-        # Generate alerts
+
+def load_alert_actuals(db: Session, forecast_request: schemas.ForecastRequest):
+    """Daily (day, category) totals the alert rules compare against: this month and the last week"""
+    if not forecast_request.alert_thresholds:
+        return None
+    today = datetime.now().date()
+    start = min(today.replace(day=1), today - timedelta(days=6))
+    return crud.get_user_daily_rollups(
+        db, user_id=forecast_request.user_id,
+        start_date=start.strftime('%Y-%m-%d'), end_date=today.strftime('%Y-%m-%d')
+    )
+
+def record_fit(key, entry, forecast_request: schemas.ForecastRequest):
+    fit_seconds = entry["fit_seconds"]
+    record_stages(entry.get("stage_seconds", {}))
+    with fit_stats_lock:
+        fit_stats["fits"] += 1
+        fit_stats["fit_seconds_total"] += fit_seconds
+        fit_stats["last_fit_seconds"] = fit_seconds
+    logger.info(
+        f"Fitted {forecast_request.model_type} forecast for user "
+        f"{forecast_request.user_id} in {fit_seconds:.3f}s"
+    )
+    forecast_cache.set(key, entry, tags=[forecast_request.user_id])
+
+async def fit_forecast(db, forecast_request: schemas.ForecastRequest):
+    """Return the fitted forecast for a request, reusing a cached fit when the data is unchanged"""
+    key = await async_crud.run(db, forecast_cache_key, forecast_request)
+    entry = forecast_cache.get(key)
+    if entry is not None:
+        return entry, True
+
+    df = await async_crud.run(db, load_forecast_history, forecast_request)
+
+    # Fit in the forecasting pool so light endpoints keep their threads
+    entry = await forecast_executor.run(
+        run_forecast_job, df, forecast_request.model_type, forecast_request.days
+    )
+    record_fit(key, entry, forecast_request)
+    return entry, False
+
+def fit_forecast_blocking(db: Session, forecast_request: schemas.ForecastRequest):
+    """Same as fit_forecast for background job threads; waits out a full pool"""
+    key = forecast_cache_key(db, forecast_request)
+    entry = forecast_cache.get(key)
+    if entry is not None:
+        return entry, True
+
+    df = load_forecast_history(db, forecast_request)
+    while True:
+        try:
+            future = forecast_executor.submit(
+                run_forecast_job, df, forecast_request.model_type, forecast_request.days
+            )
+            break
+        except ExecutorBusy as e:
+            time.sleep(e.retry_after)
+    entry = future.result()
+    record_fit(key, entry, forecast_request)
+    return entry, False
+
+def build_forecast_result(entry, forecast_request: schemas.ForecastRequest, actuals=None):
+    forecast_df = entry["forecast_df"].copy()
+
+    # Generate alerts
+    with stage_timer("alerts"):
         alert_status = alerts.check_for_alerts(
-            forecast_df, 
+            forecast_df,
             forecast_request.user_id,
-            forecast_request.alert_thresholds
+            forecast_request.alert_thresholds,
+            actuals
+        )
+
+    if forecast_request.chart_format == "compact":
+        with stage_timer("charts"):
+            visualizations = visualization.compact_forecast_charts(
+                entry["forecast_df"], entry.get("components_df"), forecast_request.binary_charts
+            )
+    else:
+        visualizations = entry["visualizations"]
+
+    return {
+        "forecast": frame_records(forecast_df),
+        "model_metrics": entry["model_metrics"],
+        "alerts": alert_status,
+        "visualizations": visualizations
+    }
+
+def render_forecast_response(entry, forecast_request: schemas.ForecastRequest, actuals, headers):
+    result = build_forecast_result(entry, forecast_request, actuals)
+    with stage_timer("serialize"):
+        return FastJSONResponse(result, headers=headers)
+
+@app.post("/forecast/", response_model=schemas.ForecastResult)
+async def generate_forecast(
+    forecast_request: schemas.ForecastRequest,
+    db=Depends(get_async_read_db)
+):
+    """Generate cash flow forecast with alerts"""
+    try:
+        with collect_stages() as stages:
+            entry, cache_hit = await fit_forecast(db, forecast_request)
+            actuals = await async_crud.run(db, load_alert_actuals, forecast_request)
+            # Alerts, charts and encoding are CPU work; keep them off the event loop
+            response = await run_in_threadpool(
+                render_forecast_response, entry, forecast_request, actuals,
+                {"X-Forecast-Cache": "hit" if cache_hit else "miss"}
+            )
+        response.headers["Server-Timing"] = metrics.server_timing(stages)
+        return response
+    except ExecutorBusy as e:
+        logger.warning(f"Forecast rejected: {str(e)}")
+        raise HTTPException(
+            status_code=503, detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
-        return {
-            "forecast": forecast_df.to_dict(orient='records'),
-            "model_metrics": model.metrics if hasattr(model, 'metrics') else {},
-            "alerts": alert_status,
-            "visualizations": visualization.generate_forecast_plots(forecast_df, model)
-        }
     except Exception as e:
         logger.error(f"Forecast error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/forecast/batch", response_model=schemas.BatchForecastResult)
+def generate_batch_forecast(batch_request: schemas.BatchForecastRequest, db: Session = Depends(get_read_db)):
+    """Linear-regression forecasts for many users in one vectorized pass"""
+    try:
+        today = datetime.now().date()
+        df = crud.get_daily_totals_for_users(
+            db, user_ids=batch_request.user_ids,
+            start_date=(today - timedelta(days=365)).strftime('%Y-%m-%d'),
+            end_date=today.strftime('%Y-%m-%d')
+        )
+        forecast_df, metrics, skipped = forecasting.batch_linear_regression_forecast(
+            df, batch_request.days
+        )
+        for user_id in set(batch_request.user_ids or []) - set(metrics) - set(skipped):
+            skipped[user_id] = "no transactions in the last 365 days"
+
+        forecasts = [
+            {
+                "user_id": int(user_id),
+                "forecast": frame_records(group[['ds', 'yhat']]),
+                "model_metrics": metrics[int(user_id)],
+            }
+            for user_id, group in forecast_df.groupby('user_id', sort=True)
+        ]
+        return FastJSONResponse({"forecasts": forecasts, "skipped": skipped})
+    except Exception as e:
+        logger.error(f"Batch forecast error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_forecast_request(request_data):
+    """Job runner: payload is the request dict"""
+    forecast_request = schemas.ForecastRequest(**request_data)
+    with ReadSessionLocal() as db:
+        # The cache key is computed now, not at submit time, so a write that
+        # lands while the job is queued can't file the fit under a stale version
+        entry, _ = fit_forecast_blocking(db, forecast_request)
+        actuals = load_alert_actuals(db, forecast_request)
+    return build_forecast_result(entry, forecast_request, actuals)
+
+# Background forecast jobs; identical in-flight requests share one job
+forecast_jobs = JobQueue(
+    run_forecast_request, max_jobs=int(os.getenv("FORECAST_JOB_HISTORY", "1000"))
+)
+
+@app.post("/forecast/jobs", response_model=schemas.ForecastJob, status_code=202)
+def create_forecast_job(forecast_request: schemas.ForecastRequest, db: Session = Depends(get_read_db)):
+    """Queue a forecast and return its job id right away"""
+    # Only deduplicates: a job started after a write is a new job
+    key = forecast_cache_key(db, forecast_request)
+    thresholds = json.dumps(forecast_request.alert_thresholds, sort_keys=True, default=str)
+    variant = (forecast_request.chart_format, forecast_request.binary_charts)
+    job = forecast_jobs.submit(
+        (key, thresholds, variant), forecast_request.model_dump()
+    )
+    return job.to_dict()
+
+@app.get("/forecast/jobs/{job_id}", response_model=schemas.ForecastJob)
+def read_forecast_job(job_id: str):
+    """Poll a forecast job's status and fetch its result once finished"""
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/forecast/cache")
+def forecast_cache_stats():
+    """Report forecast cache hits, misses and model fit time"""
+    with fit_stats_lock:
+        stats = dict(fit_stats)
+    stats["avg_fit_seconds"] = stats["fit_seconds_total"] / stats["fits"] if stats["fits"] else None
+    return {
+        **forecast_cache.stats(), **stats,
+        "executor": forecast_executor.stats(),
+        "jobs": forecast_jobs.stats(),
+        "analysis_cache": analysis_cache.stats(),
+    }
+
+@app.get("/db/pool")
+def database_pool_stats():
+    """Report connection pool occupancy and checkout waits per engine"""
+    stats = {"primary": pool_stats(engine)}
+    if read_engine is not engine:
+        stats["read"] = pool_stats(read_engine)
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine)
+    return stats
+
+def _cache_gauge(field):
+    def collect():
+        return {
+            ("forecast",): forecast_cache.stats().get(field),
+            ("analysis",): analysis_cache.stats().get(field),
+        }
+    return collect
+
+def _pool_gauge(field):
+    def collect():
+        return {
+            (name,): stats.get(field)
+            for name, stats in database_pool_stats().items()
+        }
+    return collect
+
+for _name, _doc, _callback, _labels in [
+    ("cache_hits", "Cache hits since startup", _cache_gauge("hits"), ("cache",)),
+    ("cache_misses", "Cache misses since startup", _cache_gauge("misses"), ("cache",)),
+    ("forecast_fits", "Forecast model fits since startup", lambda: fit_stats["fits"], ()),
+    ("forecast_executor_in_flight", "Forecast jobs running or queued",
+     lambda: forecast_executor.stats()["in_flight"], ()),
+    ("forecast_executor_rejected", "Forecast jobs rejected because the queue was full",
+     lambda: forecast_executor.stats()["rejected"], ()),
+    ("db_pool_checked_out", "Connections checked out of the pool", _pool_gauge("checked_out"), ("engine",)),
+    ("db_pool_checkout_wait_seconds", "Total time spent waiting for a pool connection",
+     _pool_gauge("wait_seconds_total"), ("engine",)),
+]:
+    metrics.REGISTRY.unregister(_name)
+    metrics.REGISTRY.register(metrics.GaugeCallback(_name, _doc, _callback, _labels))
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request latency, stage timings, cache and pool stats in Prometheus text format"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
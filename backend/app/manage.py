@@ -0,0 +1,184 @@
+"""Command-line entry points for the backend.
+
+Usage (from the backend directory):
+    python -m app.manage backfill-rollups [--user-id ID]
+    python -m app.manage create-indexes
+    python -m app.manage rebuild-aggregates [--user-id ID] [--verify]
+    python -m app.manage import-transactions ../data/raw/financial_transactions.csv
+    python -m app.manage check-alerts --thresholds '{"weekly_spending": 1000}' --output alerts.json
+    python -m app.manage backtest --models linear prophet --workers 4 --output backtest.json
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import logging
+import time
+
+from . import models, crud
+from .database import SessionLocal, engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_rollups(args):
+    """Rebuild the daily rollup table from existing transactions"""
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        rows = crud.rebuild_daily_rollups(db, user_id=args.user_id)
+    target = f"user {args.user_id}" if args.user_id is not None else "all users"
+    logger.info(f"Wrote {rows} daily rollup rows for {target}")
+
+
+def rebuild_aggregates(args):
+    """Rebuild the spending aggregates from transactions, or check them"""
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if args.verify:
+            user_ids = [args.user_id] if args.user_id is not None else [
+                row[0] for row in db.query(models.Transaction.user_id).distinct()
+            ]
+            bad = 0
+            for user_id in user_ids:
+                mismatches = crud.verify_spending_aggregates(db, user_id)
+                for mismatch in mismatches[:10]:
+                    logger.warning(f"User {user_id}: {mismatch}")
+                bad += bool(mismatches)
+            logger.info(f"Verified {len(user_ids)} users, {bad} with mismatched aggregates")
+            if bad:
+                raise SystemExit(1)
+            return
+        rows = crud.rebuild_spending_aggregates(db, user_id=args.user_id)
+    logger.info(f"Wrote {rows} spending aggregate rows")
+
+
+def create_indexes(args):
+    """Create any model indexes missing from an existing database"""
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    logger.info("Indexes are up to date")
+
+
+def import_transactions(args):
+    """Bulk-import transactions from a CSV or Parquet file"""
+    from . import ingest
+
+    models.Base.metadata.create_all(bind=engine)
+    result = ingest.import_file(
+        args.path, fmt=args.format, chunk_size=args.chunk_size,
+        resume=not args.restart, default_user_id=args.default_user_id,
+        dedupe=args.dedupe,
+    )
+    logger.info(
+        f"Imported {result['rows_imported']} rows ({result['rows_rejected']} rejected) "
+        f"in {result['seconds']:.1f}s, {result['rows_per_sec']:,.0f} rows/sec"
+    )
+
+
+def backtest(args):
+    """Rolling-origin backtest of the forecasting models"""
+    from . import backtesting
+
+    with SessionLocal() as db:
+        df = crud.get_daily_totals_for_users(db, user_ids=args.user_ids)
+    frames = {user_id: group[['ds', 'y']] for user_id, group in df.groupby('user_id')}
+    logger.info(f"Backtesting {args.models} on {len(frames)} users")
+
+    report = backtesting.run_backtest(
+        frames, args.models, initial=args.initial, horizon=args.horizon,
+        step=args.step, workers=args.workers, measure_memory=not args.skip_memory,
+    )
+    backtesting.write_report(report, args.output)
+    for model_type, summary in report["summary"].items():
+        logger.info(f"{model_type}: {summary}")
+
+
+def check_alerts(args):
+    """Forecast every user with the batched linear model and evaluate their alert rules"""
+    from . import alerts, forecasting
+
+    start = time.perf_counter()
+    thresholds = json.loads(args.thresholds) if args.thresholds else {}
+    today = datetime.now().date()
+    with SessionLocal() as db:
+        history = crud.get_daily_totals_for_users(
+            db, user_ids=args.user_ids,
+            start_date=(today - timedelta(days=365)).strftime('%Y-%m-%d'),
+            end_date=today.strftime('%Y-%m-%d')
+        )
+        actuals = crud.get_daily_rollups_for_users(
+            db, user_ids=args.user_ids,
+            start_date=min(today.replace(day=1), today - timedelta(days=6)).strftime('%Y-%m-%d'),
+            end_date=today.strftime('%Y-%m-%d')
+        )
+    forecast_df, _, skipped = forecasting.batch_linear_regression_forecast(history, args.days)
+    results = alerts.check_alerts_batch(forecast_df, thresholds, actuals, today=today)
+
+    flagged = {user_id: result for user_id, result in results.items() if result['alert_count']}
+    logger.info(
+        f"Checked {len(results)} users in {time.perf_counter() - start:.2f}s: "
+        f"{len(flagged)} with alerts, {len(skipped)} skipped"
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"alerts": flagged, "skipped": skipped}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-rollups", help=backfill_rollups.__doc__)
+    backfill.add_argument("--user-id", type=int, default=None)
+    backfill.set_defaults(func=backfill_rollups)
+
+    aggregates = commands.add_parser("rebuild-aggregates", help=rebuild_aggregates.__doc__)
+    aggregates.add_argument("--user-id", type=int, default=None)
+    aggregates.add_argument("--verify", action="store_true",
+                            help="Compare stored aggregates with a fresh recompute instead")
+    aggregates.set_defaults(func=rebuild_aggregates)
+
+    indexes = commands.add_parser("create-indexes", help=create_indexes.__doc__)
+    indexes.set_defaults(func=create_indexes)
+
+    imp = commands.add_parser("import-transactions", help=import_transactions.__doc__)
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=["csv", "parquet"], default=None)
+    imp.add_argument("--chunk-size", type=int, default=50000)
+    imp.add_argument("--default-user-id", type=int, default=None,
+                     help="User for rows without a user_id column (e.g. bank exports)")
+    imp.add_argument("--restart", action="store_true",
+                     help="Ignore any checkpoint and import from the first row")
+    imp.add_argument("--dedupe", action="store_true",
+                     help="Reject rows identical to an earlier row in the file")
+    imp.set_defaults(func=import_transactions)
+
+    ca = commands.add_parser("check-alerts", help=check_alerts.__doc__)
+    ca.add_argument("--user-ids", type=int, nargs="+", default=None)
+    ca.add_argument("--days", type=int, default=30, help="Days to forecast")
+    ca.add_argument("--thresholds", default=None,
+                    help="JSON alert thresholds, as in ForecastRequest.alert_thresholds")
+    ca.add_argument("--output", default=None, help="Write flagged users' alerts to this JSON file")
+    ca.set_defaults(func=check_alerts)
+
+    bt = commands.add_parser("backtest", help=backtest.__doc__)
+    bt.add_argument("--user-ids", type=int, nargs="+", default=None)
+    bt.add_argument("--models", nargs="+", default=["linear", "prophet"])
+    bt.add_argument("--initial", type=int, default=180, help="Days of history in the first fold")
+    bt.add_argument("--horizon", type=int, default=30, help="Days forecast per fold")
+    bt.add_argument("--step", type=int, default=30, help="Days between fold origins")
+    bt.add_argument("--workers", type=int, default=1, help="Worker processes")
+    bt.add_argument("--skip-memory", action="store_true",
+                    help="Skip the per-fold memory pass (halves the run time)")
+    bt.add_argument("--output", default="backtest_report.json")
+    bt.set_defaults(func=backtest)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
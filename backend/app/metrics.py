@@ -0,0 +1,290 @@
+"""Request latency histograms, hot-path stage timers and a Prometheus exporter.
+
+Metrics live in a small in-process registry rendered in the Prometheus text
+exposition format by ``render()``, which the API serves at ``/metrics``.
+
+``stage_timer("fit")`` times one phase of a request. Inside a
+``collect_stages()`` block the timings are gathered into a dict (used for
+the Server-Timing header and to carry timings back from forecast pool
+workers); outside one they go straight to the ``stage_seconds`` histogram.
+
+MetricsMiddleware records every HTTP request under its route template, so
+``/transactions/42`` and ``/transactions/43`` share one series.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import math
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}_total{_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        key = tuple(str(label) for label in labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge read from a callback at scrape time.
+
+    The callback returns either a number or a dict mapping label-value
+    tuples to numbers; None values are skipped.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.error(f"Error collecting {self.name}: {str(e)}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items()) if value is not None
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_PROGRESS = {"value": 0}
+_in_progress_lock = threading.Lock()
+REGISTRY.register(GaugeCallback(
+    "http_requests_in_progress", "HTTP requests currently being served",
+    lambda: REQUESTS_IN_PROGRESS["value"],
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "stage_duration_seconds",
+    "Time spent in each hot-path stage (fetch, prepare, fit, predict, plots, ...)",
+    ("stage",),
+))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("stages", default=None)
+
+
+def record_stages(stages: Dict[str, float]):
+    """Add stage timings to the active collector, or observe them if there is none"""
+    collector = _stages.get()
+    for stage, seconds in stages.items():
+        if collector is not None:
+            collector[stage] = collector.get(stage, 0.0) + seconds
+        else:
+            STAGE_SECONDS.observe(seconds, stage)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stages({stage: time.perf_counter() - start})
+
+
+@contextmanager
+def collect_stages(flush: bool = True) -> Iterator[Dict[str, float]]:
+    """Gather the stage timings recorded inside the block into a dict.
+
+    On exit the timings are passed on with record_stages (to an enclosing
+    collector or the histogram) unless ``flush`` is False, in which case
+    the caller is responsible for recording them.
+    """
+    stages: Dict[str, float] = {}
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+        if flush:
+            record_stages(stages)
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Server-Timing header value for a dict of stage timings"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per method, route and status.
+
+    The route template is read from ``scope["route"]``, which the router
+    fills in once it has matched; unmatched paths are grouped under
+    ``"unmatched"`` to keep the series count bounded. With a ``profiler``
+    (see ``app.profiling``), requests carrying its debug header are sampled
+    and the profile's location returned in ``X-Profile-File``.
+    """
+
+    def __init__(self, app, profiler=None, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.profiler = profiler
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        session = self.profiler.start(scope) if self.profiler is not None else None
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if session is not None:
+                    # The profile must be written before the headers go out;
+                    # joining the sampler and writing the file happen off the loop
+                    path = await run_in_threadpool(self.profiler.stop, session, scope)
+                    if path:
+                        MutableHeaders(scope=message)["X-Profile-File"] = path
+            await send(message)
+
+        with _in_progress_lock:
+            REQUESTS_IN_PROGRESS["value"] += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _in_progress_lock:
+                REQUESTS_IN_PROGRESS["value"] -= 1
+            if session is not None and session.running:
+                await run_in_threadpool(self.profiler.stop, session, scope)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                elapsed, scope["method"], getattr(route, "path", "unmatched"), status
+            )
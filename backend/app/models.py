@@ -1 +1,93 @@
+from sqlalchemy import Boolean, Column, Index, Integer, String, Float, Date, DateTime
 
+from .database import Base
+
+
+def _not_postgresql(ddl, target, bind, dialect, **kw):
+    return dialect.name != "postgresql"
+
+
+class Transaction(Base):
+    __tablename__ = "transactions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    date = Column(DateTime, nullable=False)
+    description = Column(String)
+    amount = Column(Float, nullable=False)
+    category = Column(String, nullable=False)
+    account = Column(String)
+
+    __table_args__ = (
+        # Per-user reads filter on user_id and a date range and page on
+        # (date, id). amount/category ride along so the analytics frame
+        # queries are answered from the index alone (INCLUDE on PostgreSQL,
+        # trailing key columns elsewhere).
+        Index(
+            "ix_transactions_user_date_id", "user_id", "date", "id",
+            postgresql_include=["amount", "category"],
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_transactions_user_date_id_amount_category",
+            "user_id", "date", "id", "amount", "category",
+        ).ddl_if(callable_=_not_postgresql),
+        Index("ix_transactions_user_category_date_id", "user_id", "category", "date", "id"),
+        # Listings across all users
+        Index("ix_transactions_date_id", "date", "id"),
+        Index("ix_transactions_category_date_id", "category", "date", "id"),
+        # Compact block-range index for date-range scans over the whole
+        # table; rows arrive roughly in date order
+        Index(
+            "ix_transactions_date_brin", "date", postgresql_using="brin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class DailyRollup(Base):
+    """Per-user daily spending totals by category, maintained on write"""
+    __tablename__ = "daily_rollups"
+
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Date-range reads across all users (batch forecasts, backtests)
+        Index("ix_daily_rollups_day_user_total", "day", "user_id", "total"),
+    )
+
+
+class SpendingAggregate(Base):
+    """Per-user spending totals by category, month, week and weekday x hour.
+
+    One row per (user, dimension, bucket); see app.aggregates.
+    """
+    __tablename__ = "spending_aggregates"
+
+    user_id = Column(Integer, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserDataVersion(Base):
+    """Monotonic counter bumped whenever a user's transactions change"""
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ImportCheckpoint(Base):
+    """Progress of a bulk import, committed with each batch so it can resume"""
+    __tablename__ = "import_checkpoints"
+
+    source_key = Column(String, primary_key=True)
+    rows_done = Column(Integer, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, nullable=False)
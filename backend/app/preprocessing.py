@@ -1 +1,209 @@
+"""Validation and memory-lean normalization of transaction frames.
 
+normalize_transactions validates a raw frame. The chunked pipeline
+(preprocess_chunks / preprocess_transactions) runs it on bounded-size
+chunks, drops duplicates by a 64-bit row hash across chunks, and compacts
+each chunk: timestamps stay datetime64, low-cardinality strings become
+Categoricals and amounts become float32 or int cents. Only compacted
+chunks are held, so peak memory follows the compact size plus one raw
+chunk rather than the whole raw history.
+"""
+import logging
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+AMOUNT_FORMATS = ('float64', 'float32', 'cents')
+CATEGORICAL_COLUMNS = ['category', 'account']
+# Columns that identify a transaction for de-duplication
+KEY_COLUMNS = ['user_id', 'date', 'amount', 'category', 'description', 'account']
+
+REQUIRED_COLUMNS = ['user_id', 'date', 'amount', 'category']
+TRANSACTION_COLUMNS = ['user_id', 'date', 'description', 'amount', 'category', 'account']
+
+# Raw exports name the timestamp column differently
+COLUMN_ALIASES = {
+    'timestamp': 'date',
+    'datetime': 'date',
+    'transaction_date': 'date',
+}
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Parse timestamps, taking the fast ISO 8601 path and falling back per value"""
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+    return parsed
+
+
+def normalize_transactions(df: pd.DataFrame, default_user_id: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Validate a raw transaction frame and coerce it to the model's columns.
+
+    Returns ``(valid, rejected)``. Rows with a missing or unparseable user,
+    date, amount or category end up in ``rejected`` with a ``reason`` column;
+    ``valid`` has exactly TRANSACTION_COLUMNS in the model's order.
+    """
+    df = df.rename(columns={c: c.strip().lower() for c in df.columns})
+    df = df.rename(columns=COLUMN_ALIASES)
+    if 'user_id' not in df and default_user_id is not None:
+        df['user_id'] = default_user_id
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    out = pd.DataFrame(index=df.index)
+    out['user_id'] = pd.to_numeric(df['user_id'], errors='coerce')
+    if default_user_id is not None:
+        out['user_id'] = out['user_id'].fillna(default_user_id)
+    out['date'] = parse_dates(df['date'])
+    out['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    for column in ['description', 'category', 'account']:
+        if column in df:
+            values = df[column].astype(object)
+            out[column] = values.where(values.isna(), values.astype(str).str.strip())
+        else:
+            out[column] = None
+    out.loc[out['category'] == '', 'category'] = None
+
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    for column, reason in [
+        ('category', 'missing category'),
+        ('amount', 'invalid amount'),
+        ('date', 'invalid date'),
+        ('user_id', 'invalid user_id'),
+    ]:
+        reasons[out[column].isna()] = reason
+    bad = reasons.notna().to_numpy()
+    finite = np.isfinite(out['amount'].to_numpy(dtype=np.float64, na_value=np.nan))
+    reasons[~bad & ~finite] = 'invalid amount'
+    bad = reasons.notna().to_numpy()
+
+    rejected = df[bad].assign(reason=reasons[bad])
+    valid = out[~bad][TRANSACTION_COLUMNS]
+    valid = valid.astype({'user_id': np.int64, 'amount': np.float64})
+    if valid['date'].dt.tz is not None:
+        valid['date'] = valid['date'].dt.tz_convert(None)
+    return valid, rejected
+
+
+def compact_transactions(df: pd.DataFrame, amounts: str = 'float32',
+                         categorical: Sequence[str] = CATEGORICAL_COLUMNS) -> pd.DataFrame:
+    """Shrink a normalized frame's dtypes.
+
+    ``categorical`` columns become Categoricals; ``description`` does too
+    when at most half its values are distinct. ``amounts`` is 'float64',
+    'float32' (exact to the cent below $100k) or 'cents', which replaces
+    ``amount`` with an integer ``amount_cents`` column.
+    """
+    if amounts not in AMOUNT_FORMATS:
+        raise ValueError(f"Unknown amount format {amounts!r}, expected one of {AMOUNT_FORMATS}")
+    out = {}
+    for column in df.columns:
+        values = df[column]
+        if column in categorical or (
+            column == 'description' and values.nunique(dropna=True) <= len(values) // 2
+        ):
+            out[column] = values.astype('category')
+        elif column == 'user_id':
+            out[column] = values.astype(np.int32 if len(values) == 0 or values.max() < 2**31 else np.int64)
+        elif column == 'amount' and amounts == 'cents':
+            cents = np.rint(values.to_numpy(dtype=np.float64) * 100)
+            small = len(cents) == 0 or np.abs(cents).max() < 2**31
+            out['amount_cents'] = cents.astype(np.int32 if small else np.int64)
+        elif column == 'amount':
+            out[column] = values.astype(amounts)
+        else:
+            out[column] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def transaction_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash per row over the columns that identify a transaction"""
+    columns = [column for column in KEY_COLUMNS if column in df]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+class DuplicateFilter:
+    """Drops rows whose hash was already seen in this or an earlier chunk.
+
+    Seen hashes are kept as one sorted uint64 array, 8 bytes per row.
+    """
+
+    def __init__(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def __call__(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Split a chunk into (new rows, duplicate rows)"""
+        hashes = transaction_hashes(df)
+        duplicate = pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, self.seen)
+        self.seen = np.union1d(self.seen, hashes[~duplicate])
+        return df[~duplicate], df[duplicate]
+
+
+def split_frame(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def preprocess_chunks(chunks: Iterable[pd.DataFrame], default_user_id: Optional[int] = None,
+                      dedupe: bool = True, amounts: str = 'float32',
+                      compact: bool = True) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Normalize raw chunks one at a time, yielding ``(valid, rejected)`` per chunk.
+
+    Duplicates (by transaction_hashes, across all chunks) go to
+    ``rejected`` with reason 'duplicate'.
+    """
+    duplicates = DuplicateFilter() if dedupe else None
+    for chunk in chunks:
+        valid, rejected = normalize_transactions(chunk, default_user_id)
+        if duplicates is not None and len(valid):
+            valid, repeated = duplicates(valid)
+            if len(repeated):
+                rejected = pd.concat([rejected, repeated.assign(reason='duplicate')])
+        if compact:
+            valid = compact_transactions(valid, amounts)
+        yield valid, rejected
+
+
+def concat_compact(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compacted chunks, unioning their Categoricals instead of falling back to object"""
+    frames = [frame for frame in frames if len(frame.columns)]
+    if not frames:
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+    out = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        categorical = [isinstance(part.dtype, pd.CategoricalDtype) for part in parts]
+        if any(categorical):
+            # description is only categorized in low-cardinality chunks
+            parts = [part if is_cat else part.astype('category') for part, is_cat in zip(parts, categorical)]
+            if len({part.cat.categories.dtype for part in parts}) > 1:
+                # e.g. an all-null chunk next to string chunks
+                parts = [part.cat.set_categories(part.cat.categories.astype(object)) for part in parts]
+            out[column] = pd.Series(union_categoricals(parts), name=column)
+        else:
+            out[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(out)
+
+
+def preprocess_transactions(source: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+                            chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> Tuple[pd.DataFrame, int]:
+    """Run the chunked pipeline over a frame or an iterable of chunks.
+
+    Returns the compacted frame and the number of rejected rows; keyword
+    arguments go to preprocess_chunks.
+    """
+    chunks = split_frame(source, chunk_size) if isinstance(source, pd.DataFrame) else source
+    frames, rejected = [], 0
+    for valid, bad in preprocess_chunks(chunks, **kwargs):
+        frames.append(valid)
+        rejected += len(bad)
+    return concat_compact(frames), rejected
@@ -0,0 +1,143 @@
+"""Opt-in sampling profiler for single requests.
+
+With PROFILING_ENABLED=1, a request sent with an ``X-Debug-Profile`` header
+(matching PROFILE_TOKEN, when one is set) is profiled: a background thread
+samples every thread's Python stack each PROFILE_INTERVAL_MS milliseconds
+while the request runs. The samples are written to PROFILE_DIR as folded
+stacks ("thread;outer;...;inner count" per line), the input format of
+flamegraph.pl, speedscope and inferno, and the file path is returned in the
+``X-Profile-File`` response header.
+
+Only one request is profiled at a time and idle threads are left out, but
+other requests served meanwhile show up too, so profile on a quiet server.
+Forecast fits run in a separate process unless FORECAST_WORKERS=0 and are
+only visible as time spent waiting on the pool.
+"""
+from collections import Counter
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-debug-profile"
+
+# Leaf frames of threads parked waiting for work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace(os.sep, "/")
+    short = "/".join(path.rsplit("/", 2)[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class ProfileSession:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.running = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        self._thread.join()
+
+
+class RequestProfiler:
+    """Starts a ProfileSession for requests carrying the debug header"""
+
+    def __init__(self, output_dir: str, interval_ms: float = 5.0, token: Optional[str] = None):
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000.0
+        self.token = token
+        self._busy = threading.Lock()
+
+    def wanted(self, scope) -> bool:
+        value = Headers(scope=scope).get(PROFILE_HEADER)
+        if not value:
+            return False
+        return self.token is None or value == self.token
+
+    def start(self, scope) -> Optional[ProfileSession]:
+        if not self.wanted(scope):
+            return None
+        if not self._busy.acquire(blocking=False):
+            logger.warning(f"Profiler busy, not profiling {scope['method']} {scope['path']}")
+            return None
+        session = ProfileSession(self.interval)
+        session.start()
+        return session
+
+    def stop(self, session: ProfileSession, scope) -> Optional[str]:
+        """Stop sampling and write the folded stacks; returns the file path"""
+        try:
+            session.stop()
+            elapsed = time.perf_counter() - session.started
+            slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+            stamp = f"{time.strftime('%Y%m%d-%H%M%S')}.{int(time.time() * 1000) % 1000:03d}"
+            name = f"{stamp}-{scope['method'].lower()}-{slug}.folded"
+            path = os.path.join(self.output_dir, name)
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in session.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(
+                f"Profiled {scope['method']} {scope['path']}: {session.samples} samples "
+                f"over {elapsed:.3f}s written to {path}"
+            )
+            return path
+        except Exception as e:
+            logger.error(f"Error writing profile: {str(e)}")
+            return None
+        finally:
+            self._busy.release()
+
+
+def profiler_from_env() -> Optional[RequestProfiler]:
+    """RequestProfiler configured from PROFILE_* settings, or None unless PROFILING_ENABLED"""
+    if os.getenv("PROFILING_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    return RequestProfiler(
+        os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "finance-profiles")),
+        interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        token=os.getenv("PROFILE_TOKEN") or None,
+    )
@@ -0,0 +1,179 @@
+"""Fast JSON rendering and response compression for large payloads.
+
+FastJSONResponse renders with orjson, which handles numpy arrays and
+scalars, datetimes and NaN (as null) natively; pandas objects go through a
+small ``default`` hook. Endpoints that return big payloads hand it plain
+dicts/lists directly, so FastAPI skips the response_model validation pass.
+
+CompressionMiddleware compresses bodies above a size threshold with
+brotli or gzip, whichever the client prefers and is available.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+import json
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+# Supported encodings, most preferred first when the client rates them equally
+ENCODINGS = ("br", "gzip")
+
+
+def _default(obj):
+    if isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return frame_records(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if obj is pd.NaT:
+        return None
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content, default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame.to_dict('records') with native datetimes, built column-wise"""
+    names = [str(name) for name in df.columns]
+    columns = []
+    for name in df.columns:
+        column = df[name]
+        if column.dtype.kind == "M":
+            columns.append(column.dt.to_pydatetime().tolist())
+        else:
+            columns.append(column.tolist())
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating brotli/gzip for buffered responses.
+
+    Bodies under ``minimum_size`` bytes, non-text content and responses that
+    already carry a Content-Encoding are passed through untouched. Bodies of
+    ``threadpool_size`` bytes or more are compressed on the threadpool so
+    the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 5,
+                 brotli_quality: int = 4, threadpool_size: int = 64 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.threadpool_size = threadpool_size
+
+    def choose_encoding(self, accept_encoding: str):
+        accepted = {}
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if token:
+                accepted[token.strip().lower()] = quality
+        best, best_quality = None, 0.0
+        for encoding in ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            # Strictly greater, so ties keep the earlier (preferred) encoding
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                if len(body) >= self.threadpool_size:
+                    body = await run_in_threadpool(self.compress, body, encoding)
+                else:
+                    body = self.compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
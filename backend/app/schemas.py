@@ -1 +1,103 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import List, Dict, Any, Literal, Optional
 
+
+class TransactionBase(BaseModel):
+    user_id: int
+    date: datetime
+    description: Optional[str] = None
+    amount: float
+    category: str
+    account: Optional[str] = None
+
+
+class TransactionCreate(TransactionBase):
+    pass
+
+
+class Transaction(TransactionBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+
+
+class BatchItemError(BaseModel):
+    index: int
+    error: str
+
+
+class BatchTransactionResult(BaseModel):
+    created: List[Transaction]
+    errors: List[BatchItemError]
+
+
+class ImportResult(BaseModel):
+    source_key: str
+    resumed_from: int
+    rows_read: int
+    rows_imported: int
+    rows_rejected: int
+    seconds: float
+    rows_per_sec: float
+    already_completed: bool
+
+
+class SpendingAnalysis(BaseModel):
+    category_breakdown: Dict[str, Any]
+    period_analysis: Dict[str, Any]
+    heatmap: Dict[str, Any]
+
+
+# Forecasts fit on a year of history; the batch engine also sizes its
+# arrays from the horizon
+MAX_FORECAST_DAYS = 365
+
+
+class ForecastRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    user_id: int
+    model_type: str = "prophet"
+    days: int = Field(30, ge=1, le=MAX_FORECAST_DAYS)
+    alert_thresholds: Dict[str, Any] = {}
+    # "compact" returns data-only chart specs (see app.charts) instead of Plotly figures
+    chart_format: Literal["plotly", "compact"] = "plotly"
+    binary_charts: bool = False
+
+
+class ForecastResult(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    forecast: List[Dict[str, Any]]
+    model_metrics: Dict[str, Any]
+    alerts: Dict[str, Any]
+    visualizations: Dict[str, Any]
+
+
+class ForecastJob(BaseModel):
+    job_id: str
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[ForecastResult] = None
+
+
+class BatchForecastRequest(BaseModel):
+    user_ids: Optional[List[int]] = None
+    days: int = Field(30, ge=1, le=MAX_FORECAST_DAYS)
+
+
+class UserForecast(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    user_id: int
+    forecast: List[Dict[str, Any]]
+    model_metrics: Dict[str, Any]
+
+
+class BatchForecastResult(BaseModel):
+    forecasts: List[UserForecast]
+    skipped: Dict[int, str]
@@ -1,14 +1,24 @@
+import json
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime
 import logging
-from typing import Dict, Any
+from typing import Any, Dict, Optional
+
+from . import aggregates, charts, crud
 
 logger = logging.getLogger(__name__)
 
+COMPONENT_COLUMNS = ['trend', 'holidays', 'weekly', 'yearly']
+
+def figure_to_dict(fig) -> Dict[str, Any]:
+    """Convert a figure into plain JSON types (Figure.to_dict keeps numpy arrays)"""
+    return json.loads(fig.to_json())
+
 def generate_forecast_plots(forecast_df: pd.DataFrame, model) -> Dict[str, Any]:
     """Generate visualization data for forecast results"""
+    # plotly is imported on first use to keep API startup fast
+    import plotly.graph_objects as go
+
     try:
         forecast_df['ds'] = pd.to_datetime(forecast_df['ds'])
         
@@ -47,54 +57,123 @@ def generate_forecast_plots(forecast_df: pd.DataFrame, model) -> Dict[str, Any]:
             hovermode="x"
         )
         
-        # Model components plot (for Prophet only)
+        # Model components plot (for Prophet only). Components need the
+        # full history+future frame with trend/seasonality columns, not the
+        # trimmed forecast
         components_fig = None
-        if hasattr(model, 'plot_components'):
-            components_fig = model.plot_components(forecast_df)
-            components_fig = go.Figure(components_fig)
+        full_forecast = getattr(model, 'full_forecast', None)
+        if hasattr(model, 'plot_components') and full_forecast is not None:
+            from prophet.plot import plot_components_plotly
+            components_fig = plot_components_plotly(model, full_forecast)
             components_fig.update_layout(title="Forecast Components")
         
         return {
-            "forecast_plot": forecast_fig.to_dict(),
-            "components_plot": components_fig.to_dict() if components_fig else None
+            "forecast_plot": figure_to_dict(forecast_fig),
+            "components_plot": figure_to_dict(components_fig) if components_fig else None
         }
     except Exception as e:
         logger.error(f"Visualization error: {str(e)}")
         raise
 
-def get_spending_analysis(db, user_id: int, period: str = "monthly"):
+def forecast_components(model) -> Optional[pd.DataFrame]:
+    """ds plus the Prophet component columns of a fitted model's full forecast"""
+    full_forecast = getattr(model, 'full_forecast', None)
+    if full_forecast is None:
+        return None
+    columns = [c for c in COMPONENT_COLUMNS if c in full_forecast.columns]
+    return full_forecast[['ds', *columns]].reset_index(drop=True)
+
+def compact_forecast_charts(forecast_df: pd.DataFrame, components_df: Optional[pd.DataFrame],
+                            binary: bool = False) -> Dict[str, Any]:
+    """Data-only counterpart of generate_forecast_plots"""
+    columns = {'ds': pd.to_datetime(forecast_df['ds'])}
+    for name in ['yhat', 'yhat_lower', 'yhat_upper']:
+        if name in forecast_df.columns:
+            columns[name] = forecast_df[name]
+    components = None
+    if components_df is not None:
+        components = charts.chart(
+            "components", {name: components_df[name] for name in components_df.columns},
+            title="Forecast Components", binary=binary
+        )
+    return {
+        "forecast_plot": charts.chart(
+            "forecast", columns, title="30-Day Cash Flow Forecast", binary=binary,
+            x_title="Date", y_title="Amount ($)"
+        ),
+        "components_plot": components
+    }
+
+def get_spending_analysis(db, user_id: int, period: str = "monthly",
+                          chart_format: str = "plotly", binary: bool = False):
     """Generate spending analysis visualizations"""
+    aggregate_df, daily_df = load_spending_aggregates(db, user_id, period)
+    return build_spending_analysis(aggregate_df, daily_df, period, chart_format, binary)
+
+def load_spending_aggregates(db, user_id: int, period: str = "monthly"):
+    """Read the pre-aggregated rows the analysis needs.
+
+    Monthly and weekly totals come from the spending aggregates; any other
+    period falls back to per-day totals from the daily rollup.
+    """
+    dimensions = [aggregates.CATEGORY, aggregates.WEEKDAY_HOUR]
+    daily_df = None
+    if period in aggregates.PERIOD_DIMENSIONS:
+        dimensions.append(aggregates.PERIOD_DIMENSIONS[period])
+    else:
+        daily_df = crud.get_user_daily_totals(db, user_id=user_id)
+    return crud.get_user_aggregates(db, user_id, dimensions), daily_df
+
+def build_spending_analysis(aggregate_df: pd.DataFrame, daily_df: Optional[pd.DataFrame],
+                            period: str = "monthly", chart_format: str = "plotly",
+                            binary: bool = False):
+    """Build the spending figures from aggregate rows (and daily totals for a daily period)"""
     try:
-        # Get transactions from database
-        transactions = crud.get_user_transactions(db, user_id=user_id)
-        df = pd.DataFrame([{
-            'date': t.date,
-            'amount': t.amount,
-            'category': t.category
-        } for t in transactions])
-        
-        df['date'] = pd.to_datetime(df['date'])
-        
+        def dimension_rows(dimension):
+            return aggregate_df[aggregate_df['dimension'] == dimension]
+
+        category_df = dimension_rows(aggregates.CATEGORY)
+        if daily_df is None:
+            rows = dimension_rows(aggregates.PERIOD_DIMENSIONS[period])
+            period_df = pd.DataFrame({'period': rows['bucket'], 'amount': rows['total']})
+        else:
+            period_df = pd.DataFrame({
+                'period': daily_df['ds'].dt.date.astype(str),
+                'amount': daily_df['y']
+            })
+        df = aggregates.weekday_hour_frame(dimension_rows(aggregates.WEEKDAY_HOUR))
+        heatmap_df = df.groupby(['weekday', 'hour'])['amount'].sum().unstack()
+
+        if chart_format == "compact":
+            return {
+                "category_breakdown": charts.chart(
+                    "pie", {"labels": category_df['bucket'], "values": category_df['total']},
+                    title="Spending by Category", binary=binary
+                ),
+                "period_analysis": charts.chart(
+                    "bar", {"x": period_df['period'], "y": period_df['amount']},
+                    title=f"Spending by {period.capitalize()}", binary=binary,
+                    x_title=period.capitalize(), y_title="Amount ($)"
+                ),
+                "heatmap": charts.chart(
+                    "heatmap",
+                    {"x": heatmap_df.columns, "y": heatmap_df.index, "z": heatmap_df.values},
+                    title="Spending Heatmap by Weekday/Hour", binary=binary,
+                    x_title="Hour of Day", y_title="Weekday"
+                ),
+            }
+
+        import plotly.graph_objects as go
+
         # Category breakdown
-        category_df = df.groupby('category')['amount'].sum().reset_index()
         category_fig = go.Figure(go.Pie(
-            labels=category_df['category'],
-            values=category_df['amount'],
+            labels=category_df['bucket'],
+            values=category_df['total'],
             hole=0.3
         ))
         category_fig.update_layout(title="Spending by Category")
         
         # Time period analysis
-        if period == "monthly":
-            df['period'] = df['date'].dt.to_period('M')
-        elif period == "weekly":
-            df['period'] = df['date'].dt.to_period('W')
-        else:
-            df['period'] = df['date'].dt.date
-        
-        period_df = df.groupby('period')['amount'].sum().reset_index()
-        period_df['period'] = period_df['period'].astype(str)
-        
         period_fig = go.Figure(go.Bar(
             x=period_df['period'],
             y=period_df['amount'],
@@ -107,10 +186,6 @@ def get_spending_analysis(db, user_id: int, period: str = "monthly"):
         )
         
         # Weekday heatmap
-        df['weekday'] = df['date'].dt.day_name()
-        df['hour'] = df['date'].dt.hour
-        heatmap_df = df.groupby(['weekday', 'hour'])['amount'].sum().unstack()
-        
         heatmap_fig = go.Figure(go.Heatmap(
             x=heatmap_df.columns,
             y=heatmap_df.index,
@@ -124,9 +199,9 @@ def get_spending_analysis(db, user_id: int, period: str = "monthly"):
         )
         
         return {
-            "category_breakdown": category_fig.to_dict(),
-            "period_analysis": period_fig.to_dict(),
-            "heatmap": heatmap_fig.to_dict()
+            "category_breakdown": figure_to_dict(category_fig),
+            "period_analysis": figure_to_dict(period_fig),
+            "heatmap": figure_to_dict(heatmap_fig)
         }
     except Exception as e:
         logger.error(f"Spending analysis error: {str(e)}")
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# The app reads DATABASE_URL at import time, so point it at a scratch
+# database before anything imports app.database. TEST_DATABASE_URL selects
+# another server (e.g. a local PostgreSQL) for the query-plan suite.
+_tmpdir = tempfile.mkdtemp(prefix="finance-tests-")
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+)
+
+# Forecasts fit on a background thread instead of spawning worker processes
+os.environ.setdefault("FORECAST_WORKERS", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,141 @@
+import pandas as pd
+import pytest
+
+from app import alerts
+
+TODAY = pd.Timestamp("2024-03-10")
+
+
+def forecast_frame(amounts, start="2024-03-01"):
+    return pd.DataFrame({
+        "ds": pd.date_range(start, periods=len(amounts), freq="D"),
+        "yhat": amounts,
+    })
+
+
+def actual_rows(amounts, start, category="Dining"):
+    return pd.DataFrame({
+        "day": pd.date_range(start, periods=len(amounts), freq="D").date,
+        "category": category,
+        "total": amounts,
+    })
+
+
+def rules(result):
+    return [alert["rule"] for alert in result["alerts"]]
+
+
+def test_daily_spending():
+    amounts = [-50.0] * 10
+    amounts[2] = -150.0
+    amounts[6] = -120.0
+    result = alerts.check_for_alerts(forecast_frame(amounts), 1, {"daily_spending": 100})
+
+    assert result["alert_count"] == 1
+    alert = result["alerts"][0]
+    assert alert["rule"] == "daily_spending"
+    assert alert["days"] == 2
+    assert alert["value"] == 150.0
+    assert alert["threshold"] == 100.0
+    assert "2024-03-03" in alert["message"]
+    # Income days never count as spending
+    assert alerts.check_for_alerts(forecast_frame([500.0] * 10), 1, {"daily_spending": 100})["alert_count"] == 0
+
+
+def test_weekly_window_spans_actuals_and_forecast():
+    forecast = forecast_frame([-10.0] * 10)
+    actuals = actual_rows([-40.0] * 5, "2024-02-25")
+    thresholds = {"weekly_spending": 200}
+
+    # Windows ending March 1st and 2nd hold all five actual days at 40
+    result = alerts.check_for_alerts(forecast, 1, thresholds, actuals=actuals, today=TODAY)
+    assert rules(result) == ["weekly_spending"]
+    alert = result["alerts"][0]
+    assert alert["date"] == "2024-03-01"
+    assert alert["days"] == 2
+    assert alert["value"] == 220.0
+    assert "2024-03-02" in alert["message"]
+
+    # Forecast days alone stay well under the limit
+    assert alerts.check_for_alerts(forecast, 1, thresholds)["alert_count"] == 0
+
+
+def test_weekly_window_ignores_actuals_overlapping_the_forecast():
+    forecast = forecast_frame([-10.0] * 10)
+    actuals = actual_rows([-500.0] * 3, "2024-03-01")
+    result = alerts.check_for_alerts(forecast, 1, {"weekly_spending": 100}, actuals=actuals, today=TODAY)
+    assert result["alert_count"] == 0
+
+
+@pytest.mark.parametrize("thresholds, first, lowest", [
+    ({"negative_balance": True, "starting_balance": 300}, "2024-03-07", -200.0),
+    ({"negative_balance": 100, "starting_balance": 300}, "2024-03-05", -200.0),
+    ({"negative_balance": True}, "2024-03-01", -500.0),
+])
+def test_negative_balance(thresholds, first, lowest):
+    result = alerts.check_for_alerts(forecast_frame([-50.0] * 10), 1, thresholds)
+    assert rules(result) == ["negative_balance"]
+    alert = result["alerts"][0]
+    assert alert["date"] == first
+    assert alert["value"] == lowest
+
+
+def test_negative_balance_not_reached():
+    thresholds = {"negative_balance": True, "starting_balance": 1000}
+    assert alerts.check_for_alerts(forecast_frame([-50.0] * 10), 1, thresholds)["alert_count"] == 0
+    assert alerts.check_for_alerts(forecast_frame([-50.0] * 10), 1, {"negative_balance": False})["alert_count"] == 0
+
+
+# $90 of Dining over the first ten days of March: a $279 run rate for the month
+@pytest.mark.parametrize("budgets, expected", [
+    ({"Dining": 100}, "category_budget_projected"),
+    ({"Dining": 80}, "category_budget"),
+    ({"Dining": 500}, None),
+    ([{"category": "Dining", "budget": 100, "threshold": 0.8}], "category_budget"),
+    ([{"category": "Dining", "budget": 100, "threshold": 80}], "category_budget"),
+    ([{"category": "Dining", "budget": 100, "threshold": 95}], "category_budget_projected"),
+    ([{"category": "Dining", "budget": 100, "threshold": None}], "category_budget_projected"),
+    ([{"category": "Groceries", "budget": 100, "threshold": 0.5}], None),
+])
+def test_category_budgets(budgets, expected):
+    actuals = pd.concat([
+        actual_rows([-9.0] * 10, "2024-03-01"),
+        # Last month's spending doesn't count
+        actual_rows([-1000.0], "2024-02-28"),
+    ])
+    result = alerts.check_for_alerts(
+        forecast_frame([0.0] * 10, start="2024-03-11"), 1,
+        {"category_budgets": budgets}, actuals=actuals, today=TODAY,
+    )
+    assert rules(result) == ([expected] if expected else [])
+    if expected == "category_budget":
+        assert result["alerts"][0]["value"] == 90.0
+    elif expected:
+        assert result["alerts"][0]["value"] == 279.0
+
+
+def test_budget_frame_normalizes_thresholds():
+    frame = alerts.budget_frame([
+        {"category": "Dining", "budget": 100, "threshold": 80},
+        {"category": "Rent", "budget": "1500", "threshold": 0.9},
+        {"category": "Travel", "budget": 0},
+        {"category": None, "budget": 50},
+    ])
+    assert frame["category"].tolist() == ["Dining", "Rent"]
+    assert frame["threshold"].tolist() == [0.8, 0.9]
+    assert alerts.budget_frame({"Dining": 100})["threshold"].tolist() == [1.0]
+    assert alerts.budget_frame(None).empty
+
+
+def test_batch_with_user_overrides():
+    forecast = pd.concat([
+        forecast_frame([-150.0] * 3).assign(user_id=1),
+        forecast_frame([-150.0] * 3).assign(user_id=2),
+        forecast_frame([-10.0] * 3).assign(user_id=3),
+    ])
+    results = alerts.check_alerts_batch(
+        forecast, {"daily_spending": 100}, user_thresholds={2: {"daily_spending": 200}},
+    )
+    assert sorted(results) == [1, 2, 3]
+    assert [results[u]["alert_count"] for u in (1, 2, 3)] == [1, 0, 0]
+    assert results[1]["potential_issues"] == [results[1]["alerts"][0]["message"]]
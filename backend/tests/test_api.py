@@ -1 +1,447 @@
+"""Endpoint behaviour against a seeded SQLite database.
 
+The module reseeds the schema once; tests that write use their own user ids
+so they don't disturb the shared history of USERS.
+"""
+import asyncio
+import base64
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import crud, database, main, models, schemas
+from app.cache import RedisCache
+from app.database import SessionLocal, engine
+from app.executor import ForecastExecutor
+
+USERS = (1, 2, 3)
+DAYS = 120
+CATEGORIES = ["Groceries", "Dining", "Utilities", "Income"]
+START = datetime(2024, 1, 1)
+
+
+def make_transactions(user_id, days=DAYS, per_day=3, seed=0, start=START):
+    rng = np.random.default_rng(seed + user_id)
+    return [
+        schemas.TransactionCreate(
+            user_id=user_id,
+            date=start + timedelta(days=day, hours=int(rng.integers(0, 24)), minutes=i),
+            description="seed",
+            amount=round(float(rng.normal(-40, 25)), 2),
+            category=CATEGORIES[int(rng.integers(0, len(CATEGORIES)))],
+            account="Checking",
+        )
+        for day in range(days) for i in range(per_day)
+    ]
+
+
+@pytest.fixture(scope="module")
+def client():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        for user_id in USERS:
+            crud.create_transactions(db, make_transactions(user_id))
+    with TestClient(main.app) as client:
+        yield client
+    main.forecast_cache.clear()
+    main.analysis_cache.clear()
+    models.Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def async_reads():
+    """Call to serve the read endpoints from an aiosqlite AsyncSession, as with DB_ASYNC=1"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+    sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def get_async_read_db():
+        async with sessions() as db:
+            yield db
+
+    def enable():
+        main.app.dependency_overrides[main.get_async_read_db] = get_async_read_db
+
+    yield enable
+    main.app.dependency_overrides.pop(main.get_async_read_db, None)
+    asyncio.run(async_engine.dispose())
+
+
+READ_REQUESTS = [
+    ("/transactions/1", {"limit": 50}),
+    ("/transactions/daily/1", {"start_date": "2024-02-01", "end_date": "2024-03-01"}),
+    ("/transactions/categories/2", {}),
+    ("/transactions/category-daily/3", {"category": ["Dining", "Income"]}),
+    ("/transactions/analysis/1", {"period": "monthly", "chart_format": "compact"}),
+    ("/transactions/analysis/2", {"period": "daily", "chart_format": "compact"}),
+]
+
+
+def test_async_reads_match_sync_reads(client, async_reads, monkeypatch):
+    expected = {}
+    for path, params in READ_REQUESTS:
+        response = client.get(path, params=params)
+        assert response.status_code == 200, path
+        expected[path] = response.json()
+    main.analysis_cache.clear()
+
+    # With an AsyncSession, frames must be built on a worker thread, never
+    # on the event loop
+    built_on_loop = []
+    frame_from_rows = crud._frame_from_rows
+
+    def spy(rows, columns):
+        try:
+            asyncio.get_running_loop()
+            built_on_loop.append(columns)
+        except RuntimeError:
+            pass
+        return frame_from_rows(rows, columns)
+
+    monkeypatch.setattr(crud, "_frame_from_rows", spy)
+    async_reads()
+    for path, params in READ_REQUESTS:
+        response = client.get(path, params=params)
+        assert response.status_code == 200, path
+        assert response.json() == expected[path], path
+    assert built_on_loop == []
+
+
+def test_db_pool_stats(client):
+    before = client.get("/db/pool").json()["primary"]
+    with engine.connect() as connection:
+        connection.execute(text("select 1"))
+        during = client.get("/db/pool").json()["primary"]
+    after = client.get("/db/pool").json()["primary"]
+
+    assert during["pool"] == "TimedQueuePool"
+    assert during["checkouts"] == before["checkouts"] + 1
+    assert during["checked_out"] == before["checked_out"] + 1
+    assert after["checked_out"] == before["checked_out"]
+    assert during["wait_seconds_total"] >= before["wait_seconds_total"]
+    assert during["wait_seconds_max"] >= during["wait_seconds_avg"] >= 0
+    assert during["max_overflow"] == database.MAX_OVERFLOW
+    assert f'db_pool_checked_out{{engine="primary"}} {after["checked_out"]}' in client.get("/metrics").text
+
+
+@pytest.mark.parametrize("chart_format", ["plotly", "compact"])
+@pytest.mark.parametrize("period", ["monthly", "daily"])
+def test_analysis_for_user_without_data(client, period, chart_format):
+    response = client.get(
+        "/transactions/analysis/999", params={"period": period, "chart_format": chart_format}
+    )
+    assert response.status_code == 200
+    charts = response.json()
+    if chart_format == "compact":
+        assert charts["category_breakdown"]["columns"] == {"labels": [], "values": []}
+        assert charts["period_analysis"]["columns"] == {"x": [], "y": []}
+    else:
+        assert charts["category_breakdown"]["data"][0]["values"] == []
+        assert charts["period_analysis"]["data"][0]["x"] == []
+
+
+def aggregate_rows(user_id):
+    with SessionLocal() as db:
+        df = crud.get_user_aggregates(db, user_id)
+    return {
+        (dimension, bucket): (round(total, 6), count)
+        for dimension, bucket, total, count in zip(df["dimension"], df["bucket"], df["total"], df["count"])
+    }
+
+
+def test_writes_keep_aggregates_in_sync(client):
+    user_id = 20
+    payload = [
+        t.model_dump(mode="json") for t in make_transactions(user_id, days=10, per_day=2)
+    ]
+    created = client.post("/transactions/batch", json=payload).json()["created"]
+    single = client.post("/transactions/", json={**payload[0], "amount": -12.5}).json()
+    before = aggregate_rows(user_id)
+    assert before[("category", payload[0]["category"])][1] == sum(
+        t["category"] == payload[0]["category"] for t in payload
+    ) + 1
+
+    for transaction in created[:5] + [single]:
+        assert client.delete(f"/transactions/{transaction['id']}").status_code == 200
+    incremental = aggregate_rows(user_id)
+    assert sum(count for (dimension, _), (_, count) in incremental.items()
+               if dimension == "category") == len(payload) - 5
+
+    with SessionLocal() as db:
+        assert crud.verify_spending_aggregates(db, user_id) == []
+        crud.rebuild_spending_aggregates(db, user_id=user_id)
+    rebuilt = aggregate_rows(user_id)
+    # Buckets emptied by the deletes may linger with a zero count
+    assert {key: value for key, value in incremental.items() if value[1]} == rebuilt
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/transactions/2", {}),
+    ("/transactions/2", {"category": "Dining"}),
+    ("/transactions/", {}),
+])
+def test_cursor_pages_cover_every_row_once(client, path, params):
+    full = client.get(path, params={**params, "limit": 5000})
+    assert "X-Next-Cursor" not in full.headers
+    expected = [t["id"] for t in full.json()]
+    assert len(expected) > 37
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        page_params = {**params, "limit": 37}
+        if cursor:
+            page_params["cursor"] = cursor
+        response = client.get(path, params=page_params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 37
+        ids.extend(t["id"] for t in page)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert ids == expected
+    assert pages == -(-len(expected) // 37)
+
+
+def test_skip_with_cursor_is_rejected(client):
+    cursor = client.get("/transactions/", params={"limit": 10}).headers["X-Next-Cursor"]
+    response = client.get("/transactions/", params={"limit": 10, "cursor": cursor, "skip": 5})
+    assert response.status_code == 400
+    assert client.get("/transactions/", params={"limit": 10, "skip": 5}).status_code == 200
+
+
+def seed_recent_user(user_id, days=200):
+    """A user whose history ends today, as forecasts only look back a year"""
+    start = datetime.combine(datetime.now().date() - timedelta(days=days), datetime.min.time())
+    with SessionLocal() as db:
+        crud.create_transactions(db, make_transactions(user_id, days=days, per_day=2, start=start))
+
+
+def forecast(client, user_id, **kwargs):
+    response = client.post("/forecast/", json={
+        "user_id": user_id, "model_type": "linear", "days": 14, "chart_format": "compact", **kwargs
+    })
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_forecast_cache_hit_and_invalidation(client):
+    user_id = 30
+    seed_recent_user(user_id)
+    fits = main.fit_stats["fits"]
+
+    first = forecast(client, user_id)
+    assert first.headers["X-Forecast-Cache"] == "miss"
+    second = forecast(client, user_id)
+    assert second.headers["X-Forecast-Cache"] == "hit"
+    assert second.json()["forecast"] == first.json()["forecast"]
+    # Different horizon is a different fit
+    assert forecast(client, user_id, days=7).headers["X-Forecast-Cache"] == "miss"
+    assert main.fit_stats["fits"] == fits + 2
+
+    # A write for the user invalidates their fits, other users keep theirs
+    seed_recent_user(31)
+    forecast(client, 31)
+    client.post("/transactions/", json={
+        "user_id": user_id, "date": datetime.now().isoformat(), "description": "new",
+        "amount": -20.0, "category": "Dining", "account": "Checking",
+    })
+    assert forecast(client, user_id).headers["X-Forecast-Cache"] == "miss"
+    assert forecast(client, 31).headers["X-Forecast-Cache"] == "hit"
+
+
+def test_compact_forecast_charts(client):
+    user_id = 38
+    seed_recent_user(user_id)
+    body = forecast(client, user_id).json()
+    plot = body["visualizations"]["forecast_plot"]
+    assert plot["type"] == "forecast"
+    assert plot["columns"]["ds"] == [row["ds"][:10] for row in body["forecast"]]
+    assert plot["columns"]["yhat"] == pytest.approx([row["yhat"] for row in body["forecast"]])
+
+    # Same cached fit, float32 typed arrays instead of lists
+    binary = forecast(client, user_id, binary_charts=True)
+    assert binary.headers["X-Forecast-Cache"] == "hit"
+    encoded = binary.json()["visualizations"]["forecast_plot"]["columns"]["yhat"]
+    decoded = np.frombuffer(base64.b64decode(encoded["bdata"]), dtype=encoded["dtype"])
+    np.testing.assert_allclose(decoded, plot["columns"]["yhat"], rtol=1e-6)
+
+    plotly = forecast(client, user_id, chart_format="plotly").json()["visualizations"]["forecast_plot"]
+    assert "data" in plotly and "layout" in plotly
+
+
+def test_forecast_rejected_while_pool_is_full(client, monkeypatch):
+    user_id = 35
+    seed_recent_user(user_id)
+    executor = ForecastExecutor(max_workers=0, max_queue=0, retry_after=7)
+    monkeypatch.setattr(main, "forecast_executor", executor)
+    release = threading.Event()
+    blocked = executor.submit(release.wait, 10)
+    try:
+        response = client.post("/forecast/", json={"user_id": user_id, "model_type": "linear", "days": 14})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        blocked.result(timeout=10)
+    assert forecast(client, user_id).headers["X-Forecast-Cache"] == "miss"
+    executor.shutdown()
+
+
+def test_forecast_jobs_deduplicate_and_poll(client):
+    user_id = 32
+    seed_recent_user(user_id)
+    # Drive the queue by hand so both submissions land while the first is queued
+    main.forecast_jobs.stop(timeout=5)
+    try:
+        request = {"user_id": user_id, "model_type": "linear", "days": 14, "chart_format": "compact"}
+        first = client.post("/forecast/jobs", json=request)
+        second = client.post("/forecast/jobs", json=request)
+        other = client.post("/forecast/jobs", json={**request, "days": 7})
+        assert first.status_code == 202
+        assert second.json()["job_id"] == first.json()["job_id"]
+        assert other.json()["job_id"] != first.json()["job_id"]
+
+        job_url = f"/forecast/jobs/{first.json()['job_id']}"
+        assert client.get(job_url).json()["status"] == "queued"
+        assert main.forecast_jobs.run_pending() == 2
+        job = client.get(job_url).json()
+        assert job["status"] == "succeeded"
+        assert len(job["result"]["forecast"]) == 14
+        assert client.get("/forecast/jobs/unknown").status_code == 404
+    finally:
+        main.forecast_jobs.start(num_workers=2)
+
+
+def test_forecast_job_caches_under_the_version_it_fitted(client):
+    user_id = 42
+    seed_recent_user(user_id)
+    main.forecast_jobs.stop(timeout=5)
+    try:
+        request = {"user_id": user_id, "model_type": "linear", "days": 14, "chart_format": "compact"}
+        job_id = client.post("/forecast/jobs", json=request).json()["job_id"]
+        # A write lands while the job is still queued
+        client.post("/transactions/", json={
+            "user_id": user_id, "date": datetime.now().isoformat(), "description": "late",
+            "amount": -500.0, "category": "Dining", "account": "Checking",
+        })
+        assert main.forecast_jobs.run_pending() == 1
+    finally:
+        main.forecast_jobs.start(num_workers=2)
+
+    job = client.get(f"/forecast/jobs/{job_id}").json()
+    assert job["status"] == "succeeded"
+    # The job's fit already includes the write, so the current key is warm
+    response = forecast(client, user_id)
+    assert response.headers["X-Forecast-Cache"] == "hit"
+    assert response.json()["forecast"] == job["result"]["forecast"]
+
+
+def test_batch_forecast_skips_short_histories(client):
+    seed_recent_user(36)
+    seed_recent_user(37, days=50)
+    response = client.post("/forecast/batch", json={"user_ids": [36, 37, 1], "days": 14})
+    assert response.status_code == 200
+    body = response.json()
+    assert [f["user_id"] for f in body["forecasts"]] == [36]
+    assert len(body["forecasts"][0]["forecast"]) == 14
+    assert body["skipped"]["37"].startswith("needs at least 74 days")
+    # USERS' history is older than the year forecasts look back over
+    assert body["skipped"]["1"] == "no transactions in the last 365 days"
+
+
+@pytest.mark.parametrize("path", ["/forecast/", "/forecast/batch"])
+@pytest.mark.parametrize("days", [0, -5, schemas.MAX_FORECAST_DAYS + 1])
+def test_forecast_horizon_is_validated(client, path, days):
+    response = client.post(path, json={"user_id": 36, "user_ids": [36], "days": days})
+    assert response.status_code == 422
+
+
+def test_batch_reports_item_errors_and_keeps_input_order(client):
+    user_id = 33
+    good = [
+        {"user_id": user_id, "date": f"2024-05-{day:02d}T12:00:00", "description": f"item {day}",
+         "amount": -float(day), "category": "Dining", "account": "Checking"}
+        for day in (9, 3, 27, 14, 1)
+    ]
+    items = [good[0], {"user_id": user_id, "amount": "lots"}, good[1], good[2], "not an object",
+             {**good[0], "date": "yesterday"}, good[3], good[4]]
+    response = client.post("/transactions/batch", json=items)
+    assert response.status_code == 200
+    body = response.json()
+
+    assert [error["index"] for error in body["errors"]] == [1, 4, 5]
+    assert "amount" in body["errors"][0]["error"]
+    assert "date" in body["errors"][2]["error"]
+    # Created rows come back in input order, not date or id order
+    created = body["created"]
+    assert [t["description"] for t in created] == [t["description"] for t in good]
+    assert all(isinstance(t["id"], int) for t in created)
+    assert len({t["id"] for t in created}) == len(good)
+    stored = {t["id"]: t for t in client.get(f"/transactions/{user_id}").json()}
+    assert [stored[t["id"]]["amount"] for t in created] == [t["amount"] for t in good]
+
+
+def test_batch_limits(client):
+    assert client.post("/transactions/batch", json=[]).json() == {"created": [], "errors": []}
+    too_many = [{}] * (main.MAX_BATCH_SIZE + 1)
+    assert client.post("/transactions/batch", json=too_many).status_code == 413
+
+
+@pytest.fixture
+def use_analysis_cache(monkeypatch):
+    """Call with "fakeredis" to serve the analysis cache from RedisCache, as with ANALYSIS_CACHE_URL=redis://"""
+    def use(backend):
+        if backend == "fakeredis":
+            fakeredis = pytest.importorskip("fakeredis")
+            cache = RedisCache(fakeredis.FakeRedis(), prefix="analysis-test", ttl=60)
+            monkeypatch.setattr(main, "analysis_cache", cache)
+            monkeypatch.setattr(crud, "_write_listeners", [*crud._write_listeners, cache.invalidate])
+    return use
+
+
+@pytest.mark.parametrize("backend, user_id", [("memory", 34), ("fakeredis", 39)])
+def test_analysis_etag_and_version_bump(client, use_analysis_cache, backend, user_id):
+    use_analysis_cache(backend)
+    seed_recent_user(user_id, days=40)
+    path = f"/transactions/analysis/{user_id}"
+    params = {"period": "monthly", "chart_format": "compact"}
+
+    first = client.get(path, params=params)
+    etag = first.headers["ETag"]
+    assert first.headers["X-Analysis-Cache"] == "miss"
+    assert client.get(path, params=params).headers["X-Analysis-Cache"] == "hit"
+
+    unchanged = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+    assert client.get(path, params=params, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    # Each representation has its own tag
+    plotly = client.get(path, params={"period": "monthly"}, headers={"If-None-Match": etag})
+    assert plotly.status_code == 200 and plotly.headers["ETag"] != etag
+
+    invalidations = main.analysis_cache.stats()["invalidations"]
+    created = client.post("/transactions/", json={
+        "user_id": user_id, "date": datetime.now().isoformat(), "description": "new",
+        "amount": -99.0, "category": "Dining", "account": "Checking",
+    }).json()
+    # The write drops the user's cached payloads, not just their ETag
+    assert main.analysis_cache.stats()["invalidations"] == invalidations + 2
+    changed = client.get(path, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.headers["X-Analysis-Cache"] == "miss"
+    assert changed.json() != first.json()
+
+    etag = changed.headers["ETag"]
+    client.delete(f"/transactions/{created['id']}")
+    assert client.get(path, params=params, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from app import backtesting
+
+
+def daily_history(days=400, seed=0):
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range("2023-01-01", periods=days, freq="D")
+    y = -50 + 10 * np.sin(np.arange(days) * 2 * np.pi / 7) + rng.normal(0, 5, days)
+    return pd.DataFrame({"ds": ds, "y": y})
+
+
+def test_rolling_origins_cutoffs():
+    days = pd.date_range("2023-01-01", periods=400, freq="D").to_series()
+    cutoffs = backtesting.rolling_origins(days, initial=180, horizon=30, step=60)
+
+    first = pd.Timestamp("2023-01-01")
+    assert cutoffs == [first + pd.Timedelta(days=d) for d in (180, 240, 300, 360)]
+    # Every fold leaves a full horizon before the last day
+    assert cutoffs[-1] + pd.Timedelta(days=30) <= days.iloc[-1]
+    assert backtesting.rolling_origins(days, initial=390, horizon=30, step=30) == []
+    assert backtesting.rolling_origins(pd.Series([], dtype="datetime64[ns]"), 180, 30, 30) == []
+
+
+def test_backtest_fold_and_summary_shape():
+    report = backtesting.run_backtest(
+        {1: daily_history(), 2: daily_history(seed=1)}, ["linear"],
+        initial=180, horizon=30, step=60,
+    )
+
+    assert [r["user_id"] for r in report["results"]] == [1, 2]
+    for result in report["results"]:
+        assert len(result["folds"]) == 4
+        for fold in result["folds"]:
+            assert fold["points"] == 30
+            assert fold["fit_seconds"] > 0
+            assert fold["mae"] is not None and fold["rmse"] >= fold["mae"]
+            assert fold["peak_python_mb"] > 0
+            assert "peak_rss_delta_mb" in fold
+
+    summary = report["summary"]["linear"]
+    assert summary["folds"] == 8
+    assert summary["failed_folds"] == 0
+    assert summary["fit_seconds_total"] >= summary["fit_seconds_mean"]
+    assert summary["peak_python_mb_max"] > 0
+
+
+def test_backtest_without_memory_pass():
+    report = backtesting.run_backtest(
+        {1: daily_history()}, ["linear"], initial=180, horizon=30, step=60,
+        measure_memory=False,
+    )
+    fold = report["results"][0]["folds"][0]
+    assert "peak_python_mb" not in fold
+    assert report["summary"]["linear"]["peak_python_mb_max"] is None
@@ -0,0 +1,92 @@
+import pytest
+
+from app import cache
+from app.cache import LRUCache, RedisCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture(params=["memory", "redis"])
+def any_cache(request):
+    if request.param == "memory":
+        return LRUCache(max_size=16)
+    return RedisCache(fakeredis.FakeRedis(), prefix="test", ttl=60)
+
+
+def test_get_set_and_stats(any_cache):
+    assert any_cache.get(("forecast", 1)) is None
+    assert any_cache.get(("forecast", 1), default="missing") == "missing"
+    any_cache.set(("forecast", 1), {"yhat": [1.5, 2.5]}, tags=[1])
+    assert any_cache.get(("forecast", 1)) == {"yhat": [1.5, 2.5]}
+
+    stats = any_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_invalidate_by_tag(any_cache):
+    any_cache.set(("analysis", 1, "monthly"), {"v": 1}, tags=[1])
+    any_cache.set(("analysis", 1, "weekly"), {"v": 2}, tags=[1])
+    any_cache.set(("analysis", 2, "monthly"), {"v": 3}, tags=[2])
+    any_cache.set(("untagged",), {"v": 4})
+
+    assert any_cache.invalidate(1) == 2
+    assert any_cache.get(("analysis", 1, "monthly")) is None
+    assert any_cache.get(("analysis", 1, "weekly")) is None
+    assert any_cache.get(("analysis", 2, "monthly")) == {"v": 3}
+    assert any_cache.get(("untagged",)) == {"v": 4}
+    assert any_cache.invalidate(1) == 0
+    assert any_cache.stats()["invalidations"] == 2
+
+    any_cache.clear()
+    assert any_cache.get(("analysis", 2, "monthly")) is None
+
+
+def test_redis_entries_and_tags_expire():
+    client = fakeredis.FakeRedis()
+    redis_cache = RedisCache(client, prefix="test", ttl=60)
+    redis_cache.set(("analysis", 1), {"v": 1}, tags=[1])
+    assert 0 < client.ttl("test:analysis:1") <= 60
+    assert 0 < client.ttl("test:tag:1") <= 60
+    assert client.smembers("test:tag:1") == {b"test:analysis:1"}
+
+    # Another worker sharing the server sees the entry and its invalidation
+    other = RedisCache(client, prefix="test", ttl=60)
+    assert other.get(("analysis", 1)) == {"v": 1}
+    assert other.invalidate(1) == 1
+    assert redis_cache.get(("analysis", 1)) is None
+    assert not client.exists("test:tag:1")
+
+    # Without a TTL entries persist until invalidated
+    RedisCache(client, prefix="keep", ttl=None).set("k", 1, tags=["t"])
+    assert client.ttl("keep:k") == -1
+
+
+def test_clear_keeps_other_prefixes():
+    client = fakeredis.FakeRedis()
+    first, second = RedisCache(client, prefix="first"), RedisCache(client, prefix="second")
+    first.set("k", 1, tags=[1])
+    second.set("k", 2, tags=[1])
+    first.clear()
+    assert first.get("k") is None
+    assert second.get("k") == 2
+
+
+def test_cache_from_env(monkeypatch):
+    assert isinstance(cache.cache_from_env("TEST_CACHE"), LRUCache)
+    monkeypatch.setenv("TEST_CACHE_SIZE", "7")
+    assert cache.cache_from_env("TEST_CACHE").max_size == 7
+
+    monkeypatch.setenv("TEST_CACHE_URL", "fakeredis://")
+    monkeypatch.setenv("TEST_CACHE_TTL", "30")
+    fake = cache.cache_from_env("TEST_CACHE")
+    assert isinstance(fake, RedisCache)
+    assert (fake.prefix, fake.ttl) == ("test_cache", 30)
+
+    # redis-py connects lazily, so no server is needed to build the client
+    pytest.importorskip("redis")
+    monkeypatch.setenv("TEST_CACHE_URL", "redis://cache.internal:6379/2")
+    redis_cache = cache.cache_from_env("TEST_CACHE")
+    assert isinstance(redis_cache, RedisCache)
+    assert redis_cache.client.connection_pool.connection_kwargs["host"] == "cache.internal"
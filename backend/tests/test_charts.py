@@ -0,0 +1,90 @@
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import charts, visualization
+
+FRONTEND_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "frontend", "app.py")
+
+
+@pytest.fixture(scope="module")
+def decode_column():
+    """The dashboard's decoder, so both ends of the format are tested together"""
+    pytest.importorskip("dash")
+    sys.path.insert(0, os.path.dirname(FRONTEND_APP))
+    try:
+        spec = importlib.util.spec_from_file_location("dashboard_app", FRONTEND_APP)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.dirname(FRONTEND_APP))
+    return module.decode_column
+
+
+def roundtrip(value):
+    return json.loads(json.dumps(value))
+
+
+def test_binary_columns_decode_to_float32(decode_column):
+    values = np.array([-12.5, 0.0, np.nan, 1234.56789, 1e6])
+    encoded = roundtrip(charts.encode_column(values, binary=True))
+    assert encoded["dtype"] == "f4"
+    assert "shape" not in encoded
+    decoded = decode_column(encoded)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, values, rtol=1e-6, equal_nan=True)
+
+    grid = np.arange(21).reshape(7, 3)
+    encoded = roundtrip(charts.encode_column(grid, binary=True))
+    assert encoded["shape"] == [7, 3]
+    np.testing.assert_array_equal(decode_column(encoded), grid)
+
+    # Plain lists pass through the decoder untouched
+    assert decode_column([1, 2]) == [1, 2]
+
+
+def test_plain_columns():
+    assert charts.encode_column(np.array([1.5, np.nan, -2.0])) == [1.5, None, -2.0]
+    assert charts.encode_column(pd.Series([3, 4], dtype="int64")) == [3, 4]
+    assert charts.encode_column(pd.Series(["Dining", None, np.nan], dtype=object)) == ["Dining", None, None]
+    assert charts.encode_column(pd.Series(["Rent"], dtype="category")) == ["Rent"]
+
+
+def test_dates_become_iso_strings():
+    days = pd.Series(pd.date_range("2024-02-28", periods=3, freq="D"))
+    assert charts.encode_column(days) == ["2024-02-28", "2024-02-29", "2024-03-01"]
+    assert charts.encode_column(days, binary=True) == ["2024-02-28", "2024-02-29", "2024-03-01"]
+    stamps = pd.DatetimeIndex(["2024-01-01 00:00", "2024-01-01 13:45:10"])
+    assert charts.encode_column(stamps) == ["2024-01-01T00:00:00", "2024-01-01T13:45:10"]
+
+
+def test_chart_spec():
+    spec = charts.chart("bar", {"x": ["a", "b"], "y": np.array([1.0, 2.0])}, title="T", x_title="X")
+    assert spec == {"type": "bar", "title": "T", "x_title": "X", "columns": {"x": ["a", "b"], "y": [1.0, 2.0]}}
+
+
+def test_compact_forecast_charts(decode_column):
+    forecast_df = pd.DataFrame({
+        "ds": pd.date_range("2024-03-01", periods=5, freq="D"),
+        "yhat": [-10.0, -20.5, np.nan, 5.25, 0.0],
+        "yhat_lower": [-15.0] * 5,
+        "yhat_upper": [-5.0] * 5,
+    })
+    components_df = pd.DataFrame({"ds": forecast_df["ds"], "trend": [1.0, 2.0, 3.0, 4.0, 5.0]})
+
+    result = roundtrip(visualization.compact_forecast_charts(forecast_df, components_df, binary=True))
+    plot = result["forecast_plot"]
+    assert plot["type"] == "forecast"
+    assert plot["columns"]["ds"][0] == "2024-03-01"
+    np.testing.assert_allclose(decode_column(plot["columns"]["yhat"]), forecast_df["yhat"], equal_nan=True)
+    assert set(plot["columns"]) == {"ds", "yhat", "yhat_lower", "yhat_upper"}
+    assert decode_column(result["components_plot"]["columns"]["trend"]).tolist() == [1, 2, 3, 4, 5]
+
+    plain = visualization.compact_forecast_charts(forecast_df[["ds", "yhat"]], None)
+    assert plain["components_plot"] is None
+    assert plain["forecast_plot"]["columns"]["yhat"] == [-10.0, -20.5, None, 5.25, 0.0]
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import exc, text
+
+from app import database
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+POOL_SCRIPT = """
+import json
+from app.database import engine, pool_stats
+pool = engine.pool
+print(json.dumps({
+    "size": pool.size(), "max_overflow": pool._max_overflow, "timeout": pool.timeout(),
+    "recycle": pool._recycle, "pre_ping": pool._pre_ping, "stats": pool_stats(engine),
+}))
+"""
+
+
+def test_pool_settings_from_env(tmp_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'pool.db'}",
+        "DB_POOL_SIZE": "3", "DB_MAX_OVERFLOW": "2", "DB_POOL_TIMEOUT": "1.5",
+        "DB_POOL_RECYCLE": "60", "DB_POOL_PRE_PING": "false",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", POOL_SCRIPT], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    settings = json.loads(result.stdout.strip().splitlines()[-1])
+    assert settings["size"] == 3
+    assert settings["max_overflow"] == 2
+    assert settings["timeout"] == 1.5
+    assert settings["recycle"] == 60
+    assert settings["pre_ping"] is False
+    assert settings["stats"]["pool"] == "TimedQueuePool"
+    assert settings["stats"]["max_overflow"] == 2
+
+
+@pytest.fixture
+def small_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "POOL_SIZE", 1)
+    monkeypatch.setattr(database, "MAX_OVERFLOW", 1)
+    monkeypatch.setattr(database, "POOL_TIMEOUT", 0.2)
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'small.db'}", "small")
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_and_timeouts_are_recorded(small_engine):
+    stats = database.pool_stats(small_engine)
+    assert stats["checkouts"] == 0 and stats["checked_out"] == 0
+
+    first, second = small_engine.connect(), small_engine.connect()
+    first.execute(text("select 1"))
+    stats = database.pool_stats(small_engine)
+    assert stats["checkouts"] == 2
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["saturation"] == 1.0
+
+    # Size + overflow are in use, so the next checkout waits out the timeout
+    with pytest.raises(exc.TimeoutError):
+        small_engine.connect()
+    stats = database.pool_stats(small_engine)
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.2
+    assert stats["wait_seconds_total"] >= stats["wait_seconds_max"]
+
+    first.close()
+    second.close()
+    stats = database.pool_stats(small_engine)
+    assert stats["checked_out"] == 0
+    assert stats["checked_in"] >= 1
+
+
+def test_in_memory_sqlite_keeps_the_default_pool():
+    engine = database.make_engine("sqlite://", "memory")
+    assert engine.pool_metrics is None
+    assert database.pool_stats(engine) == {"pool": type(engine.pool).__name__}
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from app.executor import ExecutorBusy, ForecastExecutor
+
+
+def blocked_job(release):
+    assert release.wait(10)
+    return "done"
+
+
+def failing_job():
+    raise RuntimeError("fit failed")
+
+
+@pytest.fixture
+def executor():
+    executor = ForecastExecutor(max_workers=0, max_queue=1, retry_after=7)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def test_full_queue_is_rejected(executor):
+    release = threading.Event()
+    # One running on the background thread, one waiting behind it
+    running = [executor.submit(blocked_job, release) for _ in range(2)]
+    assert executor.stats()["in_flight"] == 2
+
+    with pytest.raises(ExecutorBusy) as busy:
+        executor.submit(blocked_job, release)
+    assert busy.value.retry_after == 7
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    assert [future.result(timeout=10) for future in running] == ["done", "done"]
+    # Finished jobs hand their slots back
+    assert executor.submit(blocked_job, release).result(timeout=10) == "done"
+    stats = executor.stats()
+    assert stats["in_flight"] == 0
+    assert stats["submitted"] == 3
+
+
+def test_failed_job_releases_its_slot(executor):
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            executor.submit(failing_job).result(timeout=10)
+    assert executor.stats()["in_flight"] == 0
+    assert executor.stats()["rejected"] == 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from app import forecasting
+
+
+def daily_history(days, seed, start="2024-01-01", gap=None):
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range(start, periods=days, freq="D")
+    if gap is not None:
+        ds = ds.delete(slice(*gap))
+    t = np.arange(len(ds))
+    y = -40 + 0.05 * t + 15 * np.sin(t * 2 * np.pi / 7) + rng.normal(0, 8, len(ds))
+    return pd.DataFrame({"ds": ds, "y": y})
+
+
+HISTORIES = {
+    1: daily_history(365, seed=1),
+    2: daily_history(150, seed=2, start="2024-06-01"),
+    # Missing days: lags are row shifts, days_since_start counts calendar days
+    3: daily_history(200, seed=3, gap=(50, 60)),
+}
+
+
+def test_batch_matches_single_user_fits():
+    long_df = pd.concat([h.assign(user_id=u) for u, h in HISTORIES.items()], ignore_index=True)
+    forecast_df, metrics, skipped = forecasting.batch_linear_regression_forecast(long_df, days=21)
+    assert skipped == {}
+
+    for user_id, history in HISTORIES.items():
+        expected, model = forecasting.linear_regression_forecast(history, days=21)
+        got = forecast_df[forecast_df["user_id"] == user_id]
+        assert got["ds"].tolist() == expected["ds"].tolist()
+        np.testing.assert_allclose(got["yhat"], expected["yhat"], rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(metrics[user_id]["mae"], model.metrics["mae"], rtol=1e-6)
+        np.testing.assert_allclose(metrics[user_id]["rmse"], model.metrics["rmse"], rtol=1e-6)
+        np.testing.assert_allclose(
+            metrics[user_id]["model_params"]["coefficients"], model.coef_, rtol=1e-6, atol=1e-9
+        )
+
+
+def test_short_history_is_skipped():
+    long_df = pd.concat([
+        HISTORIES[1].assign(user_id=1),
+        daily_history(80, seed=4).assign(user_id=4),
+    ], ignore_index=True)
+    forecast_df, metrics, skipped = forecasting.batch_linear_regression_forecast(long_df, days=30)
+    assert set(metrics) == {1}
+    assert set(forecast_df["user_id"]) == {1}
+    assert skipped == {4: "needs at least 90 days of history, has 80"}
+
+
+def test_future_days_count_from_the_first_observation():
+    history = HISTORIES[1]
+    forecast_df, model = forecasting.linear_regression_forecast(history, days=14)
+
+    # Rebuild the future features by hand: days_since_start is measured from
+    # the first day of history, not from the first row left after the lags
+    y = history["y"].iloc[30:].reset_index(drop=True)
+    features = pd.DataFrame({
+        "days_since_start": (forecast_df["ds"] - history["ds"].min()).dt.days.to_numpy(),
+        **{f"lag_{lag}": y.shift(lag).to_numpy()[-14:] for lag in (1, 7, 30)},
+    })
+    assert features["days_since_start"].tolist() == list(range(365, 379))
+    np.testing.assert_allclose(forecast_df["yhat"], model.predict(features))
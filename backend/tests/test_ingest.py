@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from app import crud, ingest, models
+from app.database import SessionLocal, engine
+
+USERS = (40, 41)
+
+
+@pytest.fixture
+def database():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    yield
+    models.Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def export(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = 350
+    df = pd.DataFrame({
+        "user_id": rng.choice(USERS, rows),
+        "date": pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 60 * 24 * 60, rows), unit="min"),
+        "description": "import",
+        "amount": rng.normal(-30, 20, rows).round(2),
+        "category": rng.choice(["Dining", "Groceries", "Income"], rows),
+        "account": "Checking",
+    })
+    path = tmp_path / "export.csv"
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+def transaction_count():
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(models.Transaction))
+
+
+def test_import_resumes_after_last_committed_chunk(database, export, monkeypatch):
+    path, df = export
+    write = ingest.write_transactions
+    calls = {"n": 0}
+
+    def crash_on_third_chunk(db, chunk):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("connection lost")
+        write(db, chunk)
+
+    monkeypatch.setattr(ingest, "write_transactions", crash_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        ingest.import_file(path, chunk_size=100)
+    with SessionLocal() as db:
+        checkpoint = db.get(models.ImportCheckpoint, ingest.source_key_for_path(path))
+        assert (checkpoint.rows_done, checkpoint.rows_imported, checkpoint.completed) == (200, 200, False)
+    assert transaction_count() == 200
+
+    monkeypatch.setattr(ingest, "write_transactions", write)
+    result = ingest.import_file(path, chunk_size=100)
+    assert result["resumed_from"] == 200
+    assert result["rows_read"] == 150
+    assert result["rows_imported"] == 350
+    assert transaction_count() == 350
+
+    again = ingest.import_file(path, chunk_size=100)
+    assert again["already_completed"]
+    assert transaction_count() == 350
+
+
+def test_import_builds_rollups_and_aggregates(database, export):
+    path, df = export
+    result = ingest.import_file(path, chunk_size=64)
+    assert result["rows_imported"] == len(df)
+
+    expected = (
+        df.assign(day=pd.to_datetime(df["date"]).dt.normalize())
+        .groupby(["user_id", "day", "category"])["amount"].agg(["sum", "count"])
+    )
+    with SessionLocal() as db:
+        for user_id in USERS:
+            rollups = crud.get_user_daily_rollups(db, user_id).set_index(["day", "category"])
+            want = expected.loc[user_id]
+            assert len(rollups) == len(want)
+            np.testing.assert_allclose(rollups.loc[want.index, "total"], want["sum"], atol=1e-6)
+            assert (rollups.loc[want.index, "count"].to_numpy() == want["count"].to_numpy()).all()
+            assert crud.verify_spending_aggregates(db, user_id) == []
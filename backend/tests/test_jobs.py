@@ -0,0 +1,63 @@
+import threading
+
+from app.jobs import FAILED, QUEUED, SUCCEEDED, JobQueue
+
+
+def test_identical_requests_share_one_job():
+    calls = []
+    jobs = JobQueue(lambda payload: calls.append(payload) or payload * 2)
+
+    first = jobs.submit("key", 21)
+    second = jobs.submit("key", 21)
+    other = jobs.submit("other", 1)
+    assert second is first
+    assert other is not first
+    assert jobs.get(first.id).status == QUEUED
+    assert jobs.stats()["deduplicated"] == 1
+
+    assert jobs.run_pending() == 2
+    assert calls == [21, 1]
+    polled = jobs.get(first.id).to_dict()
+    assert polled["status"] == SUCCEEDED
+    assert polled["result"] == 42
+    assert polled["started_at"] <= polled["finished_at"]
+
+    # Once finished, the same key starts a fresh job
+    again = jobs.submit("key", 21)
+    assert again is not first
+    assert jobs.run_pending() == 1
+
+
+def test_failed_job_reports_error_and_frees_key():
+    def runner(payload):
+        raise ValueError(f"bad payload {payload}")
+
+    jobs = JobQueue(runner)
+    job = jobs.submit("key", 1)
+    jobs.run_pending()
+    assert job.status == FAILED
+    assert job.error == "bad payload 1"
+    assert jobs.submit("key", 1) is not job
+
+
+def test_store_keeps_at_most_max_jobs_finished():
+    jobs = JobQueue(lambda payload: payload, max_jobs=3)
+    finished = []
+    for i in range(3):
+        finished.append(jobs.submit(i, i))
+        jobs.run_pending()
+    latest = jobs.submit("latest", 0)
+    assert jobs.get(finished[0].id) is None
+    assert jobs.get(latest.id) is latest
+
+
+def test_worker_threads_run_jobs():
+    done = threading.Event()
+    jobs = JobQueue(lambda payload: done.set() or payload)
+    jobs.start(num_workers=2)
+    try:
+        job = jobs.submit("key", "value")
+        assert done.wait(5)
+    finally:
+        jobs.stop(timeout=5)
+    assert job.status == SUCCEEDED and job.result == "value"
@@ -0,0 +1,125 @@
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.metrics import MetricsMiddleware, collect_stages, server_timing, stage_timer
+from app.profiling import RequestProfiler
+
+
+def make_app(profiler=None):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, profiler=profiler)
+
+    @app.get("/metrics-test/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/metrics-test/staged")
+    def staged():
+        with collect_stages() as stages:
+            with stage_timer("metrics-test-fetch"):
+                time.sleep(0.01)
+            with stage_timer("metrics-test-fit"):
+                time.sleep(0.02)
+        return JSONResponse(
+            {"ok": True}, headers={"Server-Timing": server_timing(stages)}
+        )
+
+    @app.get("/metrics-test/busy")
+    def busy():
+        end = time.perf_counter() + 0.1
+        while time.perf_counter() < end:
+            sum(range(1000))
+        return {"ok": True}
+
+    return app
+
+
+def sample_lines(name):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+
+def test_request_histogram_by_route_template():
+    client = TestClient(make_app())
+    for item_id in (1, 2, 3):
+        assert client.get(f"/metrics-test/items/{item_id}").status_code == 200
+    assert client.get("/metrics-test/items/oops").status_code == 422
+    assert client.get("/metrics-test/nowhere/1").status_code == 404
+
+    text = metrics.render()
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    labels = 'method="GET",route="/metrics-test/items/{item_id}",status="200"'
+    assert f"http_request_duration_seconds_count{{{labels}}} 3" in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert any(line.startswith(f"http_request_duration_seconds_sum{{{labels}}}") for line in text.splitlines())
+    assert 'route="/metrics-test/items/{item_id}",status="422"' in text
+    # Unmatched paths share one series instead of one per path
+    assert 'route="unmatched",status="404"' in text
+    assert "/metrics-test/nowhere" not in text
+    assert "http_requests_in_progress 0" in text
+
+
+def test_counter_and_histogram_exposition():
+    registry = metrics.Registry()
+    counter = registry.register(metrics.Counter("jobs", "Jobs run", ("kind",)))
+    histogram = registry.register(metrics.Histogram("wait_seconds", "Wait", buckets=(0.1, 1.0)))
+    counter.inc("fit")
+    counter.inc("fit", amount=2)
+    counter.inc('we"ird')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs Jobs run",
+        "# TYPE jobs counter",
+        'jobs_total{kind="fit"} 3',
+        'jobs_total{kind="we\\"ird"} 1',
+        "# HELP wait_seconds Wait",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{le="0.1"} 1',
+        'wait_seconds_bucket{le="1"} 2',
+        'wait_seconds_bucket{le="+Inf"} 3',
+        "wait_seconds_sum 5.55",
+        "wait_seconds_count 3",
+    ]
+
+
+def test_server_timing_from_collected_stages():
+    before = sample_lines('stage_duration_seconds_count{stage="metrics-test-fit"}')
+    response = TestClient(make_app()).get("/metrics-test/staged")
+    timings = dict(
+        part.split(";dur=") for part in response.headers["Server-Timing"].split(", ")
+    )
+    assert list(timings) == ["metrics-test-fetch", "metrics-test-fit"]
+    assert float(timings["metrics-test-fetch"]) >= 10
+    assert float(timings["metrics-test-fit"]) >= 20
+    # Flushed to the stage histogram when the collector closes
+    assert before == []
+    assert sample_lines('stage_duration_seconds_count{stage="metrics-test-fit"}') == [
+        'stage_duration_seconds_count{stage="metrics-test-fit"} 1'
+    ]
+
+
+def test_profiled_request_writes_folded_stacks(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), interval_ms=1, token="secret")
+    client = TestClient(make_app(profiler))
+
+    assert "X-Profile-File" not in client.get("/metrics-test/busy").headers
+    wrong = client.get("/metrics-test/busy", headers={"X-Debug-Profile": "guess"})
+    assert "X-Profile-File" not in wrong.headers
+
+    response = client.get("/metrics-test/busy", headers={"X-Debug-Profile": "secret"})
+    path = response.headers["X-Profile-File"]
+    assert os.path.dirname(path) == str(tmp_path)
+    assert path.endswith("-get-metrics-test-busy.folded")
+    lines = open(path).read().splitlines()
+    assert lines
+    # "thread;outer;...;inner count", with the endpoint on some stack
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("busy (" in line for line in lines)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from app import preprocessing
+
+
+def transactions(rows, seed=0, categories=("Dining", "Groceries"), start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_id": rng.integers(1, 4, rows),
+        "date": pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 10 ** 6, rows), unit="s"),
+        "description": [f"shop {i}" for i in range(rows)],
+        "amount": rng.normal(-30, 20, rows).round(2),
+        "category": rng.choice(list(categories), rows),
+        "account": "Checking",
+    })
+
+
+def test_duplicate_filter_within_and_across_chunks():
+    df = transactions(100)
+    first = pd.concat([df.iloc[:60], df.iloc[[0, 5]]])
+    second = pd.concat([df.iloc[50:], df.iloc[[70]]])
+    dedupe = preprocessing.DuplicateFilter()
+
+    new, dups = dedupe(first)
+    assert len(new) == 60 and list(dups.index) == [0, 5]
+    new, dups = dedupe(second)
+    # Rows 50-59 were seen in the first chunk, row 70 repeats within this one
+    assert list(new.index) == list(range(60, 100))
+    assert sorted(dups.index) == list(range(50, 60)) + [70]
+    assert len(dedupe.seen) == 100
+
+    # A changed amount is a different transaction
+    changed = df.iloc[[1]].assign(amount=df["amount"].iloc[1] + 0.01)
+    assert len(dedupe(changed)[0]) == 1
+
+
+def test_preprocess_chunks_rejects_duplicates():
+    df = transactions(50)
+    raw = pd.concat([df, df.iloc[:10]], ignore_index=True)
+    frame, rejected = preprocessing.preprocess_transactions(raw, chunk_size=20)
+    assert len(frame) == 50
+    assert rejected == 10
+
+
+def test_concat_compact_unions_categories():
+    parts = [
+        preprocessing.compact_transactions(transactions(30, seed=1, categories=("Dining",))),
+        preprocessing.compact_transactions(transactions(30, seed=2, categories=("Groceries", "Income"))),
+        # Repeated descriptions, so this chunk's description is categorical too
+        preprocessing.compact_transactions(
+            transactions(30, seed=3, categories=("Rent",)).assign(description="rent")
+        ),
+    ]
+    assert not isinstance(parts[0]["description"].dtype, pd.CategoricalDtype)
+    assert isinstance(parts[2]["description"].dtype, pd.CategoricalDtype)
+
+    combined = preprocessing.concat_compact(parts)
+    assert len(combined) == 90
+    assert isinstance(combined["category"].dtype, pd.CategoricalDtype)
+    assert set(combined["category"].cat.categories) == {"Dining", "Groceries", "Income", "Rent"}
+    expected = pd.concat([part["category"].astype(str) for part in parts], ignore_index=True)
+    assert combined["category"].astype(str).tolist() == expected.tolist()
+    assert combined["description"].astype(str).tolist()[-1] == "rent"
+    assert combined["amount"].dtype == np.float32
+
+
+def test_concat_compact_with_all_null_chunk():
+    full = preprocessing.compact_transactions(transactions(10))
+    empty_account = preprocessing.compact_transactions(transactions(5).assign(account=None))
+    combined = preprocessing.concat_compact([full, empty_account])
+    assert combined["account"].isna().sum() == 5
+    assert combined["account"].iloc[0] == "Checking"
+
+
+def test_concat_compact_of_nothing():
+    assert list(preprocessing.concat_compact([]).columns) == preprocessing.TRANSACTION_COLUMNS
@@ -0,0 +1,142 @@
+"""EXPLAIN every crud read against a seeded database and fail on table scans.
+
+Each crud call is run for real while the SQL it sends is captured; the
+captured statements are then EXPLAINed with the same parameters. On
+PostgreSQL sequential scans are disabled for the session so the planner
+reports whether a usable index exists at all rather than what is cheapest
+on a small table.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import re
+
+import numpy as np
+import pytest
+from sqlalchemy import event, text
+
+from app import crud, models, schemas
+from app.database import SessionLocal, engine
+
+USERS = 20
+ROWS_PER_USER = 400
+CATEGORIES = ["Groceries", "Dining", "Rent/Mortgage", "Utilities", "Income"]
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(0)
+    start = datetime(2023, 1, 1)
+    transactions = [
+        schemas.TransactionCreate(
+            user_id=user_id,
+            date=start + timedelta(minutes=int(minutes)),
+            description="seed",
+            amount=round(float(amount), 2),
+            category=CATEGORIES[int(category)],
+            account="Checking",
+        )
+        for user_id in range(1, USERS + 1)
+        for minutes, amount, category in zip(
+            np.sort(rng.integers(0, 2 * 365 * 24 * 60, size=ROWS_PER_USER)),
+            rng.normal(-40, 30, size=ROWS_PER_USER),
+            rng.integers(0, len(CATEGORIES), size=ROWS_PER_USER),
+        )
+    ]
+    with SessionLocal() as db:
+        crud.create_transactions(db, transactions)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    yield
+    models.Base.metadata.drop_all(bind=engine)
+
+
+@contextmanager
+def captured_selects():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def explain(statement, parameters):
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+            return [row[0] for row in rows]
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    if engine.dialect.name == "postgresql":
+        return [line for line in plan if "Seq Scan" in line]
+    # "SCAN t USING [COVERING] INDEX" walks an index in order; a bare
+    # "SCAN t" reads the whole table
+    return [line for line in plan if re.match(r"SCAN \w+$", line.strip())]
+
+
+QUERIES = {
+    "get_transactions": lambda db: crud.get_transactions(db, limit=50),
+    "get_transactions_user": lambda db: crud.get_transactions(
+        db, user_id=3, start_date="2023-03-01", end_date="2023-06-30", limit=50
+    ),
+    "get_transactions_user_category": lambda db: crud.get_transactions(
+        db, user_id=3, category="Dining", limit=50
+    ),
+    "get_transactions_category": lambda db: crud.get_transactions(db, category="Dining", limit=50),
+    "get_transactions_cursor": lambda db: crud.get_transactions(
+        db, user_id=3, limit=50,
+        cursor=crud.get_transactions(db, user_id=3, limit=50)[1],
+    ),
+    "get_user_transactions": lambda db: crud.get_user_transactions(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_user_transaction_frame": lambda db: crud.get_user_transaction_frame(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_user_daily_rollups": lambda db: crud.get_user_daily_rollups(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_user_daily_rollups_categories": lambda db: crud.get_user_daily_rollups(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31", categories=["Dining", "Income"]
+    ),
+    "get_user_category_totals": lambda db: crud.get_user_category_totals(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_user_daily_totals": lambda db: crud.get_user_daily_totals(
+        db, user_id=5, start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_daily_totals_for_users": lambda db: crud.get_daily_totals_for_users(
+        db, user_ids=[1, 2, 3], start_date="2023-01-01", end_date="2023-12-31"
+    ),
+    "get_daily_totals_for_users_date_range": lambda db: crud.get_daily_totals_for_users(
+        db, start_date="2024-06-01", end_date="2024-06-30"
+    ),
+    "get_daily_rollups_for_users": lambda db: crud.get_daily_rollups_for_users(
+        db, start_date="2024-06-01", end_date="2024-06-30"
+    ),
+    "get_user_aggregates": lambda db: crud.get_user_aggregates(
+        db, user_id=5, dimensions=["category", "month"]
+    ),
+    "get_data_version": lambda db: crud.get_data_version(db, 5),
+}
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_uses_index(seeded, name):
+    with SessionLocal() as db, captured_selects() as statements:
+        QUERIES[name](db)
+    assert statements, f"{name} issued no SELECT"
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        assert not full_scans(plan), f"{name} scans a whole table:\n{statement}\n" + "\n".join(plan)
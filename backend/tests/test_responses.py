@@ -0,0 +1,67 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from app.responses import CompressionMiddleware
+
+ITEMS = [{"id": i, "description": "grocery run", "amount": -12.5} for i in range(2000)]
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=1, gzip;q=1", "br"),
+    ("gzip;q=1, br;q=0.1", "gzip"),
+    ("gzip;q=0.5, br;q=0.8", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0.2", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, gzip;q=0.9", "gzip"),
+    ("identity", None),
+    ("gzip;q=0, br;q=0", None),
+    ("", None),
+])
+def test_choose_encoding(accept_encoding, expected):
+    middleware = CompressionMiddleware(None)
+    assert middleware.choose_encoding(accept_encoding) == expected
+
+
+def make_client(**kwargs):
+    app = Starlette(routes=[
+        Route("/items", lambda request: JSONResponse(ITEMS)),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/png", lambda request: Response(b"\x89PNG" * 1000, media_type="image/png")),
+    ])
+    app.add_middleware(CompressionMiddleware, **kwargs)
+    return TestClient(app)
+
+
+# ITEMS encodes to ~110KB: compressed on the threadpool, then inline
+@pytest.mark.parametrize("threadpool_size", [64 * 1024, 10 ** 9])
+@pytest.mark.parametrize("accept_encoding, encoding, decompress", [
+    ("gzip;q=1, br;q=0.1", "gzip", gzip.decompress),
+    ("br, gzip", "br", brotli.decompress),
+])
+def test_compressed_response(threadpool_size, accept_encoding, encoding, decompress):
+    client = make_client(threadpool_size=threadpool_size)
+    with client.stream("GET", "/items", headers={"Accept-Encoding": accept_encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert json.loads(decompress(raw)) == ITEMS
+
+
+def test_uncompressed_responses():
+    client = make_client()
+    for path in ("/small", "/png"):
+        response = client.get(path, headers={"Accept-Encoding": "br, gzip"})
+        assert "content-encoding" not in response.headers, path
+    response = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == ITEMS
@@ -0,0 +1,72 @@
+"""Cold-start checks for the API module.
+
+Importing app.main must stay cheap: prophet, sklearn and plotly are loaded
+on first use (or by PREWARM_MODELS), and the schema is created at startup
+rather than on import. Each import runs in a fresh interpreter so modules
+already loaded by other tests don't hide a regression.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Seconds; generous next to the ~1s the import takes, but well under the
+# ~3s it took when the model libraries were imported eagerly
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.5"))
+LAZY_MODULES = ("prophet", "sklearn", "plotly", "cmdstanpy")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+from sqlalchemy import inspect
+print(json.dumps({
+    "seconds": seconds,
+    "modules": sorted(sys.modules),
+    "tables": inspect(app.main.engine).get_table_names(),
+}))
+"""
+
+
+def import_app():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}"}
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_is_lazy_and_fast():
+    # Best of a few runs, so one slow start on a busy machine doesn't fail it
+    runs = [import_app() for _ in range(3)]
+    loaded = [
+        name for name in runs[0]["modules"]
+        if name.split(".")[0] in LAZY_MODULES
+    ]
+    assert loaded == []
+    assert runs[0]["tables"] == []
+    assert min(run["seconds"] for run in runs) < IMPORT_TIME_BUDGET
+
+
+def test_healthz_and_schema_at_startup():
+    from app import main
+
+    # Answers before startup has run
+    response = TestClient(main.app).get("/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/transactions/1").status_code == 200
+        assert main.forecast_jobs.stats()["workers"] == 2
+    # The lifespan's shutdown half stops the job workers
+    assert main.forecast_jobs.stats()["workers"] == 0
@@ -0,0 +1,129 @@
+"""Shared HTTP client for the dashboard's backend calls.
+
+One pooled ``requests.Session`` serves every callback, so connections to the
+API are reused instead of opened per request. Every call has a timeout;
+connection failures are retried with backoff, and idempotent GETs are also
+retried on 502/503/504 (honouring Retry-After).
+
+GET responses are kept in a small TTL cache. Once an entry expires it is
+revalidated with its ETag when the backend sent one, so an unchanged payload
+costs a 304 rather than a full download.
+
+``gather`` runs independent calls concurrently on a shared thread pool, so
+a refresh takes as long as the slowest call rather than the sum of them.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout=(3.05, 30.0), retries=3, backoff=0.3,
+                 pool_size=10, cache_ttl=5.0, cache_size=256, max_workers=8):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Connect errors are retried for any method; read errors and error
+        # statuses only for GET, so a POST is never sent twice
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api')
+
+    def _cache_key(self, path, params):
+        items = []
+        for name, value in sorted((params or {}).items()):
+            if value is None:
+                continue
+            items.append((name, tuple(value) if isinstance(value, (list, tuple)) else value))
+        return path, tuple(items)
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_set(self, key, etag, data):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, etag, data)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get_json(self, path, params=None, use_cache=True):
+        """GET a JSON payload, served from the TTL cache while it is fresh"""
+        key = self._cache_key(path, params)
+        entry = self._cache_get(key) if use_cache else None
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[2]
+
+        headers = {'If-None-Match': entry[1]} if entry is not None and entry[1] else {}
+        response = self.session.get(
+            self.base_url + path, params=params, headers=headers, timeout=self.timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            data = entry[2]
+        else:
+            response.raise_for_status()
+            data = response.json()
+        if use_cache:
+            self._cache_set(key, response.headers.get('ETag') or (entry[1] if entry else None), data)
+        return data
+
+    def post_json(self, path, payload, timeout=None):
+        response = self.session.post(
+            self.base_url + path, json=payload, timeout=timeout or self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def gather(self, *calls):
+        """Run zero-argument calls concurrently; a failed call yields None"""
+        futures = [self._executor.submit(call) for call in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"API request failed: {str(e)}")
+                results.append(None)
+        return results
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def client_from_env(base_url=None):
+    """Build the client from API_BASE_URL, API_TIMEOUT, API_RETRIES and API_CACHE_TTL"""
+    return ApiClient(
+        base_url or os.getenv('API_BASE_URL', 'http://localhost:8000'),
+        timeout=(float(os.getenv('API_CONNECT_TIMEOUT', '3.05')), float(os.getenv('API_TIMEOUT', '30'))),
+        retries=int(os.getenv('API_RETRIES', '3')),
+        pool_size=int(os.getenv('API_POOL_SIZE', '10')),
+        cache_ttl=float(os.getenv('API_CACHE_TTL', '5')),
+    )
@@ -2,18 +2,83 @@ import dash
 from dash import dcc, html, Input, Output, State, dash_table
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
-import requests
+import numpy as np
 from datetime import datetime, timedelta
+import base64
 import json
+from functools import partial
+
+from api_client import client_from_env
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
 
-# API configuration
-API_BASE_URL = "http://localhost:8000"
+# API configuration; every callback shares this pooled client
+api = client_from_env()
 DEFAULT_USER_ID = 1  # For demo purposes
 
+# Chart payloads are requested in the backend's compact, data-only format
+CHART_PARAMS = {"chart_format": "compact", "binary": True}
+
+def decode_column(value):
+    """Decode a compact chart column: a plain list or a base64 float32 typed array"""
+    if isinstance(value, dict) and 'bdata' in value:
+        array = np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype'])
+        return array.reshape(value['shape']) if 'shape' in value else array
+    return value
+
+def figure_from_chart(spec):
+    """Build a Plotly figure from a compact chart spec returned by the backend"""
+    if not spec:
+        return go.Figure()
+    columns = {name: decode_column(values) for name, values in spec['columns'].items()}
+    kind = spec['type']
+
+    if kind == 'pie':
+        fig = go.Figure(go.Pie(labels=columns['labels'], values=columns['values'], hole=0.3))
+    elif kind == 'bar':
+        fig = go.Figure(go.Bar(x=columns['x'], y=columns['y'], marker_color='indianred'))
+    elif kind == 'heatmap':
+        fig = go.Figure(go.Heatmap(
+            x=columns['x'], y=columns['y'], z=columns['z'], colorscale='Viridis'
+        ))
+    elif kind == 'forecast':
+        fig = go.Figure(go.Scatter(
+            x=columns['ds'], y=columns['yhat'], name="Forecast",
+            line=dict(color='royalblue', width=2)
+        ))
+        if 'yhat_lower' in columns and 'yhat_upper' in columns:
+            fig.add_trace(go.Scatter(
+                x=columns['ds'], y=columns['yhat_upper'], fill=None, mode='lines',
+                line=dict(width=0), showlegend=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=columns['ds'], y=columns['yhat_lower'], fill='tonexty', mode='lines',
+                line=dict(width=0), fillcolor='rgba(65, 105, 225, 0.2)',
+                name="Confidence Interval"
+            ))
+        fig.update_layout(hovermode="x")
+    elif kind == 'components':
+        names = [name for name in columns if name != 'ds']
+        fig = make_subplots(rows=len(names), cols=1, subplot_titles=names)
+        for row, name in enumerate(names, start=1):
+            fig.add_trace(
+                go.Scatter(x=columns['ds'], y=columns[name], name=name, mode='lines'),
+                row=row, col=1
+            )
+        fig.update_layout(showlegend=False, height=250 * len(names))
+    else:
+        return go.Figure()
+
+    fig.update_layout(
+        title=spec.get('title'),
+        xaxis_title=spec.get('x_title'),
+        yaxis_title=spec.get('y_title')
+    )
+    return fig
+
 # Layout
 app.layout = dbc.Container([
     dbc.Row(dbc.Col(html.H1("Personal Finance Dashboard", className="text-center my-4"))),
@@ -109,74 +174,76 @@ app.layout = dbc.Container([
         interval=60*60*1000,  # 1 hour
         n_intervals=0
     ),
-    dcc.Store(id='transaction-data'),
+    dcc.Store(id='daily-totals-data'),
+    dcc.Store(id='category-totals-data'),
     dcc.Store(id='forecast-data'),
     dcc.Store(id='analysis-data')
 ], fluid=True)
 
 # Callbacks
+# The overview charts only need per-day and per-category totals, which the
+# backend reads from its rollups; no transaction rows reach the browser
 @app.callback(
-    Output('transaction-data', 'data'),
+    [Output('daily-totals-data', 'data'),
+     Output('category-totals-data', 'data')],
     [Input('date-range', 'start_date'),
      Input('date-range', 'end_date')]
 )
-def update_transaction_data(start_date, end_date):
-    response = requests.get(
-        f"{API_BASE_URL}/transactions/{DEFAULT_USER_ID}",
-        params={
-            'start_date': start_date,
-            'end_date': end_date
-        }
+def update_aggregate_data(start_date, end_date):
+    params = {
+        'start_date': start_date,
+        'end_date': end_date
+    }
+    daily, categories = api.gather(
+        partial(api.get_json, f"/transactions/daily/{DEFAULT_USER_ID}", params),
+        partial(api.get_json, f"/transactions/categories/{DEFAULT_USER_ID}", params)
     )
-    return response.json()
+    return daily, categories
 
+# Forecast and analysis refresh on the same tick; fetch them concurrently
 @app.callback(
-    Output('forecast-data', 'data'),
-    [Input('interval-component', 'n_intervals')]
+    [Output('forecast-data', 'data'),
+     Output('analysis-data', 'data')],
+    [Input('interval-component', 'n_intervals'),
+     Input('save-budget', 'n_clicks')],
+    [State('budget-table', 'data')]
 )
-def update_forecast_data(n):
-    response = requests.post(
-        f"{API_BASE_URL}/forecast/",
-        json={
-            "user_id": DEFAULT_USER_ID,
-            "model_type": "prophet",
-            "days": 30,
-            "alert_thresholds": {
-                "daily_spending": 200,
-                "weekly_spending": 1000,
-                "negative_balance": True
-            }
-        }
-    )
-    return response.json()
-
-@app.callback(
-    Output('analysis-data', 'data'),
-    [Input('interval-component', 'n_intervals')]
-)
-def update_analysis_data(n):
-    response = requests.get(
-        f"{API_BASE_URL}/transactions/analysis/{DEFAULT_USER_ID}",
-        params={"period": "monthly"}
+def update_dashboard_data(n, save_clicks, budgets):
+    forecast_request = {
+        "user_id": DEFAULT_USER_ID,
+        "model_type": "prophet",
+        "days": 30,
+        "alert_thresholds": {
+            "daily_spending": 200,
+            "weekly_spending": 1000,
+            "negative_balance": True,
+            "category_budgets": [row for row in budgets or [] if row.get('category')]
+        },
+        "chart_format": CHART_PARAMS["chart_format"],
+        "binary_charts": CHART_PARAMS["binary"]
+    }
+    # The analysis GET is revalidated with its ETag once the local copy expires
+    forecast, analysis = api.gather(
+        partial(api.post_json, "/forecast/", forecast_request),
+        partial(
+            api.get_json, f"/transactions/analysis/{DEFAULT_USER_ID}",
+            {"period": "monthly", **CHART_PARAMS}
+        )
     )
-    return response.json()
+    return forecast, analysis
 
 @app.callback(
     Output('daily-spending-chart', 'figure'),
-    [Input('transaction-data', 'data')]
+    [Input('daily-totals-data', 'data')]
 )
 def update_daily_spending_chart(data):
-    df = pd.DataFrame(data)
-    if len(df) == 0:
+    if not data or not data.get('day'):
         return go.Figure()
     
-    df['date'] = pd.to_datetime(df['date'])
-    daily_df = df.groupby('date')['amount'].sum().reset_index()
-    
     fig = go.Figure(
         go.Scatter(
-            x=daily_df['date'],
-            y=daily_df['amount'],
+            x=data['day'],
+            y=data['total'],
             mode='lines+markers',
             name="Daily Spending"
         )
@@ -193,19 +260,16 @@ def update_daily_spending_chart(data):
 
 @app.callback(
     Output('category-pie', 'figure'),
-    [Input('transaction-data', 'data')]
+    [Input('category-totals-data', 'data')]
 )
 def update_category_pie(data):
-    df = pd.DataFrame(data)
-    if len(df) == 0:
+    if not data or not data.get('category'):
         return go.Figure()
     
-    category_df = df.groupby('category')['amount'].sum().reset_index()
-    
     fig = go.Figure(
         go.Pie(
-            labels=category_df['category'],
-            values=category_df['amount'],
+            labels=data['category'],
+            values=data['total'],
             hole=0.3,
             textinfo='label+percent'
         )
@@ -225,10 +289,10 @@ def update_forecast_charts(data):
         return go.Figure(), go.Figure(), "No forecast data available"
     
     # Main forecast chart
-    forecast_fig = go.Figure(data['visualizations']['forecast_plot'])
+    forecast_fig = figure_from_chart(data['visualizations']['forecast_plot'])
     
     # Components chart
-    components_fig = go.Figure(data['visualizations']['components_plot']) if data['visualizations']['components_plot'] else go.Figure()
+    components_fig = figure_from_chart(data['visualizations']['components_plot'])
     
     # Alerts
     alerts = []
@@ -251,41 +315,44 @@ def update_analysis_charts(data, period):
         return go.Figure(), go.Figure(), []
     
     # Heatmap
-    heatmap_fig = go.Figure(data['heatmap'])
+    heatmap_fig = figure_from_chart(data['heatmap'])
     
     # Period comparison
-    period_fig = go.Figure(data['period_analysis'])
+    period_fig = figure_from_chart(data['period_analysis'])
     period_fig.update_layout(title=f"Spending by {period.capitalize()}")
     
     # Category options
     category_options = [
         {'label': cat, 'value': cat} 
-        for cat in pd.DataFrame(data['category_breakdown']['data'][0]['labels']).tolist()
+        for cat in data['category_breakdown']['columns']['labels']
     ]
     
     return heatmap_fig, period_fig, category_options
 
 @app.callback(
     Output('category-trend-chart', 'figure'),
-    [Input('transaction-data', 'data'),
-     Input('category-selector', 'value')]
+    [Input('category-selector', 'value'),
+     Input('date-range', 'start_date'),
+     Input('date-range', 'end_date')]
 )
-def update_category_trend(data, selected_categories):
-    df = pd.DataFrame(data)
-    if len(df) == 0 or not selected_categories:
+def update_category_trend(selected_categories, start_date, end_date):
+    if not selected_categories:
         return go.Figure()
     
-    df['date'] = pd.to_datetime(df['date'])
-    filtered_df = df[df['category'].isin(selected_categories)]
+    # Fetch per-day totals for the selected categories only
+    data = api.get_json(
+        f"/transactions/category-daily/{DEFAULT_USER_ID}",
+        {'category': selected_categories, 'start_date': start_date, 'end_date': end_date}
+    )
+    df = pd.DataFrame(data)
     
     fig = go.Figure()
     for category in selected_categories:
-        category_df = filtered_df[filtered_df['category'] == category]
-        daily_df = category_df.groupby('date')['amount'].sum().reset_index()
+        category_df = df[df['category'] == category]
         
         fig.add_trace(go.Scatter(
-            x=daily_df['date'],
-            y=daily_df['amount'],
+            x=category_df['day'],
+            y=category_df['total'],
             mode='lines',
             name=category
         ))
@@ -0,0 +1,360 @@
+"""Micro-benchmarks for the backend hot paths.
+
+Usage (from the repository root):
+    python scripts/benchmark.py fetch --rows 500000
+    python scripts/benchmark.py batch-forecast --users 2000
+    python scripts/benchmark.py charts --rows 400
+    python scripts/benchmark.py json --rows 5000
+    python scripts/benchmark.py memory --rows 500000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+CATEGORIES = [
+    'Food', 'Dining', 'Groceries', 'Transportation',
+    'Entertainment', 'Shopping', 'Utilities', 'Rent/Mortgage',
+    'Healthcare', 'Education', 'Other', 'Income', 'Transfers'
+]
+
+
+def import_backend():
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def setup_database(path):
+    """Point the backend at a scratch SQLite file and import it"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{path}"
+    import_backend()
+    from app import database, models
+    models.Base.metadata.create_all(bind=database.engine)
+    return database, models
+
+
+def synthetic_rows(rows, user_id=1, seed=0):
+    """Build a synthetic transaction history of the given length"""
+    rng = np.random.default_rng(seed)
+    start = datetime.now() - timedelta(days=365 * 5)
+    offsets = np.sort(rng.integers(0, 365 * 5 * 86400, size=rows))
+    dates = pd.Timestamp(start) + pd.to_timedelta(offsets, unit='s')
+    return pd.DataFrame({
+        'user_id': user_id,
+        'date': dates.to_pydatetime(),
+        'description': 'benchmark',
+        'amount': np.round(-np.abs(rng.normal(40, 25, size=rows)), 2),
+        'category': rng.choice(CATEGORIES, size=rows),
+        'account': 'Checking',
+    })
+
+
+def seed(database, models, rows):
+    df = synthetic_rows(rows)
+    with database.engine.begin() as conn:
+        conn.execute(models.Transaction.__table__.insert(), df.to_dict(orient='records'))
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_fetch(args):
+    """Compare the ORM row-by-row frame build against the columnar fetch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database, models = setup_database(os.path.join(tmp, 'bench.db'))
+        from app import crud
+        seed(database, models, args.rows)
+
+        def orm_path():
+            with database.SessionLocal() as db:
+                transactions = crud.get_user_transactions(db, user_id=1)
+                return pd.DataFrame([{
+                    'date': t.date,
+                    'amount': t.amount,
+                    'category': t.category
+                } for t in transactions])
+
+        def columnar_path():
+            with database.SessionLocal() as db:
+                return crud.get_user_transaction_frame(db, user_id=1)
+
+        results = {}
+        for name, fn in [('orm', orm_path), ('columnar', columnar_path)]:
+            seconds, df = timed(fn, args.repeat)
+            results[name] = {
+                'rows': len(df),
+                'seconds': round(seconds, 4),
+                'rows_per_sec': round(len(df) / seconds),
+            }
+        results['speedup'] = round(results['orm']['seconds'] / results['columnar']['seconds'], 2)
+        database.engine.dispose()
+    return results
+
+
+def bench_batch_forecast(args):
+    """Compare one sklearn regression per user against the batched engine"""
+    import_backend()
+    from app import forecasting
+    logging.getLogger('app.forecasting').setLevel(logging.CRITICAL)
+
+    rng = np.random.default_rng(0)
+    days = pd.date_range(end=datetime.now().date(), periods=365)
+    df = pd.DataFrame({
+        'user_id': np.repeat(np.arange(1, args.users + 1), len(days)),
+        'ds': np.tile(days, args.users),
+        'y': rng.normal(-60, 40, size=args.users * len(days)),
+    })
+
+    # The per-user loop is slow; time a sample and extrapolate
+    sample = min(args.users, 200)
+
+    def per_user():
+        for user_id in range(1, sample + 1):
+            forecasting.linear_regression_forecast(
+                df[df['user_id'] == user_id][['ds', 'y']], 30
+            )
+
+    def batched():
+        return forecasting.batch_linear_regression_forecast(df, 30)
+
+    loop_seconds, _ = timed(per_user, 1)
+    batch_seconds, (forecast_df, metrics, _) = timed(batched, args.repeat)
+    loop_rate = sample / loop_seconds * 60
+    batch_rate = len(metrics) / batch_seconds * 60
+    return {
+        'users': args.users,
+        'per_user_sklearn': {'users_timed': sample, 'seconds': round(loop_seconds, 4),
+                             'users_per_min': round(loop_rate)},
+        'batched': {'users': len(metrics), 'seconds': round(batch_seconds, 4),
+                    'users_per_min': round(batch_rate)},
+        'speedup': round(batch_rate / loop_rate, 2),
+    }
+
+
+def bench_charts(args):
+    """Compare Plotly figure dicts with compact chart specs: payload size and serialization time"""
+    import_backend()
+    from app import aggregates, visualization
+
+    rng = np.random.default_rng(0)
+    # --rows is the number of forecast days; the analysis covers 5 years of weeks
+    ds = pd.date_range(end=datetime.now().date(), periods=args.rows)
+    yhat = rng.normal(-60, 40, size=len(ds))
+    forecast_df = pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - 30, 'yhat_upper': yhat + 30})
+    history = synthetic_rows(50000)
+    history['user_id'] = 1
+    deltas = aggregates.deltas_from_frame(history)
+    aggregate_df = pd.DataFrame(
+        [(dimension, bucket, total, count) for (_, dimension, bucket), (total, count) in deltas.items()],
+        columns=['dimension', 'bucket', 'total', 'count']
+    ).sort_values(['dimension', 'bucket'])
+
+    variants = {
+        'plotly': {'chart_format': 'plotly', 'binary': False},
+        'compact': {'chart_format': 'compact', 'binary': False},
+        'compact_binary': {'chart_format': 'compact', 'binary': True},
+    }
+    payloads = {
+        'forecast': lambda chart_format, binary: (
+            visualization.generate_forecast_plots(forecast_df.copy(), None)
+            if chart_format == 'plotly'
+            else visualization.compact_forecast_charts(forecast_df, None, binary)
+        ),
+        'analysis': lambda chart_format, binary: visualization.build_spending_analysis(
+            aggregate_df, None, 'weekly', chart_format, binary
+        ),
+    }
+
+    results = {}
+    for payload_name, build in payloads.items():
+        results[payload_name] = {}
+        for variant, options in variants.items():
+            build_seconds, payload = timed(lambda: build(**options), args.repeat)
+            dump_seconds, text = timed(lambda: json.dumps(payload), args.repeat)
+            results[payload_name][variant] = {
+                'bytes': len(text),
+                'build_seconds': round(build_seconds, 5),
+                'json_dumps_seconds': round(dump_seconds, 5),
+            }
+        baseline = results[payload_name]['plotly']['bytes']
+        for variant in variants:
+            results[payload_name][variant]['size_vs_plotly'] = round(
+                results[payload_name][variant]['bytes'] / baseline, 3
+            )
+    return results
+
+
+def bench_json(args):
+    """Compare the pydantic/stdlib response path with orjson, plus gzip/brotli sizes"""
+    from typing import List
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database, models = setup_database(os.path.join(tmp, 'bench.db'))
+        from fastapi.encoders import jsonable_encoder
+        from pydantic import TypeAdapter
+        from app import crud, main, responses, schemas, visualization
+        seed(database, models, args.rows)
+        with database.SessionLocal() as db:
+            transactions, _ = crud.get_transactions(db, user_id=1, limit=args.rows)
+
+        rng = np.random.default_rng(0)
+        ds = pd.date_range(end=datetime.now().date(), periods=365)
+        yhat = rng.normal(-60, 40, size=len(ds))
+        forecast_df = pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - 30, 'yhat_upper': yhat + 30})
+        visualizations = visualization.generate_forecast_plots(forecast_df.copy(), None)
+        metrics = {'mae': 12.5, 'rmse': 15.1, 'model_type': 'prophet'}
+
+        def stdlib_encode(adapter, content):
+            # What FastAPI does with a response_model and the default JSONResponse
+            return json.dumps(
+                jsonable_encoder(adapter.validate_python(content)), separators=(',', ':')
+            ).encode('utf-8')
+
+        transaction_adapter = TypeAdapter(List[schemas.Transaction])
+        forecast_adapter = TypeAdapter(schemas.ForecastResult)
+        payloads = {
+            'transactions': {
+                'stdlib': lambda: stdlib_encode(
+                    transaction_adapter,
+                    [schemas.Transaction.model_validate(t, from_attributes=True) for t in transactions]
+                ),
+                'orjson': lambda: responses.dumps(
+                    [{field: getattr(t, field) for field in main.TRANSACTION_FIELDS} for t in transactions]
+                ),
+            },
+            'forecast': {
+                'stdlib': lambda: stdlib_encode(forecast_adapter, {
+                    'forecast': forecast_df.to_dict(orient='records'), 'model_metrics': metrics,
+                    'alerts': {}, 'visualizations': visualizations,
+                }),
+                'orjson': lambda: responses.dumps({
+                    'forecast': responses.frame_records(forecast_df), 'model_metrics': metrics,
+                    'alerts': {}, 'visualizations': visualizations,
+                }),
+            },
+        }
+
+        compression = responses.CompressionMiddleware(None)
+        results = {}
+        for payload_name, encoders in payloads.items():
+            results[payload_name] = {}
+            for name, encode in encoders.items():
+                seconds, body = timed(encode, args.repeat)
+                results[payload_name][name] = {'bytes': len(body), 'seconds': round(seconds, 5)}
+            results[payload_name]['speedup'] = round(
+                results[payload_name]['stdlib']['seconds'] / results[payload_name]['orjson']['seconds'], 2
+            )
+            for encoding in ('gzip', 'br'):
+                if encoding == 'br' and responses.brotli is None:
+                    continue
+                seconds, compressed = timed(lambda: compression.compress(body, encoding), args.repeat)
+                results[payload_name][encoding] = {
+                    'bytes': len(compressed),
+                    'ratio': round(len(compressed) / len(body), 3),
+                    'seconds': round(seconds, 5),
+                }
+        database.engine.dispose()
+    return results
+
+
+def bench_memory(args):
+    """Peak memory of loading one user's history: list of dicts vs columnar vs chunked compact"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database, models = setup_database(os.path.join(tmp, 'bench.db'))
+        from app import crud
+        seed(database, models, args.rows)
+        columns = ('date', 'amount', 'category', 'account')
+
+        def list_of_dicts():
+            with database.SessionLocal() as db:
+                df = pd.DataFrame([{
+                    'date': t.date,
+                    'amount': t.amount,
+                    'category': t.category,
+                    'account': t.account
+                } for t in crud.get_user_transactions(db, user_id=1)])
+                df['date'] = pd.to_datetime(df['date'])
+                return df
+
+        def columnar():
+            with database.SessionLocal() as db:
+                return crud.get_user_transaction_frame(db, user_id=1, columns=columns)
+
+        def chunked_compact():
+            with database.SessionLocal() as db:
+                return crud.get_user_transaction_frame(
+                    db, user_id=1, columns=columns, compact=True, amounts='float32'
+                )
+
+        results = {}
+        for name, fn in [('list_of_dicts', list_of_dicts), ('columnar', columnar),
+                         ('chunked_compact', chunked_compact)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            df = fn()
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {
+                'rows': len(df),
+                'peak_mb': round(peak / 2**20, 1),
+                'frame_mb': round(df.memory_usage(deep=True).sum() / 2**20, 1),
+                'seconds': round(seconds, 3),
+            }
+            del df
+        baseline = results['list_of_dicts']
+        for name in results:
+            results[name]['peak_reduction'] = round(baseline['peak_mb'] / results[name]['peak_mb'], 2)
+        database.engine.dispose()
+    return results
+
+
+BENCHMARKS = {
+    'fetch': bench_fetch,
+    'batch-forecast': bench_batch_forecast,
+    'charts': bench_charts,
+    'json': bench_json,
+    'memory': bench_memory,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    logger.info(f"Running {args.benchmark} benchmark...")
+    report = {'benchmark': args.benchmark, 'results': BENCHMARKS[args.benchmark](args)}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
 from faker import Faker
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import argparse
+import os
 import random
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,6 +23,12 @@ CATEGORIES = [
     'Entertainment', 'Shopping', 'Utilities', 'Rent/Mortgage',
     'Healthcare', 'Education', 'Other', 'Income', 'Transfers'
 ]
+EXPENSE_CATEGORIES = np.array([c for c in CATEGORIES if c not in ['Income', 'Transfers']])
+ACCOUNTS = np.array(['Checking', 'Savings', 'Credit Card'])
+COLUMNS = ['timestamp', 'description', 'amount', 'category', 'user_id', 'account']
+
+# Faker is far too slow to call per row; vectorized mode samples from pools
+DESCRIPTION_POOL_SIZE = 2000
 
 def generate_transactions():
     """Generate realistic transaction data with patterns"""
@@ -89,11 +99,241 @@ def generate_transactions():
     
     return pd.DataFrame(transactions)
 
+def description_pools(seed):
+    """Pre-generate expense and salary descriptions to sample from"""
+    pool_fake = Faker()
+    pool_fake.seed_instance(seed)
+    expenses = np.array([pool_fake.bs() for _ in range(DESCRIPTION_POOL_SIZE)], dtype=object)
+    salaries = np.array([f"Salary from {pool_fake.company()}" for _ in range(DESCRIPTION_POOL_SIZE)],
+                        dtype=object)
+    return expenses, salaries
+
+
+def generate_user_block(user_id, start, days, seed, pools, user_income=None):
+    """Generate `days` days of one user's transactions starting at `start`.
+
+    Draws the same payday, weekend, monthly-bill and holiday-season patterns
+    as generate_transactions, but for the whole block at once with NumPy.
+    The random stream depends only on (seed, user_id, start), so output is
+    reproducible regardless of block order or worker count.
+    """
+    expenses, salaries = pools
+    rng = np.random.default_rng([seed, user_id, int(start.timestamp())])
+    if user_income is None:
+        user_income = income_for_user(user_id, seed)
+
+    # Per-day calendar features
+    day_offsets = np.arange(days)
+    day_start = np.datetime64(start.replace(microsecond=0), 's')
+    day_ts = day_start + day_offsets * np.timedelta64(1, 'D')
+    calendar = pd.DatetimeIndex(day_ts)
+    day_of_month = calendar.day.to_numpy()
+    weekend = calendar.weekday.to_numpy() >= 5
+    month = calendar.month.to_numpy()
+
+    # Expand to one entry per transaction
+    counts = rng.poisson(AVG_TRANSACTIONS_PER_DAY, size=days)
+    tx_day = np.repeat(day_offsets, counts)
+    n = len(tx_day)
+    dom = day_of_month[tx_day]
+    tx_weekend = weekend[tx_day]
+    tx_month = month[tx_day]
+
+    # Paydays: 80% of a payday's transactions are the paycheck
+    is_income = np.isin(dom, [1, 15]) & (rng.random(n) < 0.8)
+
+    amount = np.where(
+        tx_weekend,
+        np.abs(rng.normal(50, 30, n)),
+        np.abs(rng.normal(30, 20, n)),
+    )
+    category = EXPENSE_CATEGORIES[rng.integers(0, len(EXPENSE_CATEGORIES), n)]
+
+    # Monthly bills only land on the 1st; other draws of them are dropped
+    rent = category == 'Rent/Mortgage'
+    utilities = category == 'Utilities'
+    first_of_month = dom == 1
+    amount = np.where(rent & first_of_month, np.abs(rng.normal(1500, 300, n)), amount)
+    amount = np.where(utilities & first_of_month, np.abs(rng.normal(200, 50, n)), amount)
+
+    food = np.isin(category, ['Food', 'Dining', 'Groceries'])
+    amount = np.where(food & tx_weekend, amount * 1.5, amount)
+    entertainment = category == 'Entertainment'
+    amount = np.where(entertainment, amount * np.where(tx_weekend, 2, 0.7), amount)
+    shopping = (category == 'Shopping') & np.isin(tx_month, [11, 12])
+    amount = np.where(shopping, amount * 1.8, amount)
+
+    income_amount = np.abs(rng.normal(user_income / 2, 200, n))
+    amount = np.where(is_income, income_amount, -np.abs(amount))
+    category = np.where(is_income, 'Income', category)
+
+    keep = is_income | ~((rent | utilities) & ~first_of_month)
+    description = np.where(
+        is_income,
+        salaries[rng.integers(0, len(salaries), n)],
+        expenses[rng.integers(0, len(expenses), n)],
+    )
+    account = ACCOUNTS[rng.integers(0, len(ACCOUNTS), n)]
+
+    return pd.DataFrame({
+        'timestamp': day_ts[tx_day][keep],
+        'description': description[keep],
+        'amount': np.round(amount[keep], 2),
+        'category': category[keep],
+        'user_id': user_id,
+        'account': account[keep],
+    }, columns=COLUMNS)
+
+
+def income_for_user(user_id, seed):
+    return abs(np.random.default_rng([seed, user_id]).normal(5000, 1500))
+
+
+def _user_blocks(user_id, start, days, block_days):
+    offset = 0
+    while offset < days:
+        yield user_id, start + timedelta(days=offset), min(block_days, days - offset)
+        offset += block_days
+
+
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_worker_pools = None
+
+
+def _generate_task(task):
+    """Worker entry point; CSV chunks are rendered here so formatting runs in parallel"""
+    global _worker_pools
+    user_id, start, days, seed, fmt = task
+    if _worker_pools is None:
+        _worker_pools = description_pools(seed)
+    df = generate_user_block(user_id, start, days, seed, _worker_pools)
+    if fmt == 'csv':
+        return df.to_csv(None, header=False, index=False, date_format=CSV_DATE_FORMAT)
+    return df
+
+
+def default_end_date():
+    """Midnight today, so runs with the same seed on the same day match"""
+    return datetime.combine(datetime.now().date(), datetime.min.time())
+
+
+def iter_transaction_chunks(num_users=NUM_USERS, days=DAYS_OF_DATA, seed=0, workers=1,
+                            block_days=365, end=None, fmt=None):
+    """Yield transaction chunks, one per (user, block of days).
+
+    Chunks are DataFrames, or pre-rendered CSV text when ``fmt='csv'``. At
+    most about 2 * workers blocks are held in memory at a time.
+    """
+    end = end or default_end_date()
+    start = end - timedelta(days=days)
+    tasks = [
+        (user_id, block_start, block_len, seed, fmt)
+        for user_id in range(1, num_users + 1)
+        for _, block_start, block_len in _user_blocks(user_id, start, days + 1, block_days)
+    ]
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_task(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = 2 * workers
+        pending = [pool.submit(_generate_task, task) for task in tasks[:window]]
+        next_task = window
+        while pending:
+            yield pending.pop(0).result()
+            if next_task < len(tasks):
+                pending.append(pool.submit(_generate_task, tasks[next_task]))
+                next_task += 1
+
+
+class ChunkWriter:
+    """Append transaction chunks to a CSV or Parquet file"""
+
+    def __init__(self, path, fmt='csv'):
+        self.path = path
+        self.format = fmt
+        self._parquet = None
+        self._file = None
+
+    def write(self, chunk):
+        """Write a DataFrame, or CSV text without a header; returns rows written"""
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(table)
+            return len(chunk)
+
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='')
+            self._file.write(','.join(COLUMNS) + '\n')
+        if isinstance(chunk, str):
+            self._file.write(chunk)
+            return chunk.count('\n')
+        chunk.to_csv(self._file, header=False, index=False, date_format=CSV_DATE_FORMAT)
+        return len(chunk)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def generate_to_file(path, num_users=NUM_USERS, days=DAYS_OF_DATA, seed=0, workers=1,
+                     block_days=365, fmt=None, end=None):
+    """Stream generated transactions to disk and return (rows, seconds)"""
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    writer = ChunkWriter(path, fmt)
+    rows = 0
+    started = time.perf_counter()
+    try:
+        for chunk in iter_transaction_chunks(num_users, days, seed, workers, block_days, end, fmt):
+            if len(chunk):
+                rows += writer.write(chunk)
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic transaction data")
+    parser.add_argument('--mode', choices=['stream', 'legacy'], default='stream',
+                        help="stream: vectorized and chunked; legacy: original row-by-row generator")
+    parser.add_argument('--users', type=int, default=NUM_USERS)
+    parser.add_argument('--days', type=int, default=DAYS_OF_DATA)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--block-days', type=int, default=365,
+                        help="Days generated per chunk; bounds memory per worker")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help="Defaults to the output file extension")
+    parser.add_argument('--end-date', type=datetime.fromisoformat, default=None,
+                        help="Last day of data (default: today); fix it to reproduce a dataset")
+    parser.add_argument('--output', default='../data/raw/financial_transactions.csv')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
     logger.info("Generating transaction data...")
-    df = generate_transactions()
-    logger.info(f"Generated {len(df)} transactions")
-    
-    # Save to CSV
-    df.to_csv('../data/raw/financial_transactions.csv', index=False)
-    logger.info("Data saved to ../data/raw/financial_transactions.csv")
+
+    if args.mode == 'legacy':
+        df = generate_transactions()
+        logger.info(f"Generated {len(df)} transactions")
+        df.to_csv(args.output, index=False)
+    else:
+        rows, seconds = generate_to_file(
+            args.output, args.users, args.days, args.seed, args.workers,
+            args.block_days, args.format, args.end_date
+        )
+        logger.info(f"Generated {rows} transactions in {seconds:.1f}s "
+                    f"({rows / seconds:,.0f} rows/sec)")
+    logger.info(f"Data saved to {args.output}")
@@ -1 +1,330 @@
+"""Load test for the backend API.
 
+Seeds a scratch database with generate_data.py, starts uvicorn on it and
+drives a mixed workload of transaction writes, paginated reads, aggregate
+reads, spending analysis and forecasts from concurrent clients. Prints a
+JSON report with throughput and p50/p95/p99 latency per endpoint.
+
+Usage (from the repository root):
+    python scripts/load_test.py --users 20 --days 730 --concurrency 32 --duration 60
+    python scripts/load_test.py --url http://localhost:8000 --no-seed --duration 30
+    python scripts/load_test.py --mix write=5,list=50,analysis=30,forecast=15 \\
+        --max-p95-ms 250 --max-error-rate 0.01 --output load_report.json
+
+With --max-p95-ms / --max-error-rate the script exits with status 1 when an
+endpoint misses the target, so it can gate a release.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MIX = 'write=10,list=35,daily=15,analysis=25,forecast=15'
+CATEGORIES = ['Food', 'Dining', 'Groceries', 'Transportation', 'Entertainment', 'Shopping', 'Utilities']
+
+
+def seed_database(database_url, users, days, seed):
+    """Generate users x days of transactions and bulk-import them"""
+    sys.path.insert(0, SCRIPTS_DIR)
+    import generate_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'transactions.csv')
+        rows, seconds = generate_data.generate_to_file(
+            path, num_users=users, days=days, seed=seed, workers=os.cpu_count() or 1
+        )
+        logger.info(f"Generated {rows} transactions in {seconds:.1f}s")
+        subprocess.run(
+            [sys.executable, '-m', 'app.manage', 'import-transactions', path],
+            cwd=BACKEND_DIR, env={**os.environ, 'DATABASE_URL': database_url}, check=True
+        )
+    return rows
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, port, workers, timeout=60):
+    """Start uvicorn on the backend and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env={**os.environ, 'DATABASE_URL': database_url},
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            requests.get(f"{url}/healthz", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"Server did not start within {timeout}s")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {sorted(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    """Thread-safe latency and status collection per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status, ok):
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][str(status)] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, duration):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            ms = np.asarray(latencies) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            endpoints[endpoint] = {
+                'requests': len(ms),
+                'errors': self.errors[endpoint],
+                'error_rate': round(self.errors[endpoint] / len(ms), 4),
+                'throughput_rps': round(len(ms) / duration, 2),
+                'mean_ms': round(float(ms.mean()), 2),
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+                'max_ms': round(float(ms.max()), 2),
+                'statuses': dict(self.statuses[endpoint]),
+            }
+        total = sum(e['requests'] for e in endpoints.values())
+        errors = sum(e['errors'] for e in endpoints.values())
+        return {
+            'duration_seconds': round(duration, 2),
+            'requests': total,
+            'errors': errors,
+            'throughput_rps': round(total / duration, 2) if duration else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+class Client:
+    """One simulated user session issuing requests on its own connection"""
+
+    def __init__(self, url, recorder, user_ids, rng, args):
+        self.url = url
+        self.recorder = recorder
+        self.user_ids = user_ids
+        self.rng = rng
+        self.args = args
+        self.session = requests.Session()
+
+    def call(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url + path, timeout=self.args.timeout, **kwargs)
+            ok = response.status_code < 400
+            status = response.status_code
+        except requests.RequestException as e:
+            response, ok, status = None, False, type(e).__name__
+        self.recorder.record(endpoint, time.perf_counter() - start, status, ok)
+        return response
+
+    def user(self):
+        return self.rng.choice(self.user_ids)
+
+    def write(self):
+        user_id = self.user()
+        now = datetime.now()
+        batch = [
+            {
+                'user_id': user_id,
+                'date': (now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 30))).isoformat(),
+                'description': 'load test',
+                'amount': round(-self.rng.uniform(1, 150), 2),
+                'category': self.rng.choice(CATEGORIES),
+                'account': 'Checking',
+            }
+            for _ in range(self.args.write_batch)
+        ]
+        self.call('POST /transactions/batch', 'POST', '/transactions/batch', json=batch)
+
+    def list(self):
+        user_id = self.user()
+        params = {'limit': self.args.page_size}
+        for _ in range(self.args.pages):
+            response = self.call('GET /transactions/{user_id}', 'GET', f'/transactions/{user_id}', params=params)
+            cursor = response.headers.get('X-Next-Cursor') if response is not None else None
+            if not cursor:
+                break
+            params['cursor'] = cursor
+
+    def daily(self):
+        user_id = self.user()
+        end = datetime.now().date()
+        params = {'start_date': (end - timedelta(days=90)).isoformat(), 'end_date': end.isoformat()}
+        self.call('GET /transactions/daily/{user_id}', 'GET', f'/transactions/daily/{user_id}', params=params)
+
+    def analysis(self):
+        user_id = self.user()
+        self.call(
+            'GET /transactions/analysis/{user_id}', 'GET', f'/transactions/analysis/{user_id}',
+            params={'period': self.rng.choice(['monthly', 'weekly']), 'chart_format': 'compact'}
+        )
+
+    def forecast(self):
+        self.call('POST /forecast/', 'POST', '/forecast/', json={
+            'user_id': self.user(),
+            'model_type': self.args.model,
+            'days': 30,
+            'alert_thresholds': {'daily_spending': 200, 'weekly_spending': 1000},
+            'chart_format': 'compact',
+        })
+
+
+OPERATIONS = {
+    'write': Client.write,
+    'list': Client.list,
+    'daily': Client.daily,
+    'analysis': Client.analysis,
+    'forecast': Client.forecast,
+}
+
+
+def run_workload(url, args):
+    mix = parse_mix(args.mix)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    user_ids = list(range(1, args.users + 1))
+    recorder = Recorder()
+    stop = threading.Event()
+
+    def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        client = Client(url, recorder, user_ids, rng, args)
+        while not stop.is_set():
+            OPERATIONS[rng.choices(names, weights)[0]](client)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    logger.info(f"Warming up for {args.warmup}s with {args.concurrency} clients")
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    logger.info(f"Measuring for {args.duration}s")
+    time.sleep(args.duration)
+    recorder.recording = False
+    duration = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.timeout)
+
+    report = recorder.report(duration)
+    report['config'] = {
+        'concurrency': args.concurrency, 'mix': mix, 'users': args.users,
+        'server_workers': args.workers, 'forecast_model': args.model,
+    }
+    return report
+
+
+def check_targets(report, max_p95_ms=None, max_error_rate=None):
+    """Endpoints missing the latency or error-rate target"""
+    failures = []
+    for endpoint, stats in report['endpoints'].items():
+        if max_p95_ms is not None and stats['p95_ms'] > max_p95_ms:
+            failures.append(f"{endpoint}: p95 {stats['p95_ms']}ms > {max_p95_ms}ms")
+        if max_error_rate is not None and stats['error_rate'] > max_error_rate:
+            failures.append(f"{endpoint}: error rate {stats['error_rate']} > {max_error_rate}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="Test a running server instead of starting one")
+    parser.add_argument('--database-url', help="Database for the started server (default: scratch SQLite)")
+    parser.add_argument('--no-seed', action='store_true', help="Skip seeding the database")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=30, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=5, help="Unmeasured seconds before measuring")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Operation weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument('--model', default='linear', choices=['linear', 'prophet'])
+    parser.add_argument('--write-batch', type=int, default=20, help="Transactions per write request")
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--pages', type=int, default=3, help="Pages followed per paginated read")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--max-p95-ms', type=float, default=None)
+    parser.add_argument('--max-error-rate', type=float, default=None)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        url = args.url
+        if url is None:
+            database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'load_test.db')}"
+            if not args.no_seed:
+                seed_database(database_url, args.users, args.days, args.seed)
+            server, url = start_server(database_url, free_port(), args.workers)
+        try:
+            report = run_workload(url.rstrip('/'), args)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    failures = check_targets(report, args.max_p95_ms, args.max_error_rate)
+    report['failures'] = failures
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+    if failures:
+        for failure in failures:
+            logger.error(failure)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()